@@ -1,8 +1,11 @@
 """extract data from .csv file
 """
-from io import StringIO
+from io import BytesIO
 import numpy as np
-import matplotlib.pyplot as plt
+from plotTools import pooledFigure, renderFigure
+
+CHUNK_SIZE = 1024**2   #bytes read at once by use()
+MAX_POINTS = 2000      #number of points kept for plotting; more data is thinned out
 
 def use(filePath, recipe='', saveFileName=None):
   """
@@ -15,28 +18,100 @@ def use(filePath, recipe='', saveFileName=None):
   Returns:
     dict: containing image, metaVendor, metaUser, recipe
   """
-  # Extractor for fancy instrument
-  data = np.loadtxt(filePath, delimiter=',')
-  if recipe.endswith('red'):              #: Draw with red curve
-    plt.plot(data[:,0], data[:,1],'r')
-  else:                                   #: Default | blueish curve
-    plt.plot(data[:,0], data[:,1])
-  metaUser = {'max':data[:,1].max(), 'min':data[:,1].min()}
-  recipe = 'csv'
-
-  #save to file
-  if saveFileName is not None:
-    plt.savefig(saveFileName, dpi=150, bbox_inches='tight')
-
-  #convert axes to svg image
-  figfile = StringIO()
-  plt.savefig(figfile, format='svg')
-  image = figfile.getvalue()
-
-  # return everything
-  return {'image':image, 'recipe':recipe, 'metaVendor':{}, 'metaUser':metaUser}
-
-  #other datatypes follow here
-  #...
-  #final return if nothing successful
-  #return {}
+  stream = Stream(recipe)
+  with open(filePath, 'rb') as fIn:
+    for chunk in iter(lambda: fIn.read(CHUNK_SIZE), b''):
+      stream.update(chunk)
+  return stream.result(saveFileName)
+
+
+class Stream:
+  """
+  Streaming extractor: fed with chunks of the file and never holds the entire file
+  """
+  def __init__(self, recipe=''):
+    """
+    Args:
+      recipe (string): supplied to guide recipes
+                       recipe is / separated hierarchical elements parent->child
+    """
+    self.recipe = recipe
+    self.rest   = b''            #incomplete last line of previous chunk
+    self.points = np.zeros((0,2))
+    self.stride = 1              #every stride-th line is kept in points
+    self.count  = 0
+    self.checkedHeader = False   #first line is skipped if it is not numeric
+    self.minimum, self.maximum = np.inf, -np.inf
+
+
+  def update(self, chunk):
+    """
+    Consume next part of file
+
+    Args:
+      chunk (bytes): next part of file
+    """
+    lines, _, self.rest = (self.rest+chunk).rpartition(b'\n')
+    self.addLines(lines)
+    return
+
+
+  def addLines(self, lines):
+    """
+    Add complete lines to statistics and thinned-out points
+
+    Args:
+      lines (bytes): complete lines
+    """
+    if not self.checkedHeader and lines.strip():
+      self.checkedHeader = True
+      first, _, rest = lines.lstrip().partition(b'\n')
+      try:
+        float(first.split(b',')[0])
+      except ValueError:
+        lines = rest
+    if not lines.strip():
+      return
+    data = np.loadtxt(BytesIO(lines), delimiter=',', ndmin=2)
+    self.minimum = min(self.minimum, data[:,1].min())
+    self.maximum = max(self.maximum, data[:,1].max())
+    keep = (self.count+np.arange(len(data)))%self.stride == 0
+    self.points = np.vstack((self.points, data[keep,:2]))
+    self.count += len(data)
+    while len(self.points)>2*MAX_POINTS:
+      self.points = self.points[::2]
+      self.stride*= 2
+    return
+
+
+  def result(self, saveFileName=None):
+    """
+    Finish: create image and metadata
+
+    Args:
+      saveFileName (string): if given, save the image to this file-name
+
+    Returns:
+      dict: containing image, metaVendor, metaUser, recipe
+    """
+    # Extractor for fancy instrument
+    self.addLines(self.rest)
+    self.rest = b''
+    with pooledFigure() as (fig, ax):
+      if self.recipe.endswith('red'):         #: Draw with red curve
+        ax.plot(self.points[:,0], self.points[:,1],'r')
+      else:                                   #: Default | blueish curve
+        ax.plot(self.points[:,0], self.points[:,1])
+      metaUser = {} if self.count==0 else {'max':self.maximum, 'min':self.minimum}  #empty file: no statistics
+      recipe = 'csv'
+
+      #save to file and convert axes to svg image
+      image = renderFigure(fig, 'svg', saveFileName)
+
+    # return everything
+    return {'image':image, 'recipe':recipe, 'metaVendor':{}, 'metaUser':metaUser}
+
+    #other datatypes follow here
+    #...
+    #final return if nothing successful
+    #return {}
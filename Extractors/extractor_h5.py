@@ -0,0 +1,214 @@
+"""extract data from a .h5 file (HDF5 and NeXus)
+"""
+from itertools import islice
+import numpy as np
+import h5py
+from plotTools import pooledFigure, renderFigure
+
+MAX_POINTS     = 1000          #max. number of points/pixels along each axis of thumbnail
+THUMB_BLOCKS   = 10            #max. number of chunk-aligned blocks along each axis of thumbnail
+MAX_STAT_BYTES = 256*1024**2   #max. number of bytes read for statistics, larger datasets are sampled
+BLOCK_BYTES    = 16*1024**2    #size of blocks read for statistics of contiguous datasets
+MAX_ATTRIBUTES = 1000          #max. number of attributes collected into metaVendor
+
+def use(filePath, recipe='', saveFileName=None):
+  """
+  Datasets are never read as a whole:
+  - metaVendor: attributes of all groups and datasets while walking the tree
+  - metaUser: statistics of main dataset from chunk-wise reads
+  - thumbnail: strided subset of main dataset; of chunked datasets whole chunks at a stride are read
+
+  Args:
+    filePath (string): full path file name
+    recipe (string): supplied to guide recipes
+                     recipe is / separated hierarchical elements parent->child
+    saveFileName (string): if given, save the image to this file-name
+
+  Returns:
+    dict: containing image, metaVendor, metaUser, recipe
+  """
+  # Extractor
+  with h5py.File(filePath, 'r') as h5File:
+    metaVendor, largestDataset = {}, [None, 0]
+
+    def visit(name, item):
+      """
+      collect attributes and remember largest numeric dataset
+
+      Args:
+        name (string): path of item in file
+        item (h5py.Group, h5py.Dataset): item
+      """
+      for key, value in item.attrs.items():
+        if len(metaVendor)<MAX_ATTRIBUTES:
+          value = simplify(value)
+          if value is not None:
+            metaVendor[name+'@'+key] = value
+      if isinstance(item, h5py.Dataset) and item.dtype.kind in 'biuf' and item.size>largestDataset[1]:
+        largestDataset[:] = [name, item.size]
+      return
+
+    for key, value in h5File.attrs.items():
+      value = simplify(value)
+      if value is not None:
+        metaVendor['@'+key] = value
+    h5File.visititems(visit)
+    dataset = nexusSignal(h5File)
+    if dataset is None and largestDataset[0] is not None:
+      dataset = h5File[largestDataset[0]]
+    if dataset is None:
+      return {'image':'', 'recipe':'hdf5', 'metaVendor':metaVendor, 'metaUser':{}}
+    metaUser = {'dataset':dataset.name, 'shape':list(dataset.shape), 'dtype':str(dataset.dtype)}
+    metaUser.update(statistics(dataset))
+
+    if recipe.endswith('log'):                    #: Logarithmic intensity
+      logScale = True
+      recipe = 'hdf5/log'
+    else:                                         #: Default | linear intensity
+      logScale = False
+      recipe = 'hdf5'
+    image = thumbnail(dataset, logScale, saveFileName)
+
+  # return everything
+  return {'image':image, 'recipe':recipe, 'metaVendor':metaVendor, 'metaUser':metaUser}
+
+
+def nexusSignal(h5File):
+  """
+  Follow NeXus 'default' and 'signal' attributes to main dataset
+
+  Args:
+    h5File (h5py.File): open file
+
+  Returns:
+    h5py.Dataset: main dataset or None
+  """
+  group = h5File
+  while 'default' in group.attrs:
+    name = simplify(group.attrs['default'])
+    if name not in group or not isinstance(group[name], h5py.Group):
+      break
+    group = group[name]
+  if 'signal' in group.attrs:
+    name = simplify(group.attrs['signal'])
+    if name in group and isinstance(group[name], h5py.Dataset):
+      return group[name]
+  return None
+
+
+def statistics(dataset):
+  """
+  Statistics from chunk-wise (or block-wise) reads; only parts are read if dataset is very large
+
+  Args:
+    dataset (h5py.Dataset): dataset
+
+  Returns:
+    dict: min, max, mean, std and if sampled
+  """
+  if dataset.shape==() or dataset.size==0:
+    return {}
+  if dataset.chunks is not None:
+    blocks  = dataset.iter_chunks()
+    numBlocks = int(np.prod([-(-length//chunk) for length, chunk in zip(dataset.shape, dataset.chunks)]))
+  else:
+    rowBytes = max(1, dataset.nbytes//dataset.shape[0])
+    rows     = max(1, BLOCK_BYTES//rowBytes)
+    blocks   = (np.s_[i:i+rows] for i in range(0, dataset.shape[0], rows))
+    numBlocks= -(-dataset.shape[0]//rows)
+  stride     = max(1, int(np.ceil(dataset.nbytes/MAX_STAT_BYTES)))
+  stride     = min(stride, numBlocks)
+  count, total, totalSquare, minimum, maximum = 0, 0., 0., np.inf, -np.inf
+  for block in islice(blocks, 0, None, stride):
+    data = dataset[block].astype(float)
+    data = data[np.isfinite(data)]
+    if data.size==0:
+      continue
+    count       += data.size
+    total       += data.sum()
+    totalSquare += np.square(data).sum()
+    minimum, maximum = min(minimum, data.min()), max(maximum, data.max())
+  if count==0:
+    return {}
+  mean = total/count
+  return {'min':float(minimum), 'max':float(maximum), 'mean':float(mean),
+          'std':float(np.sqrt(max(totalSquare/count-mean**2, 0))), 'statistics sampled':stride>1}
+
+
+def thumbnailData(dataset):
+  """
+  Data of thumbnail: at most MAX_POINTS along each of the last two axes; higher dimensions use the first slices
+  - chunked data: blocks of whole chunks at a stride across the entire axis, at most THUMB_BLOCKS per axis
+
+  Args:
+    dataset (h5py.Dataset): dataset with at least one dimension
+
+  Returns:
+    np.array: data
+  """
+  selection = tuple([0]*max(dataset.ndim-2, 0))
+  blocks = []   #per axis: slices that are read
+  for idx, length in enumerate(dataset.shape[-2:], start=max(dataset.ndim-2, 0)):
+    starts, size = [0], length
+    if dataset.chunks is not None:   #strided read touches (nearly) every chunk: blocks of whole chunks instead
+      size    = dataset.chunks[idx]*max(1, MAX_POINTS//THUMB_BLOCKS//dataset.chunks[idx])
+      nBlocks = int(np.ceil(length/size))
+      if nBlocks>THUMB_BLOCKS:
+        starts = [i*size for i in np.unique(np.linspace(0, nBlocks-1, THUMB_BLOCKS).round().astype(int))]
+      else:
+        size = length
+    step = max(1, int(np.ceil(min(size*len(starts), length)/MAX_POINTS)))
+    blocks.append([np.s_[i:min(i+size, length):step] for i in starts])
+  if len(blocks)==1:
+    return np.block([dataset[selection+(i,)] for i in blocks[0]])
+  return np.block([[dataset[selection+(i,j)] for j in blocks[1]] for i in blocks[0]])
+
+
+def thumbnail(dataset, logScale=False, saveFileName=None):
+  """
+  Plot 1D data as curve and 2D data as image, see thumbnailData
+
+  Args:
+    dataset (h5py.Dataset): dataset
+    logScale (bool): plot logarithm of data
+    saveFileName (string): if given, save the image to this file-name
+
+  Returns:
+    string: svg-string or base64 encoded png-string
+  """
+  if dataset.ndim==0:
+    return ''
+  data = thumbnailData(dataset).astype(float)
+  if logScale:
+    data = np.log10(np.clip(data, 1e-12, None))
+  if data.ndim==1:
+    with pooledFigure() as (fig, ax):
+      ax.plot(data)
+      ax.set_title(dataset.name)
+      return renderFigure(fig, 'svg', saveFileName)
+  with pooledFigure('image') as (fig, ax):
+    ax.imshow(data)
+    return renderFigure(fig, 'png', saveFileName)
+
+
+def simplify(value):
+  """
+  Convert attribute value into json-compatible value
+
+  Args:
+    value (any): attribute value from h5py
+
+  Returns:
+    any: string, number, list or None if too large
+  """
+  if isinstance(value, bytes):
+    return value.decode('utf-8', errors='replace')
+  if isinstance(value, np.ndarray):
+    if value.size>20:
+      return None
+    return [simplify(i) for i in value.tolist()]
+  if isinstance(value, np.generic):
+    return value.item()
+  if isinstance(value, (str, int, float, bool)) or value is None:
+    return value
+  return str(value)
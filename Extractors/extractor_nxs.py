@@ -0,0 +1,3 @@
+"""extract data from a .nxs file (NeXus): same as .h5 file
+"""
+from extractor_h5 import use  # pylint: disable=unused-import
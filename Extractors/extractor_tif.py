@@ -0,0 +1,167 @@
+"""extract data from a .tif file
+"""
+import base64
+from io import BytesIO
+import numpy as np
+from PIL import Image
+import tifffile
+
+THUMBNAIL_SIZE = 400   #max. number of pixel of thumbnail along each axis
+MAX_PAGES      = 9     #max. number of pages sampled from a stack
+
+def use(filePath, recipe='', saveFileName=None):
+  """
+  Pixel data is never loaded as a whole:
+  - use the smallest level of a pyramid that is larger than the thumbnail
+  - otherwise read memory-mapped or segment (tile/strip) wise with stride
+
+  Args:
+    filePath (string): full path file name
+    recipe (string): supplied to guide recipes
+                     recipe is / separated hierarchical elements parent->child
+    saveFileName (string): if given, save the image to this file-name
+
+  Returns:
+    dict: containing image, metaVendor, metaUser, recipe
+  """
+  # Extractor
+  with tifffile.TiffFile(filePath) as tif:
+    metaVendor = vendorMetadata(tif)
+    series = tif.series[0]
+    pages  = series.pages
+    if recipe.endswith('first'):                  #: First page only
+      indices = [0]
+      recipe = 'image/tif/first'
+    else:                                         #: Default | sampled pages of stack
+      indices = np.unique(np.linspace(0, len(pages)-1, min(len(pages), MAX_PAGES)).astype(int))
+      recipe = 'image/tif'
+    level = series
+    for levelI in series.levels[1:]:              #pyramid: smallest level larger than thumbnail
+      if min(levelI.pages[0].shape[:2]) >= THUMBNAIL_SIZE:
+        level = levelI
+    thumbnails = [reducedPage(tif, level, idx) for idx in indices]
+    page = pages[0]
+    metaUser = {'number pages': len(pages), 'dimension': list(page.shape), 'dtype': str(page.dtype),
+                'number levels': len(series.levels)}
+  imgArr = montage(thumbnails)
+  metaUser.update({'min':float(imgArr.min()), 'max':float(imgArr.max()), 'mean':float(imgArr.mean())})
+
+  #save to file
+  imageData = Image.fromarray(toUint8(imgArr))
+  if saveFileName is not None:
+    imageData.save(saveFileName)
+
+  # convert PIL image to base64
+  figfile = BytesIO()
+  imageData.save(figfile, format="JPEG")
+  imageData = base64.b64encode(figfile.getvalue()).decode()
+  imageData = "data:image/jpeg;base64," + imageData
+
+  # return everything
+  return {'image':imageData, 'recipe':recipe, 'metaVendor':metaVendor, 'metaUser':metaUser}
+
+
+def reducedPage(tif, level, index):
+  """
+  Read one page with stride such that the result fits the thumbnail size
+
+  Args:
+    tif (TiffFile): open tiff file
+    level (TiffPageSeries): series or pyramid level
+    index (int): index of page in this level
+
+  Returns:
+    np.array: 2D array (gray) or 3D array (color, last axis)
+  """
+  page   = level.pages[index].aspage()            #pages of stacks are light-weight frames without tags
+  height, width = page.shape[:2] if page.planarconfig!=2 else page.shape[1:3]
+  step   = max(1, int(np.ceil(max(height, width)/THUMBNAIL_SIZE)))
+  if page.is_memmappable:                         #uncompressed and contiguous
+    data = np.memmap(tif.filehandle.path, dtype=page.dtype.newbyteorder(tif.byteorder), mode='r',
+                     offset=page.dataoffsets[0], shape=page.shape)
+    if page.planarconfig==2 and data.ndim==3:
+      data = data[0]
+    return np.array(data[::step, ::step])
+  # compressed or tiled: decode one segment at a time and keep every step-th pixel
+  samples = page.samplesperpixel if page.planarconfig!=2 else 1
+  result  = np.zeros((-(-height//step), -(-width//step), samples), dtype=page.dtype)
+  for segment, indices, _ in page.segments(maxworkers=1):
+    if segment is None or indices[0]>0:            #empty segment or further sample planes
+      continue
+    y0, x0 = indices[2], indices[3]
+    segment = segment[0, (-y0)%step::step, (-x0)%step::step, :]
+    yStart, xStart = -(-y0//step), -(-x0//step)
+    segment = segment[:result.shape[0]-yStart, :result.shape[1]-xStart]
+    result[yStart:yStart+segment.shape[0], xStart:xStart+segment.shape[1]] = segment
+  return result[:,:,0] if samples==1 else result
+
+
+def montage(thumbnails):
+  """
+  Combine thumbnails of sampled pages into a square-ish grid
+
+  Args:
+    thumbnails (list): list of arrays of the same shape
+
+  Returns:
+    np.array: combined array
+  """
+  if len(thumbnails)==1:
+    return thumbnails[0]
+  columns = int(np.ceil(np.sqrt(len(thumbnails))))
+  rows    = int(np.ceil(len(thumbnails)/columns))
+  height, width = thumbnails[0].shape[:2]
+  result = np.zeros((rows*height, columns*width)+thumbnails[0].shape[2:], dtype=thumbnails[0].dtype)
+  for idx, thumbnail in enumerate(thumbnails):
+    row, column = divmod(idx, columns)
+    result[row*height:(row+1)*height, column*width:(column+1)*width] = thumbnail
+  return result
+
+
+def toUint8(imgArr):
+  """
+  Scale array to 8-bit gray or RGB image
+
+  Args:
+    imgArr (np.array): image data
+
+  Returns:
+    np.array: image data as uint8
+  """
+  if imgArr.ndim==3 and imgArr.shape[2]!=3:
+    imgArr = imgArr[:,:,:3] if imgArr.shape[2]==4 else imgArr[:,:,0]
+  if imgArr.dtype==np.uint8:
+    return imgArr
+  imgArr = imgArr.astype(float)
+  low, high = np.percentile(imgArr, [0.5, 99.5])
+  if high<=low:
+    high = low+1
+  return (np.clip((imgArr-low)/(high-low), 0, 1)*255).astype(np.uint8)
+
+
+def vendorMetadata(tif):
+  """
+  Vendor metadata: Zeiss SEM tags, FEI/Thermo tags and general tiff-tags
+
+  Args:
+    tif (TiffFile): open tiff file
+
+  Returns:
+    dict: metadata with label as key
+  """
+  metaVendor = {}
+  page = tif.pages[0]
+  for key, value in [('Software',page.software), ('DateTime',page.datetime), ('Description',page.description)]:
+    if value and len(str(value))<256:
+      metaVendor[key] = str(value)
+  if tif.is_sem and tif.sem_metadata:             #Zeiss SEM: key -> (label, value) or (label, value, unit)
+    for value in tif.sem_metadata.values():
+      if isinstance(value, tuple) and len(value)==2:
+        metaVendor[value[0]] = value[1]
+      elif isinstance(value, tuple) and len(value)==3:
+        metaVendor[value[0]] = [value[1], value[2]]
+  if tif.is_fei and tif.fei_metadata:             #FEI / Thermo Fisher SEM: sections of key-value pairs
+    for section, content in tif.fei_metadata.items():
+      for key, value in content.items():
+        metaVendor[section+'/'+key] = value
+  return metaVendor
@@ -0,0 +1,96 @@
+"""Plotting helper for extractors
+- object oriented matplotlib: no global pyplot state, safe in threads and process pools
+- figures are pooled per template and thread; they are cleared after each use
+- render to svg or png in memory
+"""
+import base64, os, threading
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+TEMPLATES = {
+  'default':   {'figsize':(6.4, 4.8), 'dpi':100, 'axis':True},
+  'thumbnail': {'figsize':(4.0, 3.0), 'dpi':100, 'axis':True},
+  'image':     {'figsize':(4.0, 4.0), 'dpi':100, 'axis':False},
+}
+MAX_POOL_SIZE = 2   #max. number of idle figures per template and thread
+
+_pool = threading.local()
+
+
+def _resetPool():
+  """
+  Drop all pooled figures, e.g. in a forked child process
+  """
+  global _pool  # pylint: disable=global-statement
+  _pool = threading.local()
+  return
+
+if hasattr(os, 'register_at_fork'):
+  os.register_at_fork(after_in_child=_resetPool)
+
+
+@contextmanager
+def pooledFigure(template='default'):
+  """
+  Borrow a figure and its axes from the pool of this thread and return it afterwards
+
+  Example:
+    with pooledFigure() as (fig, ax):
+      ax.plot(x, y)
+      image = renderFigure(fig)
+
+  Args:
+    template (string): name of template in TEMPLATES
+
+  Yields:
+    tuple: Figure, Axes
+  """
+  if not hasattr(_pool, 'figures'):
+    _pool.figures = {}
+  setting = TEMPLATES[template]
+  idleFigures = _pool.figures.setdefault(template, [])
+  if idleFigures:
+    fig = idleFigures.pop()
+  else:
+    fig = Figure(figsize=setting['figsize'], dpi=setting['dpi'])
+    FigureCanvasAgg(fig)
+  axes = fig.add_subplot()
+  if not setting['axis']:
+    axes.set_axis_off()
+  try:
+    yield fig, axes
+  finally:
+    fig.clear()   #remove all artists: no memory growth and no overplotting
+    if len(idleFigures) < MAX_POOL_SIZE:
+      idleFigures.append(fig)
+
+
+def renderFigure(fig, fileFormat='svg', saveFileName=None, dpi=150):
+  """
+  Render figure in memory and, if requested, to file
+
+  Args:
+    fig (Figure): figure to render
+    fileFormat (string): 'svg' or 'png'
+    saveFileName (string): if given, save the image to this file-name
+    dpi (int): resolution used for saving to file
+
+  Returns:
+    string: svg-string or base64 encoded png-string
+
+  Raises:
+    ValueError: file format not supported
+  """
+  if saveFileName is not None:
+    fig.savefig(saveFileName, dpi=dpi, bbox_inches='tight')
+  if fileFormat=='svg':
+    figfile = StringIO()
+    fig.savefig(figfile, format='svg')
+    return figfile.getvalue()
+  if fileFormat=='png':
+    figfile = BytesIO()
+    fig.savefig(figfile, format='png')
+    return "data:image/png;base64," + base64.b64encode(figfile.getvalue()).decode()
+  raise ValueError('Figure format not supported '+fileFormat)
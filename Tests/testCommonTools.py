@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""TEST native commonTools against js2py-translated commonTools: same output and faster
+- does not require a database
+"""
+import os, sys, re, warnings, timeit, copy
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    warnings.filterwarnings('ignore', module='js2py')
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from commonTools import commonTools as cTJS
+    import commonToolsNative as cT
+    magicTags = ['P1','P2','P3','TODO','WAIT','DONE']
+
+    ### camelCase
+    for text in ['Intermetals at interfaces', 'get steel and Al-powder', '  leading and trailing  ',
+                 'one\ttab\nnewline', 'ALL CAPS', 'x', '', 'numbers 12 and 3b', 'Ärger über Öl',
+                 'a_b c-d.e', 'schön\u00a0groß']:
+      self.assertEqual(cT.camelCase(text), cTJS.camelCase(text), 'camelCase: '+repr(text))
+
+    ### uuidv4
+    for _ in range(10):
+      self.assertTrue(re.fullmatch(r'[0-9a-f]{32}', cT.uuidv4()), 'uuidv4')
+
+    ### fillDocBeforeCreate
+    docs = [({'-name':'Project', 'comment':'#intermetal #Fe #Al This is a test project'}, 'x0'),
+            ({'-name':'Step', 'comment':'This is hard! #TODO', '-type':'x/x1'}, 'x1'),
+            ({'-name':'file.csv', 'comment':'great #5 :temperature:300: :unit:K: :hex:0x1A: :e:1e3: :f:0.5:',
+              '-type':['measurement','csv'], 'tags':['#P1']}, ['measurement','csv']),
+            ({'-name':'sample', 'qrCode':'13214124 99698708', 'comment':'  indented\n   three\n    four'},
+             'sample'),
+            ({'-name':' padded ', 'empty':'', 'image':'', 'comment':None, 'tags':'#a #b', '_id':'s-123'},
+             'sample'),
+            ({'-name':'edit', '_id':'m-1', '-type':['measurement'], 'tags':[], 'comment':'#DONE\n:k:v:',
+              '-branch':{'stack':['x-1'],'child':2,'path':'a/b','op':'u'}}, '--'),
+            ({'-name':'numbers', 'comment':':a:Infinity: :b:-2: :c:abc: :d:NaN: :name:ignored:'}, 'procedure'),
+           ]
+    for doc, docType in docs:
+      resultJS = cTJS.fillDocBeforeCreate(copy.deepcopy(doc), docType).to_dict()
+      result   = cT.fillDocBeforeCreate(doc, docType)
+      self.assertRegex(result['-date'], r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$', 'fillDoc: date')
+      self.assertEqual(result['_id'][:2], resultJS['_id'][:2], 'fillDoc: id prefix')
+      for res in (result, resultJS):
+        del res['-date']
+        if '_id' not in doc:
+          del res['_id']
+      self.assertEqual(result, resultJS, 'fillDoc: '+str(doc))
+
+    ### ontology2Labels
+    ontology = {'_id':'-ontology-', '_rev':'1-a', 'x0':[], 'x1':[], 'x2':[], 'x5':[], 'measurement':[],
+                'sample':[], 'procedure':[], 'instrument':[]}
+    for tableFormat in [{}, {'x0':{'-label-':'Experiments'}, 'sample':{'-label-':'Specimens'},
+                             'measurement':{'-default-':[20,20]}}]:
+      resultJS = cTJS.ontology2Labels(ontology, tableFormat).to_dict()
+      self.assertEqual(cT.ontology2Labels(ontology, tableFormat), resultJS, 'ontology2Labels')
+
+    ### hierarchy2String, editString2Docs, getChildren
+    allDocs = {
+      'x-p':{'-branch':[{'stack':[], 'path':'project'}], 'tags':['#intermetal'], 'comment':'project comment'},
+      'x-s1':{'-branch':[{'stack':['x-p'], 'path':'project/000_step'}], 'tags':['#TODO','#a'], 'comment':''},
+      'x-s2':{'-branch':[{'stack':['x-p'], 'path':'project/001_step'}], 'tags':['#b','#TODO','#DONE','#c'],
+              'comment':'line1\nline2'},
+      'x-t1':{'-branch':[{'stack':['x-p','x-s1'], 'path':None}], 'tags':['#WAIT','#P1'], 'comment':'task'},
+      'm-1':{'-branch':[{'stack':['x-p','x-s1'], 'path':'project/000_step/a.csv'},
+                        {'stack':['x-p'], 'path':'project/a.csv'}], 'tags':['#x','#y','#P2'], 'comment':''},
+    }
+    view = {'x-p':['x-p', 0, ['x0'], 'Project'],
+            'x-s1':['x-p x-s1', 0, ['x1'], 'Step one'],
+            'x-s2':['x-p x-s2', 1, ['x1'], 'Step two'],
+            'x-t1':['x-p x-s1 x-t1', 0, ['x2'], 'Task'],
+            'm-1':['x-p x-s1 m-1', 12, ['measurement','csv'], 'a.csv']}
+    getDoc = lambda docID: copy.deepcopy(allDocs[docID if isinstance(docID, str) else docID.to_python()])
+    for args in [(True, getDoc, 'all', magicTags), (True, getDoc, 'tags', magicTags),
+                 (True, None, 'none', None), (False, None, 'none', None)]:
+      resultJS = cTJS.hierarchy2String(view, *args)
+      result   = cT.hierarchy2String(view, *args)
+      self.assertEqual(result, resultJS, 'hierarchy2String: '+str(args[1:3]))
+      if args[2]=='tags':
+        editString = result
+      if args[2]=='none' and args[0]:
+        idString = result
+    for docID in ['x-p', 'x-s1', 'x-s2', 'm-1', 'x-none']:
+      self.assertEqual(cT.getChildren(idString, docID), cTJS.getChildren(idString, docID).to_dict(),
+                       'getChildren: '+docID)
+    editStrings = [editString,
+                   editString.replace('* Step two||x-s2', '* -delete-||x-s2')+'\n** TODO new task\nObjective: obj\n'
+                   'Tags: #P1 #x\nmore comment',
+                   '* DONE a\n** b\nTags: #c\n*** WAIT c||x-1\n* ||x-2\ncomment||x-3\n']
+    for text in editStrings:
+      resultJS = cTJS.editString2Docs(text, magicTags).to_list()
+      self.assertEqual(cT.editString2Docs(text, magicTags), resultJS, 'editString2Docs: '+text)
+
+    ### benchmark
+    doc, docType = docs[2]
+    timings = {
+      'camelCase':        lambda module: module.camelCase('Intermetals at interfaces'),
+      'uuidv4':           lambda module: module.uuidv4(),
+      'fillDocBeforeCreate': lambda module: module.fillDocBeforeCreate(doc, docType),
+      'ontology2Labels':  lambda module: module.ontology2Labels(ontology, {}),
+      'hierarchy2String': lambda module: module.hierarchy2String(view, True, getDoc, 'all', magicTags),
+      'editString2Docs':  lambda module: module.editString2Docs(editString, magicTags),
+      'getChildren':      lambda module: module.getChildren(idString, 'x-p'),
+    }
+    for name, function in timings.items():
+      timeJS     = timeit.timeit(lambda: function(cTJS), number=20)/20
+      timeNative = timeit.timeit(lambda: function(cT), number=200)/200
+      print(f'{name: <20}: js2py {timeJS*1e6:9.1f}us   native {timeNative*1e6:7.1f}us   '
+            f'speedup {timeJS/timeNative:6.1f}')
+      self.assertLess(timeNative, timeJS, 'native is faster: '+name)
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""TEST extractors with generated files: layouts that are read without loading all data
+- does not require a database
+"""
+import os, sys, tempfile, base64
+from io import BytesIO
+from pathlib import Path
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def thumbnailSize(self, result):
+    """ size of jpeg image of extractor """
+    from PIL import Image
+    return Image.open(BytesIO(base64.b64decode(result['image'].split(',')[1]))).size
+
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    sys.path.append(os.path.abspath('Extractors'))
+    import numpy as np
+    import tifffile
+    import h5py
+    import extractor_tif, extractor_csv, extractor_nxs
+    directory = Path(tempfile.mkdtemp())
+    stack = (np.arange(12*1000*1200)%60000).astype(np.uint16).reshape((12,1000,1200))
+
+    ### tif: uncompressed stack (memory-mapped), tiled and compressed stack (frames decoded by segment)
+    tifffile.imwrite(directory/'plain.tif', stack)
+    tifffile.imwrite(directory/'tiled.tif', stack, tile=(256,256), compression='zlib')
+    for fileName in ('plain.tif', 'tiled.tif'):
+      result = extractor_tif.use(str(directory/fileName))
+      self.assertEqual(result['metaUser']['number pages'], 12, fileName)
+      self.assertEqual(result['metaUser']['dimension'], [1000, 1200], fileName)
+      self.assertLessEqual(max(self.thumbnailSize(result)), 3*extractor_tif.THUMBNAIL_SIZE, fileName)
+    result = extractor_tif.use(str(directory/'tiled.tif'), 'image/tif/first')
+    self.assertEqual(self.thumbnailSize(result), (400, 334), 'first page')
+
+    ### csv: header, empty file, file without last newline
+    (directory/'header.csv').write_text('time,force\n')
+    (directory/'empty.csv').write_text('')
+    (directory/'data.csv').write_text('time,force\n0,1\n1,3\n2,2')
+    self.assertEqual(extractor_csv.use(str(directory/'header.csv'))['metaUser'], {}, 'header only')
+    self.assertEqual(extractor_csv.use(str(directory/'empty.csv'))['metaUser'], {}, 'empty')
+    self.assertEqual(extractor_csv.use(str(directory/'data.csv'))['metaUser'], {'max':3, 'min':1}, 'header and data')
+
+    ### h5 / nxs: chunked stack of images, NeXus default and signal, large attributes
+    with h5py.File(directory/'stack.nxs', 'w') as h5File:
+      h5File.attrs['default'] = 'entry'
+      h5File.attrs['calibration'] = np.arange(100)
+      entry = h5File.create_group('entry')
+      entry.attrs['signal'] = 'data'
+      entry.create_dataset('data', data=stack[:3], chunks=(1,128,128), compression='gzip')
+    result = extractor_nxs.use(str(directory/'stack.nxs'))
+    self.assertEqual(result['metaUser']['dataset'], '/entry/data', 'signal')
+    self.assertEqual(result['metaUser']['max'], float(stack[:3].max()), 'statistics')
+    self.assertEqual(result['metaVendor'], {'@default':'entry', 'entry@signal':'data'}, 'large attributes omitted')
+    self.assertTrue(result['image'].startswith('data:image/png'), 'thumbnail')
+    import extractor_h5
+    with h5py.File(directory/'signal.h5', 'w') as h5File:
+      signal = h5File.create_dataset('signal', data=np.arange(1000000), chunks=(1000,))
+      data = extractor_h5.thumbnailData(signal)
+      self.assertLessEqual(len(data), extractor_h5.MAX_POINTS, 'chunked signal: points of thumbnail')
+      self.assertEqual((data.min(), data.max()//1000), (0, 999), 'chunked signal: start to end')
+      self.assertEqual(len({i//1000 for i in data}), extractor_h5.THUMB_BLOCKS, 'chunked signal: whole chunks')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
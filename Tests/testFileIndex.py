@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""TEST change detection with mtime/inode index: same classification as git status
+- does not require a database
+"""
+import os, sys, tempfile, subprocess
+from pathlib import Path
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from fileIndex import FileIndex
+    from localCache import cacheDirectory
+    project = Path(tempfile.mkdtemp())/'project'
+    (project/'001_step').mkdir(parents=True)
+    (project/'a.csv').write_text('a')
+    (project/'001_step'/'b.csv').write_text('b')
+    (project/'.gitignore').write_text('*.log\n')
+    git = ['git', '-C', str(project), '-c', 'user.name=test', '-c', 'user.email=test@test']
+    subprocess.run(git+['init', '-q'], check=True)
+    subprocess.run(git+['add', '.'], check=True)
+    subprocess.run(git+['commit', '-q', '-m', 'init'], check=True)
+    (cacheDirectory('testFileIndex')/'files-project.json').unlink(missing_ok=True)
+
+    index = FileIndex(project, 'testFileIndex')
+    self.assertEqual(index.status(), {}, 'clean at first run')
+    index.save()
+    (project/'a.csv').unlink()
+    (project/'001_step'/'b.csv').write_text('bb')
+    (project/'001_step'/'c.csv').write_text('c')
+    (project/'001_step'/'ignored.log').write_text('log')
+    status = FileIndex(project, 'testFileIndex').status()
+    self.assertEqual({str(key.relative_to(project)):value['state'] for key, value in status.items()},
+                     {'a.csv':'deleted', '001_step/b.csv':'modified', '001_step/c.csv':'untracked'}, 'changes')
+    os.utime(project/'001_step'/'b.csv')
+    subprocess.run(git+['add', '-A'], check=True)
+    subprocess.run(git+['commit', '-q', '-m', 'changes'], check=True)
+    index = FileIndex(project, 'testFileIndex')
+    status = index.status(paths=[project/'001_step'])
+    self.assertEqual(status, {}, 'touched but same content is clean')
+    index.save()
+    self.assertIn('001_step/c.csv', FileIndex(project, 'testFileIndex').stats, 'scoped save')
+
+    ### clean filter, as for unlocked git-annex files: content in git differs from work tree
+    subprocess.run(git+['config', 'filter.upper.clean', 'tr a-z A-Z'], check=True)
+    (project/'.gitattributes').write_text('*.up filter=upper\n')
+    (project/'d.up').write_text('text')
+    (project/'001_step'/'e.lnk').symlink_to('b.csv')
+    subprocess.run(git+['add', '-A'], check=True)
+    subprocess.run(git+['commit', '-q', '-m', 'filter'], check=True)
+    index = FileIndex(project, 'testFileIndex')
+    index.status()
+    index.save()
+    os.utime(project/'d.up')
+    os.utime(project/'001_step'/'e.lnk', follow_symlinks=False)
+    self.assertEqual(FileIndex(project, 'testFileIndex').status(), {}, 'touched filtered file and link are clean')
+    (project/'d.up').write_text('other')
+    status = FileIndex(project, 'testFileIndex').status()
+    self.assertEqual([value['state'] for value in status.values()], ['modified'], 'filtered file changed')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""TEST in-memory hierarchy index: navigation and updates after writes
+- does not require a database
+"""
+import os, sys
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from hierarchyIndex import HierarchyIndex
+    rows = [{'id':'m-1', 'key':'x-p x-s1 m-1', 'value':[1, ['measurement'], 'a.csv', 'project/001_step/a.csv']},
+            {'id':'m-1', 'key':'x-p m-1', 'value':[9999, ['measurement'], 'a.csv', 'project/a.csv']},
+            {'id':'x-s1', 'key':'x-p x-s1', 'value':[1, ['x1'], 'Step one', 'project/001_step']},
+            {'id':'x-s0', 'key':'x-p x-s0', 'value':[0, ['x1'], 'Step zero', 'project/000_step']},
+            {'id':'x-t', 'key':'x-p x-s1 x-t', 'value':[0, ['x2'], 'Task', 'project/001_step/000_task']},
+            {'id':'x-p', 'key':'x-p', 'value':[0, ['x0'], 'Project', 'project']},
+            {'id':'x-q', 'key':'x-q', 'value':[0, ['x0'], 'Other project', 'other']}]
+    index = HierarchyIndex('x-p', rows)
+    self.assertEqual(len(index), 5, 'other project is not in index')
+    self.assertEqual([i.docID for i in index.children('x-p')], ['x-s0', 'x-s1', 'm-1'], 'child-order')
+    self.assertEqual([i.docID for i in index.children('x-s1')], ['x-t', 'm-1'], 'child-order')
+    self.assertEqual([i.docID for i in index], ['x-p', 'x-s0', 'x-s1', 'x-t', 'm-1', 'm-1'], 'depth-first')
+    self.assertEqual(index.stack('x-t'), ['x-p', 'x-s1'], 'stack')
+    self.assertEqual(index.parent('x-t').docID, 'x-s1', 'parent')
+    self.assertEqual(index.childCount('x-s1'), 2, 'child count')
+    self.assertEqual(index.findPath('project/001_step/000_task'), 'x-t', 'path resolution')
+
+    ### updates after writes: new, rename, move
+    index.update({'_id':'x-t2', '-type':['x2'], '-name':'New task',
+                  '-branch':[{'stack':['x-p','x-s1'], 'child':2, 'path':'project/001_step/002_task'}]})
+    self.assertEqual([i.docID for i in index.children('x-s1')], ['x-t', 'm-1', 'x-t2'], 'add')
+    index.update({'_id':'x-t', '-type':['x2'], '-name':'Task renamed',
+                  '-branch':[{'stack':['x-p','x-s0'], 'child':0, 'path':'project/000_step/000_task'}]})
+    self.assertEqual(index.children('x-s0')[0].name, 'Task renamed', 'move')
+    self.assertEqual([i.docID for i in index.children('x-s1')], ['m-1', 'x-t2'], 'move')
+    self.assertIsNone(index.findPath('project/001_step/000_task'), 'path of move')
+    index.remove('x-s1')
+    self.assertEqual(sorted(index.nodes), ['m-1', 'x-p', 'x-s0', 'x-t'], 'remove subtree')
+    self.assertEqual(index.stack('m-1'), ['x-p'], 'other branch remains')
+
+    ### move task with child: subtree moves along, paths below it follow
+    index.update({'_id':'m-2', '-type':['measurement'], '-name':'b.csv',
+                  '-branch':[{'stack':['x-p','x-s0','x-t'], 'child':0, 'path':'project/000_step/000_task/b.csv'}]})
+    index.update({'_id':'x-t', '-type':['x2'], '-name':'Task renamed',
+                  '-branch':[{'stack':['x-p'], 'child':2, 'path':'project/002_task'}]})
+    self.assertEqual([i.docID for i in index.children('x-p')], ['x-s0', 'x-t', 'm-1'], 'move with child')
+    self.assertEqual(index.stack('m-2'), ['x-p', 'x-t'], 'stack of child')
+    self.assertEqual(index.findPath('project/002_task/b.csv'), 'm-2', 'path of child')
+    self.assertIsNone(index.findPath('project/000_step/000_task/b.csv'), 'old path of child')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""TEST planner of hierarchy changes: edited tree vs. current tree
+- does not require a database
+"""
+import os, sys, tempfile
+from pathlib import Path
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from hierarchyIndex import HierarchyIndex
+    from hierarchyPlan import planEdit, planMoveSubtree, planDeleteSubtree
+    from miscTools import renameDirectories
+    rows = [{'id':'x-p', 'key':'x-p', 'value':[0, ['x0'], 'Project', 'project']},
+            {'id':'x-s0', 'key':'x-p x-s0', 'value':[0, ['x1'], 'Step zero', 'project/000_StepZero']},
+            {'id':'x-s1', 'key':'x-p x-s1', 'value':[1, ['x1'], 'Step one', 'project/001_StepOne']},
+            {'id':'x-t', 'key':'x-p x-s1 x-t', 'value':[0, ['x2'], 'Task', 'project/001_StepOne/000_Task']},
+            {'id':'m-1', 'key':'x-p x-s1 m-1', 'value':[1, ['measurement'], 'a.csv', 'project/001_StepOne/a.csv']}]
+    details = {i['id']:{'tags':[], 'comment':''} for i in rows}
+    def doc(level, name, docID, edit='-edit-', tags=None):
+      return {'-name':name, 'tags':tags, 'comment':None, '_id':docID, '-type':level, 'edit':edit}
+    current = [doc(0,'Project','x-p'), doc(1,'Step zero','x-s0'), doc(1,'Step one','x-s1'), doc(2,'Task','x-t')]
+
+    ### unchanged tree: nothing to do
+    plan = planEdit(HierarchyIndex('x-p', rows), current, details, 'x-p')
+    self.assertEqual(plan, {'renames':[], 'directories':[], 'create':[], 'update':{}}, 'no change')
+
+    ### one word in one tag: one update, no disk operation
+    edited = list(current)
+    edited[3] = doc(2,'Task','x-t', tags='#TODO')
+    plan = planEdit(HierarchyIndex('x-p', rows), edited, details, 'x-p')
+    self.assertEqual(plan['update'], {'x-t':{'tags':['#TODO']}}, 'tag change')
+    self.assertEqual(plan['renames'], [], 'tag change')
+
+    ### rename step: directory renamed once, children follow
+    edited = list(current)
+    edited[2] = doc(1,'Step new','x-s1')
+    plan = planEdit(HierarchyIndex('x-p', rows), edited, details, 'x-p')
+    self.assertEqual(plan['renames'], [('project/001_StepOne', 'project/001_StepNew')], 'rename')
+    self.assertEqual(sorted(plan['update']), ['m-1', 'x-s1', 'x-t'], 'rename')
+    self.assertEqual(plan['update']['m-1']['-branch'][0][2]['path'], 'project/001_StepNew/a.csv', 'follow')
+
+    ### swap steps, add task, delete task
+    edited = [doc(0,'Project','x-p'), doc(1,'Step one','x-s1'), doc(2,'Task','x-t', edit='-delete-'),
+              doc(2,'New task','', edit='-new-'), doc(1,'Step zero','x-s0')]
+    plan = planEdit(HierarchyIndex('x-p', rows), edited, details, 'x-p')
+    self.assertEqual(plan['renames'], [('project/001_StepOne', 'project/000_StepOne'),
+                                       ('project/000_StepOne/000_Task', 'project/000_StepOne/trash_Task'),
+                                       ('project/000_StepZero', 'project/001_StepZero')], 'swap')
+    self.assertEqual(plan['directories'], ['project/000_StepOne/000_NewTask'], 'new')
+    self.assertEqual(plan['create'][0]['-branch'][0]['stack'], ['x-p', 'x-s1'], 'new')
+    self.assertEqual(plan['update']['x-t'], {'edit':'-delete-'}, 'delete')
+
+    ### move task with measurement below first step: one rename, only affected documents
+    plan = planMoveSubtree(HierarchyIndex('x-p', rows), 'x-t', 'x-s0')
+    self.assertEqual(plan['renames'], [('project/001_StepOne/000_Task', 'project/000_StepZero/000_Task')], 'move')
+    self.assertEqual(sorted(plan['update']), ['x-t'], 'move')
+    self.assertEqual(plan['update']['x-t']['-branch'][0][2]['stack'], ['x-p', 'x-s0'], 'move')
+    self.assertIsNone(planMoveSubtree(HierarchyIndex('x-p', rows), 'x-s1', 'x-t'), 'move below itself')
+
+    ### delete step: step, task and measurement; following steps move up
+    plan = planDeleteSubtree(HierarchyIndex('x-p', rows), 'x-s0')
+    self.assertEqual(sorted(plan['update']), ['m-1', 'x-s0', 'x-s1', 'x-t'], 'delete subtree')
+    self.assertEqual(plan['update']['x-s0'], {'edit':'-delete-'}, 'delete subtree')
+    self.assertEqual(plan['renames'][0], ('project/000_StepZero', 'project/trash_StepZero'), 'delete subtree')
+
+    ### new step above steps of same name: names shift; directories renamed in two phases
+    rowsSame = [{'id':'x-p', 'key':'x-p', 'value':[0, ['x0'], 'Project', 'project']},
+                {'id':'x-a', 'key':'x-p x-a', 'value':[0, ['x1'], 'Step', 'project/000_Step']},
+                {'id':'x-t', 'key':'x-p x-a x-t', 'value':[0, ['x2'], 'Task', 'project/000_Step/000_Task']},
+                {'id':'x-b', 'key':'x-p x-b', 'value':[1, ['x1'], 'Step', 'project/001_Step']}]
+    edited = [doc(0,'Project','x-p'), doc(1,'Step','', edit='-new-'), doc(1,'Step','x-a'), doc(2,'Task','x-t'),
+              doc(1,'Step','x-b')]
+    plan = planEdit(HierarchyIndex('x-p', rowsSame), edited, details, 'x-p')
+    self.assertEqual(plan['renames'], [('project/000_Step', 'project/001_Step'),
+                                       ('project/001_Step', 'project/002_Step')], 'shift')
+    basePath = Path(tempfile.mkdtemp())
+    for path in ('project/000_Step/000_Task', 'project/001_Step'):
+      (basePath/path).mkdir(parents=True)
+    (basePath/'project/000_Step/000_Task/a.csv').write_text('a')
+    self.assertTrue(renameDirectories(basePath, plan['renames']), 'shift')
+    self.assertTrue((basePath/'project/001_Step/000_Task/a.csv').exists(), 'shift')
+    self.assertEqual(sorted(i.name for i in (basePath/'project').iterdir()), ['001_Step', '002_Step'], 'shift')
+    (basePath/'project/000_Step').mkdir()
+    self.assertFalse(renameDirectories(basePath, [('project/000_Step', 'project/001_Step')]), 'occupied')
+    self.assertTrue((basePath/'project/000_Step').exists(), 'nothing renamed')
+
+    ### inconsistent levels
+    edited = [doc(0,'Project','x-p'), doc(2,'Task','x-t')]
+    self.assertIsNone(planEdit(HierarchyIndex('x-p', rows), edited, details, 'x-p'), 'wrong level')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""TEST local cache: query of cached view requests as sent to CouchDB; journal of interrupted scans
+- does not require a database: requests are recorded instead of sent
+"""
+import os, sys, tempfile
+from pathlib import Path
+import unittest
+
+class Response:
+  """
+  response of server: empty view, not cached
+  """
+  status_code = 200
+  headers = {}
+
+  def raise_for_status(self):
+    """ no error """
+    return
+
+  def json(self):
+    """ content """
+    return {'rows':[]}
+
+class Session:
+  """
+  record requests instead of sending them
+  """
+  def __init__(self):
+    self.urls = []
+
+  def get(self, url, params=None, headers=None):
+    """ record url incl. query string """
+    from requests import Request
+    self.urls.append(Request('GET', url, params=params).prepare().url)
+    return Response()
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from localCache import ViewCache
+    session, cache = Session(), ViewCache('testLocalCache')
+    url = 'http://127.0.0.1:5984/db/_design/viewProject/_view/measurement-date'
+    cache.get(session, url, {'startkey':['x-p', 'b'], 'startkey_docid':'m-1', 'skip':1, 'limit':10,
+                             'update':'lazy', 'stable':True, 'descending':False})
+    self.assertEqual(session.urls[-1].split('?')[1],
+                     'startkey=%5B%22x-p%22%2C+%22b%22%5D&startkey_docid=m-1&skip=1&limit=10&update=lazy'
+                     '&stable=true&descending=false', 'only keys are json')
+    cache.get(session, url, {'key':'#TODO', 'endkey':'#TODOzzz'})
+    self.assertEqual(session.urls[-1].split('?')[1], 'key=%22%23TODO%22&endkey=%22%23TODOzzz%22', 'strings quoted')
+
+    ### journal of scan: resume after interruption, scoped scan keeps entries of others
+    from localCache import ScanJournal, fileStat
+    project = Path(tempfile.mkdtemp())
+    for name in ('a.csv', 'b.csv', 'step/c.csv'):
+      (project/name).parent.mkdir(exist_ok=True)
+      (project/name).write_text(name)
+    journal = ScanJournal('testLocalCache', 'scan-test')
+    journal.clear()
+    stat = fileStat(project/'b.csv')
+    journal.record(project/'a.csv', 'hashed', shasum='1')
+    journal.record(project/'a.csv', 'saved', docID='m-1')
+    journal.record(project/'b.csv', 'hashed', stat=stat, shasum='2')
+    journal.record(project/'step/c.csv', 'saved', docID='m-3')
+    with open(journal.path, 'a', encoding='utf-8') as fOut:
+      fOut.write('{"path": "interrupted')
+    journal.close()
+    (project/'b.csv').write_text('written while it was hashed')
+    journal = ScanJournal('testLocalCache', 'scan-test')
+    self.assertEqual(journal.get(project/'a.csv', 'saved')['docID'], 'm-1', 'resume')
+    self.assertIsNone(journal.get(project/'b.csv', 'hashed'), 'stat before hashing: hash again')
+    journal.clear([project/'step'])
+    journal = ScanJournal('testLocalCache', 'scan-test')
+    self.assertIsNone(journal.get(project/'step/c.csv', 'saved'), 'scope committed')
+    self.assertIsNotNone(journal.get(project/'a.csv', 'saved'), 'outside of scope remains')
+    journal.clear()
+    self.assertFalse(journal.path.exists(), 'all committed')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""TEST views of database created by older version: missing views are found, names cached per revision
+- does not require a database: design documents are answered by a small server
+"""
+import os, sys
+import unittest
+
+class Response:
+  """
+  response of server
+  """
+  status_code = 200
+
+  def __init__(self, content):
+    self.content = content
+
+  def raise_for_status(self):
+    """ no error """
+    return
+
+  def json(self):
+    """ content """
+    return self.content
+
+class Session:
+  """
+  server with design documents
+  """
+  def __init__(self, designs):
+    self.designs  = designs   #name: views
+    self.requests = []
+
+  def get(self, url, params=None):
+    """ design documents, incl. content if requested """
+    self.requests.append(params)
+    rows = [{'id':'_design/'+name, 'value':{'rev':'1-'+'-'.join(views)}} for name, views in self.designs.items()]
+    if params.get('include_docs')=='true':
+      for row, views in zip(rows, self.designs.values()):
+        row['doc'] = {'_id':row['id'], 'views':{i:{'map':''} for i in views}}
+    return Response({'rows':rows})
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from database import Database, REQUIRED_VIEWS
+    from localCache import cacheDirectory
+    (cacheDirectory('testMissingViews')/'views.json').unlink(missing_ok=True)
+    older = {'viewDocType':['x0', 'measurement'], 'viewHierarchy':['viewHierarchy', 'viewPaths'],
+             'viewIdentify':['viewQR', 'viewSHAsum', 'viewTags']}
+    db = Database.__new__(Database)   #without server
+    db.databaseName = 'testMissingViews'
+    db.db = type('Server', (), {'database_url':'http://127.0.0.1:5984/db', 'r_session':Session(older)})
+    self.assertEqual(db.missingViews(), ['viewProject', 'viewColumn', 'viewHierarchy/viewTree',
+                                         'viewHierarchy/viewChildren', 'viewHierarchy/viewDetails'], 'older database')
+    self.assertEqual(len(db.db.r_session.requests), 2, 'content of design documents')
+    db.missingViews()
+    self.assertEqual(len(db.db.r_session.requests), 3, 'same revisions: names from cache')
+    db.db.r_session.designs = dict(REQUIRED_VIEWS, viewDocType=['x0'])
+    self.assertEqual(db.missingViews(), [], 'all views exist')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
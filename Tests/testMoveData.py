@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""TEST moving data: database is changed first; if moving the file fails, everything is undone
+- does not require a database: documents are answered by a small in-memory database
+- moves that succeed use DataLad datasets: requires git-annex
+"""
+import os, sys, tempfile, subprocess
+from pathlib import Path
+import unittest
+
+class Database:
+  """
+  documents in memory; updates of -branch as in Database.updateDocs
+  """
+  def __init__(self, docs, fail=False):
+    self.docs, self.fail, self.updates = docs, fail, []
+
+  def getDoc(self, docID):
+    """ document """
+    return self.docs[docID]
+
+  def getView(self, thePath, **kwargs):
+    """ no children """
+    return []
+
+  def updateDocs(self, changes, userID):
+    """ replace branches """
+    self.updates.append(changes)
+    if self.fail:
+      return []
+    for docID, change in changes.items():
+      for oldStack, oldPath, branch in change['-branch']:
+        self.docs[docID]['-branch'] = [branch if i['stack']==oldStack and i['path']==oldPath else i
+                                       for i in self.docs[docID]['-branch']]
+    return [self.docs[i] for i in changes]
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from backend import Pasta
+    basePath = Path(tempfile.mkdtemp())
+    (basePath/'project').mkdir()
+    (basePath/'project'/'a.csv').write_text('a')
+    branch = {'stack':['x-p'], 'child':0, 'path':'project/a.csv'}
+    docs = {'m-1':{'_id':'m-1', '-type':['measurement'], '-branch':[dict(branch)]},
+            'x-s':{'_id':'x-s', '-type':['x1'], '-branch':[{'stack':['x-p'], 'child':1, 'path':'project/001_Gone'}]}}
+    be = Pasta.__new__(Pasta)   #without configuration
+    be.basePath, be.confirm, be.userID, be.hierarchy = basePath, None, 'tester', None
+
+    ### database fails: nothing on disk
+    be.db = Database(docs, fail=True)
+    self.assertFalse(be.moveData('m-1', 'x-s'), 'database fails')
+    self.assertTrue((basePath/'project'/'a.csv').exists(), 'file not moved')
+
+    ### moving file fails (directory of new parent is gone): file and document are restored
+    be.db = Database(docs)
+    self.assertFalse(be.moveData('m-1', 'x-s'), 'file fails')
+    self.assertTrue((basePath/'project'/'a.csv').exists(), 'file restored')
+    self.assertEqual(docs['m-1']['-branch'], [branch], 'document restored')
+    self.assertEqual(len(be.db.updates), 2, 'update and undo')
+
+    ### moves that succeed: inside of project and into other project (annexed content transferred by key)
+    import datalad.api as datalad
+    for name in ('project2', 'project3'):
+      datalad.create(basePath/name, result_renderer='disabled')
+    (basePath/'project2'/'001_Step').mkdir()
+    (basePath/'project2'/'b.csv').write_text('b')
+    (basePath/'project2'/'c.csv').write_text('c')
+    datalad.Dataset(basePath/'project2').save(message='data', result_renderer='disabled')
+    docs.update({'m-2':{'_id':'m-2', '-type':['measurement'], '-branch':[{'stack':['x-p2'], 'child':0, 'path':'project2/b.csv'}]},
+                 'm-3':{'_id':'m-3', '-type':['measurement'], '-branch':[{'stack':['x-p2'], 'child':1, 'path':'project2/c.csv'}]},
+                 'x-s2':{'_id':'x-s2', '-type':['x1'], '-branch':[{'stack':['x-p2'], 'child':0, 'path':'project2/001_Step'}]},
+                 'x-p3':{'_id':'x-p3', '-type':['x0'], '-branch':[{'stack':[], 'child':0, 'path':'project3'}]}})
+    be.db = Database(docs)
+    for docID, parentID, origin, target in (('m-2', 'x-s2', 'project2/b.csv', 'project2/001_Step/b.csv'),
+                                            ('m-3', 'x-p3', 'project2/c.csv', 'project3/c.csv')):
+      self.assertTrue(be.moveData(docID, parentID), docID)
+      self.assertEqual(docs[docID]['-branch'][0]['path'], target, docID+': branch updated')
+      self.assertFalse(os.path.lexists(basePath/origin), docID+': origin removed')
+      self.assertEqual((basePath/target).read_text(), Path(target).stem, docID+': content')
+      for dataset in {origin.split('/')[0], target.split('/')[0]}:
+        status = subprocess.run(['git', '-C', str(basePath/dataset), 'status', '--porcelain'], stdout=subprocess.PIPE,
+                                check=True).stdout.decode()
+        self.assertEqual(status, '', docID+': clean '+dataset)
+      tracked = subprocess.run(['git', '-C', str(basePath/target.split('/')[0]), 'ls-files', target.split('/',1)[1]],
+                               stdout=subprocess.PIPE, check=True).stdout.decode()
+      self.assertEqual(tracked.strip(), target.split('/',1)[1], docID+': target tracked')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+"""TEST startup time: importing the command-line tool is fast and does not load heavy modules
+- does not require a database
+"""
+import os, sys, json, subprocess
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from pastaELN import STARTUP_BUDGET, HEAVY_MODULES
+    script = 'import json, sys, time\n'\
+             'startTime = time.perf_counter()\n'\
+             'import pastaELN, backend, database, miscTools, commonToolsNative\n'\
+             'print(json.dumps([time.perf_counter()-startTime, list(sys.modules)]))'
+    durations = []
+    for _ in range(3):   #fresh interpreter each time: best of three
+      output = subprocess.run([sys.executable, '-c', script], stdout=subprocess.PIPE, check=True,
+                              cwd=os.path.abspath(os.curdir)).stdout
+      duration, modules = json.loads(output.decode().strip().split('\n')[-1])
+      durations.append(duration)
+      loaded = [i for i in HEAVY_MODULES if i in modules]
+      self.assertEqual(loaded, [], 'heavy modules are imported at startup')
+    print(f'Import time {min(durations):.3f}sec, budget {STARTUP_BUDGET:.3f}sec')
+    self.assertLess(min(durations), STARTUP_BUDGET, 'import time exceeds budget')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""TEST paging through views whose keys are not unique: every row exactly once
+- does not require a database: a small view server sorts, ranges and pages rows like CouchDB
+"""
+import os, sys, json
+from urllib.parse import urlsplit, parse_qsl
+import unittest
+
+def collate(value):
+  """ sort order of CouchDB: null, booleans, numbers, strings, arrays, objects """
+  if value is None:
+    return (0,)
+  if isinstance(value, bool):
+    return (1, value)
+  if isinstance(value, (int, float)):
+    return (2, value)
+  if isinstance(value, str):
+    return (3, value)
+  if isinstance(value, list):
+    return (4, tuple(collate(i) for i in value))
+  return (5,)
+
+class Response:
+  """
+  response of view server
+  """
+  status_code = 200
+  headers = {}
+
+  def __init__(self, rows):
+    self.rows = rows
+
+  def raise_for_status(self):
+    """ no error """
+    return
+
+  def json(self):
+    """ content """
+    return {'rows':self.rows}
+
+class Session:
+  """
+  view server: query parameters as sent to CouchDB
+  """
+  def __init__(self, views):
+    self.views = views   #name of view: rows
+    self.requests = 0
+
+  def get(self, url, params=None, headers=None):
+    """ rows of view for query """
+    self.requests += 1
+    params = dict(parse_qsl(urlsplit(url).query), **(params or {}))
+    descending = params.get('descending')=='true'
+    rows = sorted(self.views[url.split('/')[-1]], key=lambda i: (collate(i['key']), i['id']), reverse=descending)
+    before = (lambda a, b: a>b) if descending else (lambda a, b: a<b)
+    if 'startkey' in params:
+      start, docID = collate(json.loads(params['startkey'])), params.get('startkey_docid')
+      rows = [i for i in rows if not before(collate(i['key']), start) and
+              (docID is None or collate(i['key'])!=start or not before(i['id'], docID))]
+    if 'endkey' in params:
+      end = collate(json.loads(params['endkey']))
+      rows = [i for i in rows if not before(end, collate(i['key']))]
+    rows = rows[int(params.get('skip', 0)):]
+    if 'limit' in params:
+      rows = rows[:int(params['limit'])]
+    return Response(rows)
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from database import Database
+    from localCache import ViewCache
+    rows = [{'id':'m-%02d'%i, 'key':'x-p%d'%(i%2), 'value':['m%02d'%i, '']} for i in range(25)]
+    projectRows = [{'id':i['id'], 'key':['x-p0', '2021-0%d'%(int(i['id'][2:])%3)], 'value':i['value']} for i in rows]
+    db = Database.__new__(Database)   #without server
+    db.viewCache = ViewCache('testViewPaging')
+    db.db = type('Server', (), {'database_url':'http://127.0.0.1:5984/db', 'r_session':Session({'measurement':rows, 'measurement-date':projectRows})})
+
+    ### iterate view: pages smaller than rows with same key
+    ids = [row['id'] for page in db.iterView('viewDocType/measurement', pageSize=4) for row in page]
+    self.assertEqual(ids, sorted(ids, key=lambda i: ('x-p%d'%(int(i[2:])%2), i)), 'order of view')
+    self.assertEqual(sorted(ids), sorted(i['id'] for i in rows), 'every row once')
+
+    ### tables sorted by project: resume by token, iterate filtered rows
+    import backend
+    from backend import Pasta
+    db.ontology = {'measurement':[{'name':'-name'}, {'name':'comment'}]}
+    be = Pasta.__new__(Pasta)   #without configuration
+    be.db, be.maxTabColumns = db, 16
+    ids, token = [], None
+    while True:
+      table = be.getTable('measurement', limit=4, token=token)
+      ids += [row['id'] for row in table['rows']]
+      token = table['token']
+      if token is None:
+        break
+    self.assertEqual(sorted(ids), sorted(i['id'] for i in rows), 'table: every row once')
+    self.assertEqual(be.getTable('measurement', limit=0)['rows'], [], 'limit 0: no rows, no error')
+    self.assertIsNone(be.getTable('measurement', limit=0)['token'], 'limit 0: no token')
+    backend.TABLE_BATCH = 3
+    records = [i for page in be.iterTable('measurement', pageSize=4, filters={'-name':'m1*'}) for i in page]
+    self.assertEqual(sorted(i['_id'] for i in records), ['m-%02d'%i for i in range(10, 20)], 'filtered rows once')
+
+    ### list project by date: many rows of same date
+    for descending in (False, True):
+      ids, page = [], be.listProject('measurement', 'x-p0', limit=4, descending=descending)
+      while page:
+        ids += [row['id'] for row in page]
+        page = be.listProject('measurement', 'x-p0', limit=4, startAfter=page[-1], descending=descending)
+      self.assertEqual(sorted(ids), sorted(i['id'] for i in projectRows), 'project: every row once')
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+"""TEST watching directories: files are reported once, after their writes settled
+- does not require a database
+"""
+import os, sys, time, tempfile, threading
+from pathlib import Path
+import unittest
+
+class TestStringMethods(unittest.TestCase):
+  """
+  derived class for this test
+  """
+  def test_main(self):
+    """
+    main function
+    """
+    sys.path.append(os.path.abspath(os.curdir))  #for github action
+    from watcher import Watcher
+    settle = 0.3
+    for method in ('events', 'poll'):
+      directory = Path(tempfile.mkdtemp())
+      (directory/'.git').mkdir()
+      (directory/'001_step').mkdir()
+      watcher = Watcher([directory], settle)
+      if method=='poll':
+        watcher.close()
+        watcher.poll()   #initial state
+      def write():       #instrument writes file in three parts
+        for idx in range(3):
+          with open(directory/'001_step'/'a.csv', 'a', encoding='utf-8') as fOut:
+            fOut.write(str(idx))
+          (directory/'.git'/'index').write_text(str(idx))
+          time.sleep(settle/3)
+      writer = threading.Thread(target=write)
+      startTime = time.monotonic()
+      writer.start()
+      batch = next(watcher.batches())
+      writer.join()
+      self.assertEqual(batch, [str(directory/'001_step'/'a.csv')], method+': reported once, without .git')
+      self.assertGreaterEqual(time.monotonic()-startTime, settle*1.5, method+': after writes settled')
+      (directory/'001_step'/'a.csv').unlink()
+      self.assertEqual(next(watcher.batches()), [str(directory/'001_step'/'a.csv')], method+': removed')
+      watcher.close()
+    return
+
+if __name__ == '__main__':
+  unittest.main()
@@ -4,6 +4,15 @@
 
 # TODO_P1 reduce relative_to: self.cwd should be always small
 
+STREAM_CHUNK_SIZE = 1024**2   #bytes fed at once to streaming extractors
+TABLE_BATCH       = 200       #rows fetched at once by getTable if rows are filtered
+TABLE_ARGUMENTS   = ['sortBy', 'descending', 'limit', 'offset', 'token', 'filters']  #passed by output to getTable
+TABLE_PAGE_SIZE   = 500       #rows per page if tables are iterated
+HASH_THREADS      = 4         #files hashed (and stream-extracted) concurrently by scanTree
+WATCH_SETTLE      = 2.0       #sec: file is ingested by watch if no write occurred for this time
+SCAN_WORKERS      = 4         #projects scanned concurrently by scanAll
+WORKER            = {}        #backend of worker process of scanAll
+
 class Pasta:
   """
   PYTHON BACKEND
@@ -17,14 +26,15 @@ class Pasta:
         linkDefault (string): name of configuration/link used; if not given, use the one defined by 'default' in config file
         confirm (function): confirm changes to database and file-tree
         kwargs (dict): additional parameters
-          - initViews (bool): initialize views at startup
+          - initViews (bool): initialize views at startup; missing views are always created
           - resetOntology (bool): reset ontology on database from one on file
     """
-    import json, sys
+    import json, sys, time
     from pathlib import Path
     from database import Database
     from miscTools import upIn, upOut
-    from commonTools import commonTools as cT
+    from localCache import readCache, writeCache, hashKey
+    import commonToolsNative as cT
     ## CONFIGURATION FOR DATALAD and GIT: has to move to dictionary
     self.vanillaGit = ['*.md','*.rst','*.org','*.tex','*.py','.id_pastaELN.json'] #tracked but in git;
     #   .id_pastaELN.json has to be tracked by git (if ignored: they don't appear on git-status; they have to change by PASTA)
@@ -34,6 +44,8 @@ class Pasta:
     self.gitIgnore+= ['*.hap','*.mss','*.mit','*.mst']   #extractors do not exist yet
 
     # open configuration file
+    self.timings = {}   #startup profile: duration of initialization steps in sec
+    startTime = time.perf_counter()
     self.debug = True
     self.confirm = confirm
     with open(Path.home()/'.pastaELN.json','r', encoding='utf-8') as confFile:
@@ -48,6 +60,7 @@ class Pasta:
       n,s = links[linkDefault]['local']['user'], links[linkDefault]['local']['password']
     else:
       n,s = upOut(links[linkDefault]['local']['cred'])[0].split(':')
+    self.timings['configuration and credentials'] = time.perf_counter()-startTime
     databaseName = links[linkDefault]['local']['database']
     self.confLinkName= linkDefault
     self.confLink    = links[linkDefault]
@@ -65,21 +78,36 @@ class Pasta:
     self.magicTags= configuration['magicTags'] #"P1","P2","P3","TODO","WAIT","DONE"
     self.tableFormat = configuration['tableFormat']
     # start database
+    startTime = time.perf_counter()
     self.db = Database(n,s,databaseName,confirm=self.confirm,softwarePath=self.softwarePath, **kwargs)
-    res = cT.ontology2Labels(self.db.ontology,self.tableFormat)
+    self.timings['database connection and ontology'] = time.perf_counter()-startTime
+    startTime = time.perf_counter()
+    labelKey = hashKey(self.db.ontology['_rev'], self.tableFormat)
+    res = readCache(databaseName, 'labels', labelKey)
+    if res is None:
+      res = cT.ontology2Labels(self.db.ontology,self.tableFormat)
+      writeCache(databaseName, 'labels', res, labelKey)
     self.dataLabels      = res['dataDict']
     self.hierarchyLabels = res['hierarchyDict']
-    if kwargs.get('initViews', False):
+    self.timings['labels'] = time.perf_counter()-startTime
+    self.maxTabColumns = configuration['GUI']['maxTabColumns'] \
+      if 'GUI' in configuration and 'maxTabColumns' in configuration['GUI'] else 20
+    startTime = time.perf_counter()
+    missing = [] if kwargs.get('initViews', False) else self.db.missingViews()  #e.g. database of older version
+    if missing:
+      print('Info: create missing views |',', '.join(missing))
+    if kwargs.get('initViews', False) or missing:
       labels = {}  #one line merging / update does not work
       for i in res['dataDict']:
         labels[i]=res['dataDict'][i]
       for i in res['hierarchyDict']:
         labels[i]=res['hierarchyDict'][i]
-      maxTabColumns = configuration['GUI']['maxTabColumns'] \
-        if 'GUI' in configuration and 'maxTabColumns' in configuration['GUI'] else 20
-      self.db.initViews(labels,self.magicTags, maxTabColumns)
+      self.db.initViews(labels,self.magicTags, self.maxTabColumns)
+    self.timings['views'] = time.perf_counter()-startTime
     # internal hierarchy structure
     self.hierStack = []
+    self.hierarchy = None   #HierarchyIndex of open project
+    self.pendingSaves = None  #paths saved to DataLad at end of scanTree; None: save immediately
     self.currentID  = None
     self.alive     = True
     return
@@ -127,6 +155,8 @@ class Pasta:
         localCopy (bool): copy a remote file to local version
         kwargs (dict): additional parameter, i.e. callback for curation
             forceNewImage (bool): create new image in any case
+            shasum (string): shasum of file, if already known
+            stream (Stream): streaming extractor that was fed while shasum was calculated
 
     Returns:
         bool: success
@@ -135,7 +165,7 @@ class Pasta:
     from pathlib import Path
     from urllib import request
     import datalad.api as datalad
-    from commonTools import commonTools as cT
+    import commonToolsNative as cT
     from miscTools import createDirName, generic_hash
     if sys.platform=='win32':
       import win32con, win32api
@@ -169,14 +199,8 @@ class Pasta:
     # collect structure-doc and prepare
     if doc['-type'][0][0]=='x' and doc['-type'][0]!='x0' and childNum is None:
       #should not have childnumber in other cases
-      thisStack = ' '.join(self.hierStack)
-      view = self.db.getView('viewHierarchy/viewHierarchy', startKey=thisStack) #not faster with cT.getChildren
-      childNum = 0
-      for item in view:
-        if item['value'][1][0]=='x0':
-          continue
-        if thisStack == ' '.join(item['key'].split(' ')[:-1]): #remove last item from string
-          childNum += 1
+      self.hierarchyIndex()
+      childNum = len([i for i in self.listChildren(self.hierStack[-1]) if i['-type'][0]!='x0'])
 
     # find path name on local file system; name can be anything
     if self.cwd is not None and '-name' in doc:
@@ -220,12 +244,18 @@ class Pasta:
         else:                                                     #make up name
           shasum  = None
         if shasum is not None: # and doc['-type'][0]=='measurement':         #samples, procedures not added to shasum database, getMeasurement not sensible
+          stream = kwargs.get('stream', None)
           if shasum == '':
-            shasum = generic_hash(self.basePath/path, forceFile=True)
+            shasum = kwargs.get('shasum', '')
+          if shasum == '':                      #one pass over the file: shasum and streaming extractor
+            stream = self.getStreamExtractor(path, doc)
+            shasum = generic_hash(self.basePath/path, forceFile=True,
+                                  consumer=None if stream is None else stream.update)
           view = self.db.getView('viewIdentify/viewSHAsum',shasum)
           if len(view)==0 or forceNewImage:  #measurement not in database: create doc
             while True:
-              self.useExtractors(path,shasum,doc)  #create image/content and add to datalad
+              self.useExtractors(path,shasum,doc,stream=stream)  #create image/content and add to datalad
+              stream = None                     #curation might change recipe: extract again
               if not 'image' in doc and not 'content' in doc and not 'otherELNName' in doc:  #did not get valuable data: extractor does not exit
                 return False
               if callback is None or not callback(doc):
@@ -258,14 +288,16 @@ class Pasta:
     if edit:
       #update document
       keysNone = [key for key in doc if doc[key] is None]
-      doc = cT.fillDocBeforeCreate(doc, '--').to_dict()  #store None entries and save back since js2py gets equalizes undefined and null
+      doc = cT.fillDocBeforeCreate(doc, '--')  #store None entries and save back since javascript equalizes undefined and null
       for key in keysNone:
         doc[key]=None
       doc = self.db.updateDoc(doc, doc['_id'])
     else:
       # add doc to database
-      doc = cT.fillDocBeforeCreate(doc, doc['-type']).to_dict()
+      doc = cT.fillDocBeforeCreate(doc, doc['-type'])
       doc = self.db.saveDoc(doc)
+    if self.hierarchy is not None:
+      self.hierarchy.update(doc)
 
     ## adaptation of directory tree, information on disk: documentID is required
     if self.cwd is not None and doc['-type'][0][0]=='x':
@@ -345,8 +377,14 @@ class Pasta:
       self.cwd = self.cwd.parent
     else:  # existing ID is given: open that
       self.hierStack.append(docID)
+      if len(self.hierStack)==1:   #project opened: prefetch its hierarchy
+        self.hierarchyIndex(docID)
+      node = None if self.hierarchy is None else self.hierarchy.node(docID)
       if dirName is not None:
         self.cwd = dirName.relative_to(self.basePath)
+      elif node is not None and node.path is not None:
+        self.cwd = Path(node.path)
+        self.hierStack = self.hierarchy.stack(node)+[docID]
       else:
         doc = self.db.getDoc(docID)
         self.cwd = Path(doc['-branch'][0]['path'])
@@ -354,7 +392,27 @@ class Pasta:
     return
 
 
-  def scanTree(self, **kwargs):
+  def hierarchyIndex(self, projectID=None):
+    """
+    In-memory index of hierarchy of project; built with one view request when needed
+
+    Args:
+        projectID (string): id of project; None: project that is open
+
+    Returns:
+        HierarchyIndex: index; None if no project is open
+    """
+    from hierarchyIndex import HierarchyIndex
+    if projectID is None:
+      if len(self.hierStack)==0:
+        return None
+      projectID = self.hierStack[0]
+    if self.hierarchy is None or self.hierarchy.projectID!=projectID:
+      self.hierarchy = HierarchyIndex.fromDatabase(self.db, projectID)
+    return self.hierarchy
+
+
+  def scanTree(self, docID=None, paths=None, **kwargs):
     """ Scan directory tree recursively from project/...
     - find changes on file system and move those changes to DB
     - use .id_pastaELN.json to track changes of directories, aka projects/steps/tasks
@@ -362,119 +420,255 @@ class Pasta:
     - create database entries for measurements in directory
     - move/copy/delete allowed as the doc['path'] = list of all copies
       doc['path'] is adopted once changes are observed
+    - scoped: only the directory of docID or the given paths are inspected; parents are found in the
+      in-memory index of the hierarchy
+    - changes are detected with the mtime/inode index of the project (fileIndex); git-annex status of all
+      files only if verify
+    - new files are hashed concurrently; all files are saved to DataLad with one commit at the end
+    - progress is journaled (localCache.ScanJournal): an interrupted scan resumes without hashing and saving
+      the same files again
 
     Args:
-      kwargs (dict): additional parameter, i.e. callback
+      docID (string): scan only directory of this project, step or task; None: whole project
+      paths (list): scan only these files and directories, absolute or relative to base path
+      kwargs (dict): additional parameter, i.e. callback, verify (bool: use git-annex status)
 
     Raises:
       ValueError: could not add new measurement to database
     """
     import shutil
+    from concurrent.futures import ThreadPoolExecutor
     import datalad.api as datalad
     from datalad.support import annexrepo
-    from miscTools import bcolors, generic_hash
+    from fileIndex import FileIndex
+    from localCache import ScanJournal, fileStat
+    from miscTools import bcolors
     if len(self.hierStack) == 0:
       print(f'{bcolors.FAIL}**Warning - scan directory: No project selected{bcolors.ENDC}')
       return
     callback = kwargs.get('callback', None)
-    while len(self.hierStack)>1:
-      self.changeHierarchy(None)
-
-    #git-annex lists all the files at once
-    #   datalad and git give the directories, if untracked/random; and datalad status produces output
-    #   also, git-annex status is empty if nothing has to be done
-    #   git-annex output is nice to parse
-    fileList = annexrepo.AnnexRepo(self.basePath/self.cwd).status()
-    dlDataset = datalad.Dataset(self.basePath/self.cwd)
-    #create dictionary that has shasum as key and [origin and target] as value
-    shasumDict = {}   #clean ones are omitted
-    for posixPath in fileList:
-      #Stay absolute fileName = posixPath.relative_to(self.basePath/self.cwd)
-      # if fileList[posixPath]['state']=='clean': #for debugging
-      #   shasum = generic_hash(fileName)
-      #   print(shasum,fileList[posixPath]['prev_gitshasum'],fileList[posixPath]['gitshasum'],fileName)
-      if fileList[posixPath]['state']=='untracked':
-        shasum = generic_hash(posixPath)
-        if shasum in shasumDict:
-          shasumDict[shasum] = [shasumDict[shasum][0], posixPath]
-        else:
-          shasumDict[shasum] = ['', posixPath]
-      if fileList[posixPath]['state']=='deleted':
-        shasum = fileList[posixPath]['prev_gitshasum']
-        if shasum in shasumDict:
-          shasumDict[shasum] = [posixPath, shasumDict[shasum][1]]
-        else:
-          shasumDict[shasum] = [posixPath, '']
-      if fileList[posixPath]['state']=='modified':
-        shasum = fileList[posixPath]['gitshasum']
-        shasumDict[shasum] = ['', posixPath] #new content is same place. No moving necessary, just "new file"
-
-    # loop all entries and separate into moved,new,deleted
-    print("Number of changed files:",len(shasumDict))
-    for _, (origin, target) in shasumDict.items():
-      print("  File changed:",origin,'->',target)
-      # originDir, _ = o..s.path.split(self.cwd+origin)
-      # find hierStack and parentID of new TARGET location: for new and move
-      if target != '':
-        targetDir = target.parent
-        if not target.exists(): #if dead link
-          linkTarget = target.resolve()
-          for dirI in self.basePath.glob('*'):
-            if (self.basePath/dirI).is_dir():
-              path = self.basePath/dirI/linkTarget
-              if path.exists():
-                target.unlock()
-                shutil.copy(path,target)
-                break
-        parentID = None
-        itemTarget = -1
-        while parentID is None:
-          view = self.db.getView('viewHierarchy/viewPaths', startKey=str(targetDir.relative_to(self.basePath)))
-          for item in view:
-            if item['key']==str(targetDir.relative_to(self.basePath)):
-              parentID = item['id']
-              itemTarget = item
-          targetDir = targetDir.parent
-        parentDoc = self.db.getDoc(parentID)
-        hierStack = parentDoc['-branch'][0]['stack']+[parentID]
-      ### separate into two cases
-      # newly created file
-      if origin == '':
-        newDoc    = {'-name':str(target)}
-        _ = self.addData('measurement', newDoc, hierStack, callback=callback)  #saved to datalad in here
-      # move or delete file
-      else:
-        #update to datalad
-        if target == '':
-          dlDataset.save(path=origin, message='Removed file')
-        else:
-          dlDataset.save(path=origin, message='Moved file from here to '+str(self.cwd/target)   )
-          dlDataset.save(path=target, message='Moved file from '+str(self.cwd/origin)+' to here')
-        #get docID
-        if origin!='' and origin.name == '.id_pastaELN.json':  #if origin has .id_pastaELN.json: parent directory has moved
-          origin = origin.parent
-        if target!='' and target.name == '.id_pastaELN.json':
-          target = target.parent
-        view = self.db.getView('viewHierarchy/viewPaths', preciseKey=str((self.cwd/origin).relative_to(self.basePath)) )
-        if len(view)==1:
-          docID = view[0]['id']
-          if target == '':       #delete
-            self.db.updateDoc( {'-branch':{'path':  str((self.cwd/origin).relative_to(self.basePath)),\
-                                          'oldpath':str((self.cwd/origin).relative_to(self.basePath)),\
-                                          'stack':[None],\
-                                          'child':-1,\
-                                          'op':'d'}}, docID)
-          else:                  #update
-            self.db.updateDoc( {'-branch':{'path':  str((self.cwd/target).relative_to(self.basePath)),\
-                                          'oldpath':str((self.cwd/origin).relative_to(self.basePath)),\
-                                          'stack':hierStack,\
-                                          'child':itemTarget['value'][2],\
-                                          'op':'u'}}, docID)
+    index = self.hierarchyIndex()
+    projectPath = self.basePath/self.cwd.parts[0]
+    if docID is None and paths is None:
+      while len(self.hierStack)>1:
+        self.changeHierarchy(None)
+      scope = None
+    elif paths is None:
+      node = index.node(docID)
+      if node is None or node.path is None:
+        print('**ERROR bst01: document is not a directory of open project |',docID)
+        return
+      scope = [self.basePath/node.path]
+    else:
+      scope = [self.basePath/i for i in paths]
+      if any(not i.is_relative_to(projectPath) for i in scope):
+        print('**ERROR bst02: paths are not in open project |',paths)
+        return
+
+    #changed files: only files whose inode, size, mtime changed since last scan are inspected
+    #   git-annex lists all the files at once: slow for large projects, used to verify
+    fileIndex = FileIndex(projectPath, self.db.databaseName)
+    if kwargs.get('verify', False):
+      fileList = annexrepo.AnnexRepo(projectPath).status(paths=scope)
+    else:
+      fileList = fileIndex.status(scope)
+    dlDataset = datalad.Dataset(projectPath)
+    journal   = ScanJournal(self.db.databaseName, 'scan-'+projectPath.name)
+    self.pendingSaves = []   #saved to DataLad at end
+    try:
+      #hash new files concurrently; same pass: shasum and extraction
+      hashed = {}
+      for posixPath in [i for i in fileList if fileList[i]['state']=='untracked']:
+        entry = journal.get(posixPath, 'hashed')
+        if entry is not None:
+          hashed[posixPath] = (entry['shasum'], None)
+      untracked = [i for i in fileList if fileList[i]['state']=='untracked' and i not in hashed]
+      stats = {i:fileStat(i) for i in untracked}  #before hashing: file written meanwhile is hashed again on resume
+      with ThreadPoolExecutor(HASH_THREADS) as pool:
+        for posixPath, result in zip(untracked, pool.map(self.hashFile, untracked)):
+          hashed[posixPath] = result
+          journal.record(posixPath, 'hashed', stat=stats[posixPath], shasum=result[0])
+      #create dictionary that has shasum as key and [origin and target] as value
+      shasumDict = {}   #clean ones are omitted
+      streams    = {}   #path: shasum and fed streaming extractor of untracked files
+      for posixPath in fileList:
+        #Stay absolute fileName = posixPath.relative_to(self.basePath/self.cwd)
+        # if fileList[posixPath]['state']=='clean': #for debugging
+        #   shasum = generic_hash(fileName)
+        #   print(shasum,fileList[posixPath]['prev_gitshasum'],fileList[posixPath]['gitshasum'],fileName)
+        if fileList[posixPath]['state']=='untracked':
+          shasum, stream = hashed[posixPath]
+          if not posixPath.is_symlink():     #shasum of link differs from that of file content used by addData
+            streams[posixPath] = (shasum, stream)
+          if shasum in shasumDict:
+            shasumDict[shasum] = [shasumDict[shasum][0], posixPath]
+          else:
+            shasumDict[shasum] = ['', posixPath]
+        if fileList[posixPath]['state']=='deleted':
+          shasum = fileList[posixPath]['prev_gitshasum']
+          if shasum in shasumDict:
+            shasumDict[shasum] = [posixPath, shasumDict[shasum][1]]
+          else:
+            shasumDict[shasum] = [posixPath, '']
+        if fileList[posixPath]['state']=='modified':
+          shasum = fileList[posixPath]['gitshasum']
+          shasumDict[shasum] = ['', posixPath] #new content is same place. No moving necessary, just "new file"
+
+      # loop all entries and separate into moved,new,deleted
+      print("Number of changed files:",len(shasumDict))
+      for _, (origin, target) in shasumDict.items():
+        print("  File changed:",origin,'->',target)
+        # originDir, _ = o..s.path.split(self.cwd+origin)
+        # find hierStack and parentID of new TARGET location: for new and move
+        if target != '':
+          targetDir = target.parent
+          if not target.exists(): #if dead link
+            linkTarget = target.resolve()
+            for dirI in self.basePath.glob('*'):
+              if (self.basePath/dirI).is_dir():
+                path = self.basePath/dirI/linkTarget
+                if path.exists():
+                  target.unlock()
+                  shutil.copy(path,target)
+                  break
+          parentID = None
+          while parentID is None and targetDir!=self.basePath:  #closest directory with document
+            parentID = index.findPath(targetDir.relative_to(self.basePath))
+            targetDir = targetDir.parent
+          if parentID is None:
+            print('**ERROR bst03: no project, step, task found for |',target)
+            continue
+          hierStack = index.stack(parentID)+[parentID]
+        ### separate into two cases
+        # newly created file
+        if origin == '':
+          if journal.get(target, 'saved') is not None:  #in database already; not yet committed
+            self.pendingSaves.append(target)
+            continue
+          newDoc    = {'-name':str(target)}
+          shasum, stream = streams.get(target, ('', None))
+          _ = self.addData('measurement', newDoc, hierStack, callback=callback, shasum=shasum,
+                           stream=stream)  #saved to datalad in here
+          journal.record(target, 'saved', docID=self.currentID)
+        # move or delete file
         else:
-          if '_pasta.' not in str(origin):  #TODO_P1 is this really needed
-            print("file not in database",self.cwd/origin)
+          #update to datalad
+          self.pendingSaves += [origin] if target=='' else [origin, target]
+          originFile = origin  #journal entry of move or removal
+          if journal.get(originFile, 'saved') is not None:
+            continue
+          #get docID
+          if origin!='' and origin.name == '.id_pastaELN.json':  #if origin has .id_pastaELN.json: parent directory has moved
+            origin = origin.parent
+          if target!='' and target.name == '.id_pastaELN.json':
+            target = target.parent
+          docID = index.findPath((self.cwd/origin).relative_to(self.basePath))
+          if docID is not None:
+            if target == '':       #delete
+              self.db.updateDoc( {'-branch':{'path':  str((self.cwd/origin).relative_to(self.basePath)),\
+                                            'oldpath':str((self.cwd/origin).relative_to(self.basePath)),\
+                                            'stack':[None],\
+                                            'child':-1,\
+                                            'op':'d'}}, docID)
+            else:                  #update
+              self.db.updateDoc( {'-branch':{'path':  str((self.cwd/target).relative_to(self.basePath)),\
+                                            'oldpath':str((self.cwd/origin).relative_to(self.basePath)),\
+                                            'stack':hierStack,\
+                                            'child':index.node(parentID).childNum,\
+                                            'op':'u'}}, docID)
+          else:
+            if '_pasta.' not in str(origin):  #TODO_P1 is this really needed
+              print("file not in database",self.cwd/origin)
+          journal.record(originFile, 'saved')
+      if self.pendingSaves:
+        dlDataset.save(path=self.pendingSaves, message='Scan: '+str(len(self.pendingSaves))+' files added, moved, removed')
+      journal.clear(scope)
+      if not kwargs.get('verify', False):
+        fileIndex.save()
+    finally:   #also after errors: later addData save immediately again
+      self.pendingSaves = None
+      self.hierarchy = None  #moves and deletes changed documents directly
+      journal.close()
     return
 
+  def scanAll(self, projectIDs=None, workers=SCAN_WORKERS, **kwargs):
+    """
+    Scan many projects concurrently: each DataLad dataset in a worker process
+    - each worker has its own backend: database connection, hierarchy stack, cwd
+    - output and errors are collected per project; a failing project does not stop the others
+    - progress is printed to stderr
+
+    Args:
+        projectIDs (list): ids of projects; None: all projects
+        workers (int): max. number of projects scanned at once; limits load on disks and database
+        kwargs (dict): additional parameter, i.e. verify (bool: use git-annex status)
+
+    Returns:
+        list: results in order of projectIDs: dict of _id, success, output, error, duration
+    """
+    import sys
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    if projectIDs is None:
+      view = self.db.getView('viewHierarchy/viewTree', startkey=[0], endkey=[0,{}])
+      projectIDs = [i['id'] for i in view]
+    results = {}
+    with ProcessPoolExecutor(max(1, min(workers, len(projectIDs))), initializer=initScanWorker,
+                             initargs=(self.confLinkName,)) as pool:
+      futures = {pool.submit(scanProject, i, kwargs.get('verify', False)):i for i in projectIDs}
+      for future in as_completed(futures):
+        try:
+          result = future.result()
+        except Exception as error:  # pylint: disable=broad-except
+          result = {'_id':futures[future], 'success':False, 'output':'', 'error':repr(error), 'duration':0}
+        results[result['_id']] = result
+        print('Scanned '+result['_id']+(' ' if result['success'] else ' **ERROR bsa01 ')+
+              f"{result['duration']:.1f}sec", file=sys.stderr)  #progress: stdout is for results, e.g. ndjson
+    self.hierarchy = None  #documents changed by other processes
+    return [results[i] for i in projectIDs]
+
+
+  def watch(self, settle=WATCH_SETTLE, **kwargs):
+    """
+    Watch directories of all projects and ingest new, changed, moved and removed files continuously
+    - file is ingested once its writes settled; then scoped scan of the changed files of each project
+    - stops with KeyboardInterrupt (Ctrl-C)
+
+    Args:
+        settle (float): sec without write after which a file is ingested
+        kwargs (dict): additional parameter, i.e. callback
+    """
+    import traceback
+    from pathlib import Path
+    from watcher import Watcher
+    view = self.db.getView('viewHierarchy/viewTree', startkey=[0], endkey=[0,{}])  #all projects
+    projects = {}  #directory: projectID
+    for doc in self.db.getDocs([i['id'] for i in view]).values():
+      path = doc['-branch'][0]['path']
+      if path is not None and (self.basePath/path).is_dir():
+        projects[Path(path).parts[0]] = doc['_id']
+    watcher = Watcher([self.basePath/i for i in projects], settle)
+    print('Watch '+str(len(projects))+' projects; stop with Ctrl-C')
+    try:
+      for paths in watcher.batches():
+        byProject = {}
+        for path in paths:
+          projectDir = Path(path).relative_to(self.basePath).parts[0]
+          if projectDir in projects:
+            byProject.setdefault(projects[projectDir], []).append(path)
+        for projectID, projectPaths in byProject.items():
+          self.hierStack, self.cwd, self.currentID = [], Path('.'), None
+          try:
+            self.changeHierarchy(projectID)
+            self.scanTree(paths=projectPaths, callback=kwargs.get('callback', None))
+          except Exception:
+            print('**ERROR bwa01: scan of changed files failed |',projectID,traceback.format_exc())
+    except KeyboardInterrupt:
+      pass
+    finally:
+      watcher.close()
+    return
+
+
   def backup(self, method='backup', **kwargs):
     """
     backup, verify, restore information from/to database
@@ -616,11 +810,13 @@ class Pasta:
         kwargs (dict): additional parameter
           - maxSize of image
           - saveToFile: save data to files
+          - stream: streaming extractor that was already fed with the entire file
     """
     import importlib, shutil, urllib, tempfile
     from pathlib import Path
     import datalad.api as datalad
     exitAfterDataLad = kwargs.get('exitAfterDataLad',False)
+    stream = kwargs.get('stream', None)
     extension = filePath.suffix[1:]  #cut off initial . of .jpg
     if str(filePath).startswith('http'):
       absFilePath = Path(tempfile.gettempdir())/filePath.name
@@ -632,7 +828,9 @@ class Pasta:
         filePath = filePath.relative_to(self.basePath)
       parentPath = filePath.parts[0]
       dataset = datalad.Dataset(self.basePath/parentPath)
-      if dataset.id:
+      if dataset.id and self.pendingSaves is not None:  #during scan: one save at end
+        self.pendingSaves.append(self.basePath/filePath)
+      elif dataset.id:
         dataset.save(path=self.basePath/filePath, message='Added locked document')
       if exitAfterDataLad:
         return
@@ -644,7 +842,16 @@ class Pasta:
     if pyPath.exists():
       # import module and use to get data
       module  = importlib.import_module(pyFile[:-3])
-      content = module.use(absFilePath, '/'.join(doc['-type']) )
+      recipe  = '/'.join(doc['-type'])
+      if hasattr(module, 'Stream') and not str(filePath).startswith('http'):
+        if stream is None or stream.recipe!=recipe:
+          stream = module.Stream(recipe)
+          with open(absFilePath, 'rb') as fIn:
+            for chunk in iter(lambda: fIn.read(STREAM_CHUNK_SIZE), b''):
+              stream.update(chunk)
+        content = stream.result()
+      else:
+        content = module.use(absFilePath, recipe)
       #combine into document
       doc.update(content)
       for meta in ['metaVendor','metaUser']:
@@ -674,6 +881,51 @@ class Pasta:
     return
 
 
+  def hashFile(self, filePath):
+    """
+    Shasum of new file; streaming extractor, if available, is fed in the same pass
+
+    Args:
+        filePath (Path): path to file
+
+    Returns:
+        string: shasum
+        Stream: fed streaming extractor or None
+    """
+    from miscTools import generic_hash
+    stream = self.getStreamExtractor(filePath, {'-type':['measurement']})
+    shasum = generic_hash(filePath, consumer=None if stream is None else stream.update)
+    return shasum, stream
+
+
+  def getStreamExtractor(self, filePath, doc):
+    """
+    Get streaming extractor for this file, if its extractor offers one
+    - Streaming protocol: extractor module has a class 'Stream' with
+      - Stream(recipe): attribute recipe stores the recipe
+      - update(chunk): consume next chunk of bytes of the file
+      - result(saveFileName=None): return the same dictionary as use()
+    - allows to calculate shasum and extract in the same pass with bounded memory
+
+    Args:
+        filePath (Path): path to file
+        doc (dict): document whose docType determines the recipe (doc is not altered)
+
+    Returns:
+        Stream: new streaming extractor or None
+    """
+    import importlib
+    extension = filePath.suffix[1:]
+    pyFile = 'extractor_'+extension+'.py'
+    if str(filePath).startswith('http') or not (self.extractorPath/pyFile).exists():
+      return None
+    module = importlib.import_module(pyFile[:-3])
+    if not hasattr(module, 'Stream'):
+      return None
+    docType = doc['-type'] if len(doc['-type'])>1 else doc['-type']+[extension]
+    return module.Stream('/'.join(docType))
+
+
   ######################################################
   ### Wrapper for database functions
   ######################################################
@@ -717,17 +969,25 @@ class Pasta:
 
     Args:
         verbose (bool): print more or only issues
-        kwargs (dict): additional parameter, i.e. callback
+        kwargs (dict): additional parameter, i.e. repair, stream (function that receives each finding as dict)
 
     Returns:
-        string: output incl. \n
+        string: output incl. \n; empty if findings are streamed
     """
     from datalad.support import annexrepo
     ### check database itself for consistency
     output = self.db.checkDB(verbose=verbose, **kwargs)
+    stream = kwargs.get('stream', None)
+    def report(level, message):
+      nonlocal output
+      if stream is None:
+        output += message+'\n'
+      else:
+        stream({'level':level, 'code':None, 'message':message, 'details':''})
+      return
     ### check if datalad status is clean for all projects
     if verbose:
-      output += "--- DataLad status ---\n"
+      report('heading', '--- DataLad status ---')
     viewProjects   = self.db.getView('viewDocType/x0')
     viewPaths      = self.db.getView('viewHierarchy/viewPaths')
     listPaths = [item['key'] for item in viewPaths]
@@ -738,7 +998,7 @@ class Pasta:
       fileList = annexrepo.AnnexRepo(self.basePath/dirName).status()
       for posixPath in fileList:
         if fileList[posixPath]['state'] != 'clean':
-          output += fileList[posixPath]['state']+' '+fileList[posixPath]['type']+' '+str(posixPath)+'\n'
+          report('warning', fileList[posixPath]['state']+' '+fileList[posixPath]['type']+' '+str(posixPath))
           clean = False
         #test if file exists
         relPath = posixPath.relative_to(self.basePath)
@@ -755,15 +1015,15 @@ class Pasta:
         if extension in self.vanillaGit:
           continue
         count += 1
-    output += 'Number of files on disk that are not in database '+str(count)+' (see log for details)\n'
+    report('info', 'Number of files on disk that are not in database '+str(count)+' (see log for details)')
     listPaths = [i for i in listPaths if not "://" in i ]
     listPaths = [i for i in listPaths if not (self.basePath/i).exists()]
     if len(listPaths)>0:
-      output += "These files of database not on filesystem: "+str(listPaths)+'\n'
+      report('error', "These files of database not on filesystem: "+str(listPaths))
     if clean:
-      output += "** Datalad tree CLEAN **\n"
+      report('info', "** Datalad tree CLEAN **")
     else:
-      output += "** Datalad tree NOT clean **\n"
+      report('warning', "** Datalad tree NOT clean **")
     return output
 
 
@@ -774,62 +1034,197 @@ class Pasta:
     """
     output view to screen
     - length of output 100 character
+    - formatter of getTable: paging, sorting and filtering as there
 
     Args:
       docType (string): document type to output
       printID (bool):  include docID in output string
-      kwargs (dict): additional parameter
+      kwargs (dict): additional parameter, e.g. sortBy, descending, limit, offset, token, filters
 
     Returns:
         string: output incl. \n
     """
-    outString = []
+    table = self.getTable(docType, **{key:value for key,value in kwargs.items() if key in TABLE_ARGUMENTS})
     widthArray = [25,25,25,25]
     if docType in self.tableFormat and '-default-' in self.tableFormat[docType]:
       widthArray = self.tableFormat[docType]['-default-']
+    widths = []   #of columns; width in ontology is given per item, incl. headings
     for idx,item in enumerate(self.db.ontology[docType]):
-      if not '-name' in item:    #heading
-        continue
-      if idx<len(widthArray):
-        width = widthArray[idx]
-      else:
-        width = 0
+      if len(widths)==len(table['columns']):
+        break
+      if 'name' in item:
+        widths.append(widthArray[idx] if idx<len(widthArray) else 0)
+    outString = []
+    for name, width in zip(table['columns'], widths):
       if width!=0:
         formatString = '{0: <'+str(abs(width))+'}'
-        outString.append(formatString.format(item['-name']) )
-    outString = '|'.join(outString)+'\n'
-    outString += '-'*104+'\n'
-    for lineItem in self.db.getView('viewDocType/'+docType):
+        outString.append(formatString.format(name)[:abs(width)] )
+    outString = ['|'.join(outString), '-'*104]
+    for row in table['rows']:
       rowString = []
-      for idx, item in enumerate(self.db.ontology[docType]):
-        if idx<len(widthArray):
-          width = widthArray[idx]
-        else:
-          width = 0
+      for value, width in zip(row['values'], widths):
         if width!=0:
           formatString = '{0: <'+str(abs(width))+'}'
-          if isinstance(lineItem['value'][idx], str ):
-            contentString = lineItem['value'][idx]
-          elif isinstance(lineItem['value'][idx], bool ) or lineItem['value'][idx] is None:
-            contentString = str(lineItem['value'][idx])
+          if isinstance(value, str ):
+            contentString = value
+          elif isinstance(value, bool ) or value is None:
+            contentString = str(value)
           else:
-            contentString = ' '.join(lineItem['value'][idx])
+            contentString = ' '.join(value)
           contentString = contentString.replace('\n',' ')
           if width<0:  #test if value as non-trivial length
-            if lineItem['value'][idx]=='true' or lineItem['value'][idx]=='false':
-              contentString = lineItem['value'][idx]
-            elif isinstance(lineItem['value'][idx], bool ) or lineItem['value'][idx] is None:
-              contentString = str(lineItem['value'][idx])
-            elif len(lineItem['value'][idx])>1 and len(lineItem['value'][idx][0])>3:
+            if value=='true' or value=='false':
+              contentString = value
+            elif isinstance(value, bool ) or value is None:
+              contentString = str(value)
+            elif len(value)>1 and len(value[0])>3:
               contentString = 'true'
             else:
               contentString = 'false'
-            # contentString = True if contentString=='true' else False
           rowString.append(formatString.format(contentString)[:abs(width)] )
       if printID:
-        rowString.append(' '+lineItem['id'])
-      outString += '|'.join(rowString)+'\n'
-    return outString
+        rowString.append(' '+row['id'])
+      outString.append('|'.join(rowString))
+    if table['token'] is not None:
+      outString.append('next page: --token '+table['token'])
+    return '\n'.join(outString)+'\n'
+
+
+  def getTable(self, docType, sortBy=None, descending=False, limit=None, offset=0, token=None, filters=None):
+    """
+    Table of documents of docType: sorted, paged and filtered
+    - sorting by column uses the index view of that column (viewColumn)
+    - filter on the sorted column narrows the range of the index; other filters are applied to rows
+
+    Example: page through measurements sorted by name
+      table = be.getTable('measurement', sortBy='-name', limit=50)
+      table = be.getTable('measurement', sortBy='-name', limit=50, token=table['token'])
+
+    Args:
+      docType (string): document type
+      sortBy (string): name of column; None: sort by project
+      descending (bool): reverse order
+      limit (int): max. number of rows, at least 1; None: all
+      offset (int): skip this number of (filtered) rows
+      token (string): continuation token of previous page: key and id of its last row, since keys are not unique
+      filters (dict): column-name: value; value ending with * matches prefix, e.g. {'-name':'Sample*'}
+
+    Returns:
+      dict: columns (list of names), rows (list of id, values), token (string; None if no next page)
+    """
+    import json, base64
+    from database import columnViewName
+    columns = self.db.tableColumns(docType, self.maxTabColumns)
+    filters = {} if filters is None else filters
+    table   = {'columns':columns, 'rows':[], 'token':None}
+    if limit is not None and limit<1:
+      print('**ERROR bgt02: limit has to be at least 1 |',limit)
+      return table
+    for name in list(filters)+([] if sortBy is None else [sortBy]):
+      if name not in columns:
+        print('**ERROR bgt01: column does not exist |',name)
+        return table
+    if sortBy is None:
+      path, query = 'viewDocType/'+docType.replace('/','__'), {}
+    else:
+      path, query = 'viewColumn/'+columnViewName(docType, sortBy), {}
+      if sortBy in filters:
+        value = filters[sortBy]
+        if value.endswith('*'):
+          query = {'startkey':[value[:-1]], 'endkey':[value[:-1]+'\ufff0']}
+        else:
+          query = {'startkey':[value], 'endkey':[value, {}]}
+      if descending and query:
+        query = {'startkey':query['endkey'], 'endkey':query['startkey']}
+    if descending:
+      query['descending'] = True
+    def matches(value, pattern):
+      text = value if isinstance(value, str) else ' '.join(value) if isinstance(value, list) else json.dumps(value)
+      return text.startswith(pattern[:-1]) if pattern.endswith('*') else text==pattern
+    rowFilters = {columns.index(name):value for name, value in filters.items() if name!=sortBy}
+    toSkip = offset if rowFilters else 0
+    if token is not None:
+      key, docID = json.loads(base64.urlsafe_b64decode(token.encode()))
+      query.update({'startkey':key, 'startkey_docid':docID, 'skip':1})
+    if not rowFilters and offset>0:
+      query['skip'] = query.get('skip',0)+offset
+    while True:
+      if limit is not None:
+        query['limit'] = TABLE_BATCH if rowFilters else limit-len(table['rows'])
+      batch = self.db.getView(path, update='lazy', **query)
+      for row in batch:
+        if not all(matches(row['value'][idx], value) for idx, value in rowFilters.items()):
+          continue
+        if toSkip>0:
+          toSkip -= 1
+          continue
+        table['rows'].append({'id':row['id'], 'values':row['value']})
+        lastRow = row
+        if len(table['rows'])==limit:
+          break
+      if limit is None or len(table['rows'])==limit or len(batch)<query['limit']:
+        break
+      query.update({'startkey':batch[-1]['key'], 'startkey_docid':batch[-1]['id'], 'skip':1})
+    if limit is not None and len(table['rows'])==limit:
+      table['token'] = base64.urlsafe_b64encode(json.dumps([lastRow['key'], lastRow['id']]).encode()).decode()
+    return table
+
+
+  def iterTable(self, docType, pageSize=TABLE_PAGE_SIZE, **kwargs):
+    """
+    Iterate table of docType page by page: consumers can start before the entire table is transferred
+
+    Args:
+      docType (string): document type
+      pageSize (int): rows per page
+      kwargs (dict): arguments of getTable, e.g. sortBy, filters, limit
+
+    Yields:
+      list: records of next page: dict of _id and one entry per column
+    """
+    limit, count = kwargs.pop('limit', None), 0
+    while limit is None or count<limit:
+      table = self.getTable(docType, limit=pageSize if limit is None else min(pageSize, limit-count), **kwargs)
+      if table['rows']:
+        yield [dict(zip(['_id']+table['columns'], [row['id']]+row['values'])) for row in table['rows']]
+      count += len(table['rows'])
+      if table['token'] is None:
+        return
+      kwargs.update({'token':table['token'], 'offset':0})
+    return
+
+
+  def listProject(self, docType, projectID, sortBy='date', limit=None, startAfter=None, descending=False):
+    """
+    List documents of one project and docType, sorted by date or name; paging with limit and startAfter
+
+    Example: page through measurements of project in date order
+      rows = be.listProject('measurement', projectID, limit=50)
+      rows = be.listProject('measurement', projectID, limit=50, startAfter=rows[-1])
+
+    Args:
+      docType (string): document type
+      projectID (string): id of project
+      sortBy (string): 'date' or 'name'
+      limit (int): max. number of rows
+      startAfter (dict): last row of previous page: its key and id, since dates and names are not unique
+      descending (bool): newest / last name first
+
+    Returns:
+      list: rows with id, key=[projectID, date/name], value=columns of docType
+    """
+    from database import PROJECT_VIEW_KEYS
+    if sortBy not in PROJECT_VIEW_KEYS:
+      print('**ERROR blp01: sorting not supported |',sortBy)
+      return []
+    query = {'startkey':[projectID], 'endkey':[projectID, {}]}
+    if descending:
+      query = {'startkey':[projectID, {}], 'endkey':[projectID], 'descending':True}
+    if startAfter is not None:
+      query.update({'startkey':startAfter['key'], 'startkey_docid':startAfter['id'], 'skip':1})
+    if limit is not None:
+      query['limit'] = limit
+    return self.db.getView('viewProject/'+docType.replace('/','__')+'-'+sortBy, update='lazy', **query)
 
 
   def outputTags(self, tag='', **kwargs):
@@ -852,9 +1247,9 @@ class Pasta:
     outString += '-'*106+'\n'
     view = None
     if tag=='':
-      view = self.db.getView('viewIdentify/viewTags')
+      view = self.db.getView('viewIdentify/viewTags', update='lazy')
     else:
-      view = self.db.getView('viewIdentify/viewTags',preciseKey='#'+tag)
+      view = self.db.getView('viewIdentify/viewTags',preciseKey='#'+tag, update='lazy')
     for lineItem in view:
       rowString = []
       rowString.append(f'{0: <10}'.format(lineItem['key']))
@@ -869,6 +1264,7 @@ class Pasta:
     output hierarchical structure in database
     - convert view into native dictionary
     - ignore key since it is always the same
+    - tags and comments of all documents are fetched with one view request
 
     Args:
        onlyHierarchy (bool): only print project,steps,tasks or print all (incl. measurements...)[default print all]
@@ -880,7 +1276,7 @@ class Pasta:
         string: output incl. \n
     """
     import re
-    from commonTools import commonTools as cT
+    import commonToolsNative as cT
     if len(self.hierStack) == 0:
       return 'Warning: pasta.outputHierarchy No project selected'
     hierString = ' '.join(self.hierStack)
@@ -890,10 +1286,11 @@ class Pasta:
       if onlyHierarchy and not item['id'].startswith('x-'):
         continue
       nativeView[item['id']] = [item['key']]+item['value']
-    if addTags=='all':
-      outString = cT.hierarchy2String(nativeView, addID, self.getDoc, 'all', self.magicTags)
-    elif addTags=='tags':
-      outString = cT.hierarchy2String(nativeView, addID, self.getDoc, 'tags', self.magicTags)
+    if addTags in ('all', 'tags'):
+      #details of all nodes in one request instead of one getDoc per node
+      details = {item['id']:{'tags':item['value'][0], 'comment':item['value'][1], '-branch':item['value'][2]}
+                 for item in self.db.getView('viewHierarchy/viewDetails', startKey=hierString)}
+      outString = cT.hierarchy2String(nativeView, addID, details.get, addTags, self.magicTags)
     else:
       outString = cT.hierarchy2String(nativeView, addID, None, 'none', None)
     #remove superficial * from head of all lines
@@ -903,6 +1300,75 @@ class Pasta:
     return outString
 
 
+  def iterHierarchy(self, onlyHierarchy=True):
+    """
+    Iterate hierarchy of current project page by page: one record per node
+
+    Args:
+       onlyHierarchy (bool): only project,steps,tasks or all (incl. measurements...)
+
+    Yields:
+        list: records of next page: dict of _id, stack (ids of parents), child, -type, -name
+    """
+    if len(self.hierStack) == 0:
+      print('**ERROR bih01: No project selected')
+      return
+    for page in self.db.iterView('viewHierarchy/viewHierarchy', startKey=' '.join(self.hierStack)):
+      records = []
+      for item in page:
+        if onlyHierarchy and not item['id'].startswith('x-'):
+          continue
+        records.append({'_id':item['id'], 'stack':item['key'].split(' ')[:-1], 'child':item['value'][0],
+                        '-type':item['value'][1], '-name':item['value'][2]})
+      if records:
+        yield records
+    return
+
+
+  def getSubtree(self, docID=None, depth=1, onlyHierarchy=False):
+    """
+    Children of a node or tree below it to given depth: one range query per level
+    - nodes at the last level do not have 'children': expand them on demand by another call
+
+    Example: open project lazily, one level at a time
+      tree = be.getSubtree(projectID)
+      tree = be.getSubtree(tree[0]['_id'])
+
+    Args:
+       docID (string): id of node; None: current node of hierarchy (list projects if none selected)
+       depth (int): number of levels
+       onlyHierarchy (bool): only project,steps,tasks or all (incl. measurements...)
+
+    Returns:
+        list: nodes in child-order: dict of _id, child, -type, -name, children (list of nodes)
+    """
+    if docID is None:
+      stack = list(self.hierStack)
+    else:
+      stack = self.db.getDoc(docID)['-branch'][0]['stack']+[docID]
+    tree = []
+    parents = {tuple(stack): tree}   #path of node: its list of children
+    for level in range(depth):
+      keyStart = [len(stack)+level]+stack
+      view = self.db.getView('viewHierarchy/viewTree', startkey=keyStart, endkey=keyStart+[{}])
+      nextParents = {}
+      for item in sorted(view, key=lambda i: i['value'][0]):
+        if onlyHierarchy and not item['id'].startswith('x-'):
+          continue
+        path = tuple(item['key'][1:])
+        if path[:-1] not in parents:  #parent is not in tree
+          continue
+        node = {'_id':item['id'], 'child':item['value'][0], '-type':item['value'][1], '-name':item['value'][2]}
+        if level<depth-1:
+          node['children'] = []
+          nextParents[path] = node['children']
+        parents[path[:-1]].append(node)
+      if not nextParents:
+        break
+      parents = nextParents
+    return tree
+
+
   def getEditString(self):
     """
     Return org-mode markdown string of hierarchy tree
@@ -914,29 +1380,21 @@ class Pasta:
     return self.outputHierarchy(True,True,'tags')
 
 
-  def setEditString(self, text, callback=None):
+  def setEditString(self, text):
     """
-    Using Org-Mode string, replay the steps to update the database
+    Using Org-Mode string, update the database and the directory tree
+    - plan: compare edited tree with current hierarchy, see hierarchyPlan.planEdit
+    - apply: only the changes, with bulk writes and one DataLad save
 
     Args:
        text (string): org-mode structured text
-       callback (function): function to verify database change
 
     Returns:
        success of function: true/false
     """
     import re
-    from pathlib import Path
-    import datalad.api as datalad
-    from commonTools import commonTools as cT
-    from miscTools import createDirName
-    # write backup
-    verbose = False #debugging only of this function
-    if verbose:
-      print('===============START SAVE HIERARCHY===============')
-      print(text)
-      print('---------------End reprint input   ---------------')
-    dlDataset = datalad.Dataset(self.basePath/self.cwd.parts[0])
+    import commonToolsNative as cT
+    from hierarchyPlan import planEdit
     # add the prefix to org-mode structure lines
     prefix = '*'*len(self.hierStack)
     startLine = r'^\*+\ '
@@ -949,140 +1407,223 @@ class Pasta:
     newText = prefix+' '+newText
     docList = cT.editString2Docs(newText, self.magicTags)
     del newText; del text
-    # initialize iteration
-    levelOld = None
-    path      = None
-    deletedDocs= []
-    for doc in docList:  #iterate through all entries
-
-      # deleted items
-      if doc['edit'] == '-delete-':
-        doc['-user']   = self.userID
-        doc = self.db.updateDoc(doc,doc['_id'])
-        deletedDocs.append(doc['_id'])
-        thisStack = ' '.join(doc['-branch'][0]['stack']+[doc['_id']])
-        view = self.db.getView('viewHierarchy/viewHierarchy', startKey=thisStack)
-        for item in view:
-          subDoc = {'-user':self.userID, 'edit':'-delete-'}
-          _ = self.db.updateDoc(subDoc, item['id'])
-          deletedDocs.append(item['id'])
-        oldPath   = doc['-branch'][0]['path']
-        pathArray = oldPath.parts
-        pathArray[-1]='trash_'+'_'.join(pathArray[-1].split('_')[1:])
-        newPath   = pathArray.join('')
-        print('Deleted doc: Path',oldPath,newPath)
-        _ = self.basePath/oldPath.rename(self.basePath/newPath)
-        continue
+    hierString = ' '.join(self.hierStack)
+    details = {item['id']:{'tags':item['value'][0], 'comment':item['value'][1]}
+               for item in self.db.getView('viewHierarchy/viewDetails', startKey=hierString)}
+    plan = planEdit(self.hierarchyIndex(), docList, details, self.hierStack[-1])
+    if plan is None:
+      return False
+    return self.applyPlan(plan, 'set-edit-string: update the project structure')
 
-      # deleted parents
-      if doc['_id'] in deletedDocs:
-        continue
 
-      # All non-deleted items: identify docType
-      docDB    = self.db.getDoc(doc['_id']) if doc['_id']!='' else None
-      levelNew = doc['-type']
-      if levelOld is None:   #first run-through
-        children  = [0]
-      else:                   #after first entry
-        if levelNew<levelOld:                               #UNCLE, aka SIBLING OF PARENT
-          for _ in range(levelOld-levelNew):
-            children.pop()
-          children[-1] += 1
-        elif levelNew>levelOld:                             #CHILD
-          children.append(0)
-        else:                                               #SIBLING
-          children[-1] += 1
-      if '_id' not in doc or docDB is None or docDB['-type'][0][0]=='x':
-        doc['-type'] = 'x'+str(levelNew)
-      else:
-        doc['-type'] = docDB['-type']
-
-      # for all non-text types: change children and  childNum in database
-      #   and continue with next doc. This makes subsequent code easier
-      if doc['-type'][0][0]!='x':
-        docDB = dict(docDB)
-        docDB.update(doc)
-        doc = docDB
-        doc['childNum'] = children[-1]
-        del doc['edit']
-        self.addData('-edit-', doc, self.hierStack)
-        levelOld     = levelNew
-        continue
+  def moveSubtree(self, docID, newParentID, position=None):
+    """
+    Move step or task with everything below it to other parent in open project
+    - directory is renamed once, documents below are updated with bulk writes
+    - previous values of all documents are stored as one revision of moved document
 
-      # ONLY TEXT DOCUMENTS
-      if doc['edit'] == "-edit-":
-        edit = "-edit-"
-      else:
-        edit = doc['-type']
-      del doc['edit']
-      # change directories: downward
-      if levelOld is None:   #first run-through
-        doc['childNum'] = docDB['-branch'][0]['child']
-      else:                   #after first entry
-        lenPath = len(self.cwd.parts)-1 if len(self.cwd.parts[-1])==0 else len(self.cwd.parts)
-        for _ in range(lenPath-levelNew):
-          self.changeHierarchy(None)                        #'cd ..'
-        #check if directory exists on disk
-        #move directory; this is the first point where the non-existence of the folder is seen and can be corrected
-        dirName = self.basePath/self.cwd/createDirName(doc['-name'],doc['-type'][0],children[-1])
-        if not dirName.exists():                     #if move, deletion or because new
-          if doc['_id']=='' or doc['_id']=='undefined':     #if new data
-            dirName.mkdir()
-          else:                                             #if move
-            path = Path(docDB['-branch'][0]['path'])
-            if not (self.basePath/path).exists():      #parent was moved: get 'path' from knowledge of parent
-              parentID = docDB['-branch'][0]['stack'][-1]
-              pathParent = Path(self.db.getDoc(parentID)['-branch'][0]['path'])
-              path = pathParent/path.name
-            if not (self.basePath/path).exists():        #if still does not exist
-              print("**ERROR bse01: doc path was not found and parent path was not found |"+str(doc))
-              return False
-            if self.confirm is None or self.confirm(None,"Move directory "+path+" -> "+self.cwd+dirName):
-              (self.basePath/path).rename(self.basePath/self.cwd/dirName)
-              dlDataset.save(path=self.basePath/path, message='SetEditString move directory: origin')
-              dlDataset.save(path=self.basePath/self.cwd/dirName, message='SetEditString move dir: target')
-        if edit=='-edit-':
-          self.changeHierarchy(doc['_id'], dirName)   #'cd directory'
-          if path is not None:
-            #adopt measurements, samples, etc: change / update path by supplying old path
-            view = self.db.getView('viewHierarchy/viewPaths', startKey=str(path))
-            for item in view:
-              if item['value'][1][0][0]=='x':
-                continue  #skip since moved by itself
-              self.db.updateDoc( {'-branch':{'path':str(self.cwd), 'oldpath':str(path),\
-                                            'stack':self.hierStack,\
-                                            'child':item['value'][2],\
-                                            'op':'u'}},item['id'])
-        doc['childNum'] = children[-1]
-      ## FOR DEBUGGING:
-      if verbose:
-        print(doc['-name'].strip()+'|'+str(doc['-type'])+'||'+doc['_id']+' #:',doc['childNum'])
-        print('  children:',children,'   levelNew, levelOld',levelNew,levelOld,'   cwd:',self.cwd,'\n')
-      # write change to database
-      if edit=='-edit-':
-        docDB = dict(docDB)
-        docDB.update(doc)
-        doc = docDB
-      self.addData(edit, doc, self.hierStack)
-      #update variables for next iteration
-      if edit!="-edit-" and levelOld is not None:
-        self.changeHierarchy(self.currentID)   #'cd directory'
-      levelOld     = levelNew
-
-    #----------------------------------------------------
-    #at end, go down ('cd  ..') number of children-length
-    if '-type' in doc and doc['-type'][0][0]!='x':  #remove one child, if last was not an x-element, e.g. a measurement
-      children.pop()
-    for _ in range(len(children)-1):
-      self.changeHierarchy(None)
+    Args:
+       docID (string): id of step or task
+       newParentID (string): id of project, step or task that becomes parent
+       position (int): position among steps, tasks of new parent; None: at end
+
+    Returns:
+       success of function: true/false
+    """
+    from hierarchyPlan import planMoveSubtree
+    if len(self.hierStack)==0:
+      print('**ERROR bms01: No project selected')
+      return False
+    plan = planMoveSubtree(self.hierarchyIndex(), docID, newParentID, position)
+    if plan is None:
+      return False
+    return self.applyPlan(plan, 'move subtree '+docID+' to '+newParentID, groupID=docID)
+
+
+  def deleteSubtree(self, docID):
+    """
+    Delete step or task with everything below it in open project
+    - directory is moved to trash_..., documents below are deleted with bulk writes
+    - previous values of all documents are stored as one revision of deleted document
+
+    Args:
+       docID (string): id of step or task
+
+    Returns:
+       success of function: true/false
+    """
+    from hierarchyPlan import planDeleteSubtree
+    if len(self.hierStack)==0:
+      print('**ERROR bds01: No project selected')
+      return False
+    if docID in self.hierStack:
+      print('**ERROR bds02: cannot delete open document; change to its parent first |',docID)
+      return False
+    plan = planDeleteSubtree(self.hierarchyIndex(), docID)
+    if plan is None:
+      return False
+    return self.applyPlan(plan, 'delete subtree '+docID, groupID=docID)
+
+
+  def moveData(self, docID, newParentID, oldPath=None):
+    """
+    Move measurement, sample, etc. to directory of other project, step or task, also in other project
+    - annexed content is transferred by key: hardlink / reflink into annex of target dataset, no hashing
+    - -branch is updated in place: shasum, image and metadata remain; no extractors are run
+    - database is updated first, then files are moved; datasets are saved at the end, one save per dataset
+    - if a step fails, commits, file operations and database are undone
+
+    Args:
+       docID (string): id of document
+       newParentID (string): id of project, step or task that becomes parent
+       oldPath (string): path of branch that is moved; None: first branch
+
+    Returns:
+       success of function: true/false
+    """
+    import os, traceback
+    from pathlib import Path
+    import datalad.api as datalad
+    from datalad.support import annexrepo
+    from miscTools import linkContent
+    doc, parentDoc = self.db.getDoc(docID), self.db.getDoc(newParentID)
+    if doc['-type'][0][0]=='x' or parentDoc['-type'][0][0]!='x':
+      print('**ERROR bmd01: only data can be moved to project, step or task |',docID,newParentID)
+      return False
+    branch = next((i for i in doc['-branch'] if oldPath is None or i['path']==oldPath), None)
+    if branch is None or branch['path'] is None or parentDoc['-branch'][0]['path'] is None:
+      print('**ERROR bmd02: document or new parent have no path on disk |',docID,oldPath)
+      return False
+    origin = Path(branch['path'])
+    target = Path(parentDoc['-branch'][0]['path'])/origin.name
+    if (self.basePath/target).exists() or os.path.lexists(self.basePath/target):
+      print('**ERROR bmd03: target exists already |',target)
+      return False
+    if self.confirm is not None and not self.confirm(None,'Move file '+str(origin)+' -> '+str(target)):
+      return False
+    #database first: if it fails, nothing changed on disk
+    newBranch = {'stack':parentDoc['-branch'][0]['stack']+[newParentID],
+                 'child':len(self.listChildren(newParentID)), 'path':str(target)}
+    docs = self.db.updateDocs({docID:{'-branch':[[branch['stack'], branch['path'], newBranch]]}}, self.userID)
+    if len(docs)!=1:
+      print('**ERROR bmd04: could not update document; nothing moved |',docID)
+      return False
+    #files: origin is moved aside and removed at the end, such that all steps can be undone
+    aside = origin.parent/('.moveData_'+origin.name)
+    undo  = []   #(function, arguments) that revert the file operations, in reverse order
+    try:
+      originRepo = annexrepo.AnnexRepo(self.basePath/origin.parts[0])
+      targetRepo = annexrepo.AnnexRepo(self.basePath/target.parts[0])
+      key = originRepo.get_file_annexinfo(self.basePath/origin).get('key')
+      if origin.parts[0]==target.parts[0] or key is None:  #same dataset or content in git: move file itself
+        (self.basePath/origin).rename(self.basePath/target)
+        undo.append((os.rename, (self.basePath/target, self.basePath/origin)))
+      else:                                                  #other dataset: transfer content by key
+        content = originRepo.get_contentlocation(key)
+        if content:                                          #content is present locally
+          objectPath = self.basePath/target.parts[0]/'.git'/'annex'/'objects'/ \
+                       targetRepo.call_annex_oneline(['examinekey', '--format=${hashdirmixed}${key}/${key}', key])
+          if not objectPath.exists():
+            objectPath.parent.mkdir(parents=True, exist_ok=True)
+            linkContent(self.basePath/origin.parts[0]/content, objectPath)
+          targetRepo.call_annex(['fromkey', key, str(target.relative_to(target.parts[0]))])
+        else:                                                #content is elsewhere, e.g. remote: only location
+          targetRepo.call_annex(['fromkey', '--force', key, str(target.relative_to(target.parts[0]))])
+        undo.append((os.unlink, (self.basePath/target,)))
+        (self.basePath/origin).rename(self.basePath/aside)
+        undo.append((os.rename, (self.basePath/aside, self.basePath/origin)))
+      #commit at the end: one save per dataset; undo resets a commit that was made before a later step failed
+      message = 'Moved file from '+str(origin)+' to '+str(target)
+      saves = [(originRepo, [origin, target])] if origin.parts[0]==target.parts[0] else \
+              [(originRepo, [origin]), (targetRepo, [target])]
+      for repo, paths in saves:
+        head = repo.get_hexsha()
+        undo.append((repo.call_git, (['reset', '--quiet', head, '--']+[str(i.relative_to(i.parts[0])) for i in paths],)))
+        undo.append((repo.call_git, (['reset', '--soft', head],)))
+        datalad.Dataset(repo.path).save(path=[self.basePath/i for i in paths], message=message)
+    except Exception:  # pylint: disable=broad-except
+      print('**ERROR bmd05: moving file failed; undo move |',docID,traceback.format_exc())
+      for function, arguments in reversed(undo):
+        function(*arguments)
+      self.db.updateDocs({docID:{'-branch':[[newBranch['stack'], newBranch['path'], branch]]}}, self.userID)
+      return False
+    if os.path.lexists(self.basePath/aside):
+      os.unlink(self.basePath/aside)
+    if key is not None and origin.parts[0]!=target.parts[0] and originRepo.get_contentlocation(key):
+      try:
+        originRepo.drop_key(key)  #release copy in origin; target has content
+      except Exception:  # pylint: disable=broad-except
+        print('**Warning: content remains in origin dataset; drop it with git-annex |',key)
+    if self.hierarchy is not None:
+      self.hierarchy.update(docs[0])
+    return True
+
+
+  def applyPlan(self, plan, message, groupID=None):
+    """
+    Apply planned changes of hierarchy, see hierarchyPlan
+    - rename directories in two phases (names can shift and swap) and create new ones
+    - create, update and delete documents with bulk writes
+    - update .id_pastaELN.json of projects, steps, tasks and save all with one DataLad save
+
+    Args:
+       plan (dict): renames, directories, create, update
+       message (string): message of DataLad save
+       groupID (string): store previous values of all documents as one revision of this document;
+         None: one revision per document
+
+    Returns:
+       success of function: true/false
+    """
+    import sys, json
+    from pathlib import Path
+    import datalad.api as datalad
+    from miscTools import renameDirectories
+    if sys.platform=='win32':
+      import win32con, win32api
+    if self.confirm is not None:
+      for origin, target in plan['renames']:
+        if not self.confirm(None,'Move directory '+origin+' -> '+target):
+          return False
+    if not renameDirectories(self.basePath, plan['renames']):
+      return False
+    for path in plan['directories']:
+      (self.basePath/path).mkdir(exist_ok=True)
+    docs = self.db.saveDocs(plan['create']) + self.db.updateDocs(plan['update'], self.userID, groupID)
+    self.hierarchy = None  #many changes: index is built again when needed
+    # information on disk: .id_pastaELN.json of projects, steps, tasks
+    idFiles = []
+    for doc in docs:
+      if '-type' not in doc or doc['-type'][0][0]!='x' or doc['-branch'][0]['path'] is None:  #deleted or no directory
+        continue
+      path = Path(doc['-branch'][0]['path'])
+      if self.hierStack and doc['_id']==self.hierStack[-1]:  #open document moved
+        self.cwd = path
+        self.hierStack = doc['-branch'][0]['stack']+[doc['_id']]
+      if (self.basePath/path).is_dir():
+        idFiles.append((self.basePath/path/'.id_pastaELN.json', doc))
+    if not plan['renames'] and not plan['directories'] and not idFiles:
+      return True
     dataset = datalad.Dataset(self.basePath/self.cwd.parts[0])
-    dataset.save(message='set-edit-string: update the project structure')
+    existing = [fileName for fileName, _ in idFiles if fileName.exists()]
+    if sys.platform=='win32':
+      for fileName in existing:
+        if win32api.GetFileAttributes(fileName)==win32con.FILE_ATTRIBUTE_HIDDEN:
+          win32api.SetFileAttributes(fileName, win32con.FILE_ATTRIBUTE_ARCHIVE)
+    elif existing:
+      dataset.unlock(path=existing)
+    for fileName, doc in idFiles:
+      with open(fileName,'w', encoding='utf-8') as fOut:
+        fOut.write(json.dumps(doc))
+      if sys.platform=='win32':
+        win32api.SetFileAttributes(fileName, win32con.FILE_ATTRIBUTE_HIDDEN)
+    dataset.save(message=message)
     return True
 
 
   def getChildren(self, docID):
     """
-    Get children from this parent using outputHierarchy
+    Get children from this parent: only projects, steps, tasks
 
     Args:
         docID (string): id parent document
@@ -1090,13 +1631,27 @@ class Pasta:
     Returns:
         list: list of names, list of document-ids
     """
-    from commonTools import commonTools as cT
-    hierTree = self.outputHierarchy(True,True,False)
-    if hierTree is None:
-      print('**ERROR bgc01: No hierarchy tree')
-      return None, None
-    result = cT.getChildren(hierTree,docID)
-    return result['names'], result['ids']
+    children = [i for i in self.listChildren(docID) if i['-type'][0][0]=='x']
+    return [i['-name'] for i in children], [i['_id'] for i in children]
+
+
+  def listChildren(self, docID):
+    """
+    Direct children of document in child-order
+    - from in-memory index of hierarchy if document is in open project; else one range query
+
+    Args:
+        docID (string): id of parent document
+
+    Returns:
+        list: records: dict of _id, -name, -type, child, path
+    """
+    if self.hierarchy is not None and docID in self.hierarchy:
+      return [{'_id':node.docID, '-name':node.name, '-type':node.docType, 'child':node.childNum, 'path':node.path}
+              for node in self.hierarchy.children(docID)]
+    view = self.db.getView('viewHierarchy/viewChildren', startkey=[docID], endkey=[docID, {}])
+    return [{'_id':item['id'], '-name':item['value'][1], '-type':item['value'][0], 'child':item['key'][1],
+             'path':item['value'][2]} for item in view]
 
   def outputQR(self):
     """
@@ -1107,7 +1662,7 @@ class Pasta:
     """
     outString = f"{'QR': <36}|{'Name': <36}|{'ID': <36}\n"
     outString += '-'*110+'\n'
-    for item in self.db.getView('viewIdentify/viewQR'):
+    for item in self.db.getView('viewIdentify/viewQR', update='lazy'):
       outString += f"{item['key'][:36]: <36}|{item['value'][:36]: <36}|{item['id'][:36]: <36}\n"
     return outString
 
@@ -1121,7 +1676,46 @@ class Pasta:
     """
     outString = f"{'SHAsum': <32}|{'Name': <40}|{'ID': <25}\n"
     outString += '-'*110+'\n'
-    for item in self.db.getView('viewIdentify/viewSHAsum'):
+    for item in self.db.getView('viewIdentify/viewSHAsum', update='lazy'):
       key = item['key'] if item['key'] else '-empty-'
       outString += f"{key[:32]: <32}|{item['value'][:40]: <40}|{item['id']: <25}\n"
     return outString
+
+
+def initScanWorker(linkDefault):
+  """
+  Open backend in worker process of scanAll
+
+  Args:
+    linkDefault (string): name of configuration
+  """
+  WORKER['backend'] = Pasta(linkDefault)
+  return
+
+
+def scanProject(projectID, verify=False):
+  """
+  Scan one project with backend of worker process, see Pasta.scanAll
+
+  Args:
+    projectID (string): id of project
+    verify (bool): use git-annex status
+
+  Returns:
+    dict: _id, success, output, error, duration
+  """
+  import io, time, traceback
+  from contextlib import redirect_stdout
+  from pathlib import Path
+  be = WORKER['backend']
+  be.hierStack, be.cwd, be.currentID, be.hierarchy = [], Path('.'), None, None
+  output, startTime = io.StringIO(), time.perf_counter()
+  result = {'_id':projectID, 'success':True, 'error':None}
+  with redirect_stdout(output):
+    try:
+      be.changeHierarchy(projectID)
+      be.scanTree(verify=verify)
+    except Exception:  # pylint: disable=broad-except
+      result.update(success=False, error=traceback.format_exc())
+  result.update(output=output.getvalue(), duration=time.perf_counter()-startTime)
+  return result
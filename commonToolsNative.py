@@ -0,0 +1,369 @@
+"""Native python version of commonTools.py
+- commonTools.js is shared with the javascript frontend and translated by js2py into commonTools.py
+- js2py interprets every call; this module produces the same output as plain python functions
+- keep in sync with commonTools.js: Tests/testCommonTools.py compares both versions
+"""
+import os, re
+from datetime import datetime, timezone
+
+JS_WHITESPACE = '\t\n\x0b\x0c\r \xa0\u1680\u180e\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008'\
+                '\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'  #removed by String.trim()
+HIERARCHY_LABELS = {'0':'Projects', '1':'Tasks', '2':'Subtasks', '3':'Subsubtasks'}
+REGEX_RATING    = re.compile(r'#\d')
+REGEX_OTHER_TAG = re.compile(r'(^|\s)#{1}[a-zA-Z][\w]+')
+REGEX_TAG       = re.compile(r'(^|\s)#{1}[\w]+')
+REGEX_FIELD     = re.compile(r':[\S]+:[\S]+:')
+REGEX_INDENT    = re.compile(r'\S|$')
+REGEX_ID_LINE   = re.compile(r'\|\|\w-')
+REGEX_CAMEL     = re.compile(r'(?:^\w|[A-Z]|\b\w|\s+)')
+REGEX_NON_WORD  = re.compile(r'\W')
+REGEX_SPACE     = re.compile(r'\s+')
+REGEX_NUMBER    = re.compile(r'[+-]?(Infinity|(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?)')
+REGEX_HEX       = re.compile(r'0[xX][0-9a-fA-F]+')
+
+
+def uuidv4():
+  """
+  Create random id of 32 hex-characters
+
+  Returns:
+    string: id
+  """
+  return os.urandom(16).hex()
+
+
+def fillDocBeforeCreate(data, docType):
+  """
+  Fill the data before create (new doc) or update (existing doc)
+  - add _id, -date, -branch, tags and comment if not present
+  - tags and fields (:key:value:) in the comment are moved into doc
+
+  Args:
+    data (dict): document; it is not altered
+    docType (string, list): document type
+
+  Returns:
+    dict: filled document
+  """
+  protectedKeys = ['comment', 'tags', 'image']
+  data = dict(data)
+  if not _truthy(data.get('-type')):
+    data['-type'] = [docType]
+  if isinstance(data['-type'], str):
+    data['-type'] = data['-type'].split('/')
+  if not _truthy(data.get('_id')):
+    prefix = 'x' if docType[0]=='x' else docType[0][0]
+    data['_id'] = prefix+'-'+uuidv4()
+  data['-date'] = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+  if not _truthy(data.get('-branch')):
+    data['-branch'] = [{'stack':[], 'path':None}]
+  if not _truthy(data.get('comment')):
+    data['comment'] = ''
+  if not _truthy(data.get('tags')):
+    data['tags'] = []
+  # tags and rating from comment
+  rating = REGEX_RATING.search(data['comment'])
+  rating = [] if rating is None else [rating.group(0)]
+  otherTags = [i.group(0) for i in REGEX_OTHER_TAG.finditer(data['comment'])]
+  data['tags'] = rating + (data['tags'] if isinstance(data['tags'], list) else [data['tags']]) + otherTags
+  data['comment'] = REGEX_TAG.sub(' ', data['comment'])
+  # fields from comment
+  for item in REGEX_FIELD.findall(data['comment']):
+    aList = item.split(':')
+    if _truthy(data.get(aList[1])):
+      continue
+    number = _toNumber(aList[2])
+    data[aList[1]] = aList[2] if number is None else number
+  data['comment'] = REGEX_FIELD.sub('', data['comment'])
+  # indentation of comment in steps of two spaces
+  comment = ''
+  for line in data['comment'].split('\n'):
+    initSpaces = REGEX_INDENT.search(line).start()
+    comment += ' '*((initSpaces+1)//2*2) + line.strip(JS_WHITESPACE)+'\n'
+  data['comment'] = comment[:-1]
+  data['tags'] = [i.strip(JS_WHITESPACE) for i in data['tags']]
+  # individual doc-types
+  if data['-type'][0]=='sample':
+    if not _truthy(data.get('qrCode')):
+      data['qrCode'] = []
+    if isinstance(data['qrCode'], str):
+      data['qrCode'] = data['qrCode'].split(' ')
+  if data['-type'][0]=='measurement':
+    if not _truthy(data.get('image')):
+      data['image'] = ''
+    if not _truthy(data.get('shasum')):
+      data['shasum'] = ''
+  # cleaning at the end
+  for key in list(data.keys()):
+    if isinstance(data[key], str):
+      if data[key]=='' and key not in protectedKeys:
+        del data[key]
+      else:
+        data[key] = data[key].strip(JS_WHITESPACE)
+  return data
+
+
+def ontology2Labels(ontology, tableFormat):
+  """
+  Extract labels of document types from ontology and table-format
+
+  Args:
+    ontology (dict): ontology
+    tableFormat (dict): tableFormat branch from .pastaELN.json
+
+  Returns:
+    dict: dataDict and hierarchyDict: key=docType, value=label
+  """
+  dataDict, hierarchyDict = {}, {}
+  for key in ontology:
+    if key in ('_id', '_rev'):
+      continue
+    if key in tableFormat and '-label-' in tableFormat[key]:
+      label = tableFormat[key]['-label-']
+    elif key[0]=='x':
+      label = HIERARCHY_LABELS.get(key[1:2])
+    else:
+      label = key[0].upper()+key[1:]+'s'
+    if key[0]=='x':
+      hierarchyDict[key] = label
+    else:
+      dataDict[key] = label
+  return {'dataDict':dataDict, 'hierarchyDict':hierarchyDict}
+
+
+def hierarchy2String(data, addID, callback, detail, magicTags):
+  """
+  Convert view of hierarchy into org-mode string
+
+  Args:
+    data (dict): key=docID, value=[hierarchy-stack, childNum, docType, name]
+    addID (bool): add docID to output
+    callback (function): get document of docID; None: no details
+    detail (string): 'all' or 'tags' details added using callback
+    magicTags (list): magic tags, e.g. TODO, DONE
+
+  Returns:
+    string: org-mode string
+  """
+  dataList = []
+  for key, value in data.items():
+    if value[0]==key:
+      hierString = key
+    else:
+      hierarchyIDs = value[0].split(' ')
+      hierString = hierarchyIDs[0]
+      for docID in hierarchyIDs[1:]:
+        childNum = data[docID][1] if docID in data else 0
+        if isinstance(childNum, (int, float)) and childNum>9999:
+          print('**ERROR** commonTools:ChildNUM>9999 **ERROR** '+key)
+        hierString += ' '+('00'+_jsString(childNum))[-3:]+' '+docID
+    dataList.append((hierString, value[2:]))
+  dataList.sort(key=lambda item: item[0])
+
+  outString = []
+  for hierarchy, label in dataList:
+    hierarchyArray = hierarchy.split(' ')
+    prefix = '*'*((len(hierarchyArray)+1)//2)
+    if addID is True:
+      docID = hierarchyArray[-1]
+      partString = _jsString(label[1])+'||'+docID
+      if callable(callback):
+        doc = callback(docID)
+        spliceStart = None                      #commonTools.js splices at index of other loop variable: undefined or
+        if detail=='all':                       #  number of branches
+          for branch in doc['-branch']:
+            partString += '\nPath: '+_jsString(branch['path'])
+          partString += '\nInheritance: '
+          for branch in doc['-branch']:
+            partString += _jsString(branch['stack'])+' '
+          spliceStart = len(doc['-branch'])
+        tags = list(doc['tags'])
+        for magicTag in magicTags:
+          if '#'+magicTag in tags:
+            prefix += ' '+magicTag
+            idx = 0
+            while idx<len(tags):
+              if tags[idx]=='#'+magicTag:
+                start = 0 if spliceStart is None else \
+                        max(len(tags)+spliceStart, 0) if spliceStart<0 else min(spliceStart, len(tags))
+                del tags[start:start+1]
+                spliceStart = None if spliceStart is None else spliceStart-1
+              idx += 1
+        comment = _jsString(doc['comment']) if 'comment' in doc else 'undefined'
+        partString += '\nTags: '+' '.join(_jsString(i) for i in tags)+'\n'+comment
+      partString = prefix+' '+partString
+    else:
+      partString = prefix+' '+_jsString(label[0])+': '+_jsString(label[1])
+    outString.append(partString)
+  return '\n'.join(outString)
+
+
+def editString2Docs(text, magicTags):
+  """
+  Convert org-mode string into list of documents
+
+  Args:
+    text (string): org-mode string
+    magicTags (list): magic tags, e.g. TODO, DONE
+
+  Returns:
+    list: list of documents; 'edit' is -new-, -edit- or -delete-
+  """
+  docs = []
+  objective, tags, comment = None, None, None
+  title, docID, docType = '', '', ''
+  for line in text.split('\n'):
+    if re.match(r'\*{1,6} ', line):
+      if docID!='' or title!='':
+        docs.append(_editDoc(title, tags, comment, docID, docType, objective))
+      objective, tags, comment = None, None, None
+      parts = line.split('||')
+      title = ' '.join(parts[0].split(' ')[1:]).strip(JS_WHITESPACE)
+      for magicTag in reversed(magicTags):
+        if title[:4]==magicTag:
+          title = title[len(magicTag)+1:]
+          tags = ('null' if tags is None else tags)+'#'+magicTag+' '
+      if tags:
+        tags = tags.strip(JS_WHITESPACE)
+      docID = parts[-1] if len(parts)>1 else ''
+      docType = len(line.split(' ')[0])-1
+    elif line[:10]=='Objective:':
+      objective = line[10:].strip(JS_WHITESPACE)
+    elif line[:5]=='Tags:':
+      tags = line[5:].strip(JS_WHITESPACE) if tags is None else tags+line[5:].strip(JS_WHITESPACE)
+    elif not REGEX_ID_LINE.search(line):
+      comment = line+'\n' if comment is None else comment+line+'\n'
+  docs.append(_editDoc(title, tags, comment, docID, docType, objective))
+  return docs
+
+
+def _editDoc(title, tags, comment, docID, docType, objective):
+  """
+  Assemble one document of editString2Docs
+
+  Args:
+    title (string): name
+    tags (string): space separated tags or None
+    comment (string): comment or None
+    docID (string): document id or ''
+    docType (int): depth in hierarchy
+    objective (string): objective or None
+
+  Returns:
+    dict: document
+  """
+  if comment:
+    comment = comment.strip(JS_WHITESPACE)
+  doc = {'-name':title, 'tags':tags, 'comment':comment, '_id':docID, '-type':docType}
+  if objective:
+    doc['objective'] = objective
+  if title=='-delete-' and docID!='':
+    doc['edit'] = '-delete-'
+  elif docID=='':
+    doc['edit'] = '-new-'
+  else:
+    doc['edit'] = '-edit-'
+  return doc
+
+
+def getChildren(data, docID):
+  """
+  Get children of document from org-mode string
+
+  Args:
+    data (string): org-mode string with ids
+    docID (string): id of parent
+
+  Returns:
+    dict: names and ids of children
+  """
+  names, ids = [], []
+  saveLine = False
+  numStarsParent = -1
+  for line in data.split('\n'):
+    items = line.split('||')
+    itemID = items[1] if len(items)>1 else None
+    if saveLine:
+      nStars = len(items[0].split(' ')[0])
+      if nStars==numStarsParent:
+        break
+      if nStars==numStarsParent+1:
+        ids.append(itemID)
+        names.append(items[0][numStarsParent+2:])
+    if itemID==docID:
+      numStarsParent = len(items[0].split(' ')) if items[0][:1]=='*' else 0
+      saveLine = True
+  return {'names':names, 'ids':ids}
+
+
+def camelCase(text):
+  """
+  Convert string to camelCase: remove spaces and non-word characters
+
+  Args:
+    text (string): input
+
+  Returns:
+    string: camelCase string
+  """
+  outString = REGEX_CAMEL.sub(lambda match: '' if REGEX_SPACE.search(match.group(0)) else match.group(0).upper(), text)
+  return REGEX_NON_WORD.sub('', outString)
+
+
+def _truthy(value):
+  """
+  Truthiness of javascript: empty lists and dicts are true
+
+  Args:
+    value (any): value
+
+  Returns:
+    bool: true if javascript considers it true
+  """
+  if value is None or value is False or value=='':
+    return False
+  if isinstance(value, (int, float)) and not isinstance(value, bool):
+    return value==value and value!=0
+  return True
+
+
+def _toNumber(text):
+  """
+  Convert string to number like javascript
+
+  Args:
+    text (string): text
+
+  Returns:
+    int, float: number; None if not a number
+  """
+  text = text.strip(JS_WHITESPACE)
+  if text=='':
+    return 0
+  if REGEX_HEX.fullmatch(text):
+    return int(text, 16)
+  if not REGEX_NUMBER.fullmatch(text):
+    return None
+  number = float(text.replace('Infinity', 'inf'))
+  return int(number) if number.is_integer() else number
+
+
+def _jsString(value):
+  """
+  Convert value to string like javascript; js2py hands None over as undefined
+
+  Args:
+    value (any): value
+
+  Returns:
+    string: string
+  """
+  if value is None:
+    return 'undefined'
+  if isinstance(value, bool):
+    return 'true' if value else 'false'
+  if isinstance(value, float) and value.is_integer():
+    return str(int(value))
+  if isinstance(value, (list, tuple)):
+    return ','.join('' if i is None else _jsString(i) for i in value)
+  return str(value)
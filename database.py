@@ -2,7 +2,44 @@
 """
 import traceback
 from pathlib import PosixPath
-from serverActions import testUser
+
+INDEX_UPDATE_DELAY = 2   #sec after last write until view indices are built in background
+VIEW_PAGE_SIZE     = 500 #rows per request if views are iterated page by page
+BULK_SIZE          = 1000 #documents per request of bulk reads and writes
+PROJECT_VIEW_KEYS  = {'date':"doc['-date']", 'name':"doc['-name']"}  #second part of key of views per project
+REQUIRED_VIEWS     = {'viewDocType':[], 'viewProject':[], 'viewColumn':[],  #design document: views used by backend
+                      'viewHierarchy':['viewHierarchy', 'viewPaths', 'viewTree', 'viewChildren', 'viewDetails'],
+                      'viewIdentify':['viewQR', 'viewSHAsum', 'viewTags']}
+
+
+def columnViewName(docType, column):
+  """
+  Name of view in design document viewColumn that sorts docType by column
+
+  Args:
+    docType (string): document type, e.g. measurement/csv
+    column (string): name of column, e.g. metaVendor/date
+
+  Returns:
+    string: name of view
+  """
+  return docType.replace('/','__')+'-'+column.replace('/','__')
+
+
+def addRevision(doc, oldDoc):
+  """
+  Add previous values as inline revision attachment vN.json; saved with document in bulk writes
+
+  Args:
+    doc (dict): document that is saved
+    oldDoc (dict): previous values
+  """
+  import json, base64
+  attachments = doc['_attachments'] = dict(doc.get('_attachments', {}))
+  attachments['v'+str(len(attachments))+'.json'] = {'content_type':'application/json',
+    'data':base64.b64encode(json.dumps(oldDoc).encode()).decode()}
+  return
+
 
 class Database:
   """
@@ -21,6 +58,7 @@ class Database:
     """
     import json
     from cloudant.client import CouchDB
+    from localCache import readCache, writeCache, ViewCache
     self.confirm = confirm
     try:
       self.client = CouchDB(user, password, url='http://127.0.0.1:5984', connect=True)
@@ -28,23 +66,67 @@ class Database:
       print('**ERROR dit01: Something unexpected has happend\n'+traceback.format_exc())
       raise
     self.databaseName = databaseName
+    self.viewCache    = ViewCache(databaseName)  #view responses: validated by ETag, kept across sessions
+    self.indexTimer   = None                     #pending update of view indices after writes
     if self.databaseName in self.client.all_dbs():
       self.db = self.client[self.databaseName]
     else:
       self.db = self.client.create_database(self.databaseName)
     # check if default documents exist and create
-    if '-ontology-' not in self.db or kwargs.get('resetOntology', False):
-      if '-ontology-' in self.db:
+    revision = self.getRevision('-ontology-')
+    if revision is None or kwargs.get('resetOntology', False):
+      if revision is not None:
         print('Info: remove old ontology')
         self.db['-ontology-'].delete()
       with open(softwarePath.joinpath('ontology.json'), 'r', encoding='utf-8') as fIn:
         doc = json.load(fIn)
-      _ = self.db.create_document(doc)
-    # check if default views exist and create them
-    self.ontology    = self.db['-ontology-']
+      revision = self.db.create_document(doc)['_rev']
+    # use local copy of ontology if it has the same revision
+    self.ontology    = readCache(self.databaseName, 'ontology', revision)
+    if self.ontology is None:
+      self.ontology = dict(self.db['-ontology-'])
+      writeCache(self.databaseName, 'ontology', self.ontology, self.ontology['_rev'])
     return
 
 
+  def getRevision(self, docID):
+    """
+    Get revision of document without fetching it: HEAD request and ETag
+
+    Args:
+        docID (string): id of document
+
+    Returns:
+        string: revision; None if document does not exist
+    """
+    from urllib.parse import quote
+    response = self.db.r_session.head(self.db.database_url+'/'+quote(docID, safe=''))
+    if response.status_code==404:
+      return None
+    response.raise_for_status()
+    return response.headers['ETag'].strip('"')
+
+
+  def tableColumns(self, docType, guiMaxColumns=16):
+    """
+    Names of columns of table of docType: ontology items with name, excl. headings
+
+    Args:
+      docType (string): document type
+      guiMaxColumns (int): max. colums in view
+
+    Returns:
+      list: names of columns, same order as values of viewDocType, viewProject, viewColumn
+    """
+    columns = []
+    for idx,item in enumerate(self.ontology[docType]):
+      if idx>guiMaxColumns:
+        break
+      if 'name' in item:
+        columns.append(item['name'])
+    return columns
+
+
   def initViews(self, docTypesLabels, magicTags=['TODO','v1'], guiMaxColumns=16):
     """
     initialize all views
@@ -56,43 +138,73 @@ class Database:
     """
     # for the individual docTypes
     jsDefault = "if ($docType$) {emit($key$, [$outputList$]);}"
-    viewCode = {}
+    # per project: composite keys [projectID, sortKey]; each project only once, even if doc is in multiple branches
+    jsProject = "if ($docType$) {var projects=[]; doc['-branch'].forEach(function(branch) {"\
+                "if (branch.stack.length>0 && projects.indexOf(branch.stack[0])<0) {projects.push(branch.stack[0]);}});"\
+                "projects.forEach(function(project) {emit([project, $sortKey$], [$outputList$]);});}"
+    # per column: composite keys [columnValue, docID] for sorting tables by any column
+    jsColumn = "if ($docType$) {emit([$column$, doc._id], [$outputList$]);}"
+    viewCode, projectViewCode, columnViewCode = {}, {}, {}
     for docType in docTypesLabels:
       if docType=='x0':
-        jsString = jsDefault.replace('$docType$', "doc['-type']=='x0'").replace('$key$','doc._id')
+        docTypeCondition = "doc['-type']=='x0'"
+        jsString = jsDefault.replace('$docType$', docTypeCondition).replace('$key$','doc._id')
       elif docType[0]=='x':
         continue
       else:     #show all doctypes that have the same starting ..
-        jsString = jsDefault.replace('$docType$', "doc['-type'].join('/').substring(0, "+str(len(docType))+")=='"+docType+"'").replace('$key$','doc["-branch"][0].stack[0]')
-      outputList = []
-      for idx,item in enumerate(self.ontology[docType]):
-        if idx>guiMaxColumns:
-          break
-        if 'name' not in item:
-          continue
-        if item['name'] == 'image':
-          outputList.append('(doc.image.length>3).toString()')
-        elif item['name'] == 'tags':
-          outputList.append('doc.tags.join(" ")')
-        elif item['name'] == '-type':
-          outputList.append('doc["-type"].slice(1).join("/")')
-        elif item['name'] == 'content':
-          outputList.append('doc.content?doc.content.slice(0, 100):""')
-        elif '/' in item['name']:  #stacked requests i.e. metaVendor/date
-          parentString = 'doc'+''.join(['["'+i+'"]' for i in item['name'].split('/')[:-1]])
-          newString = 'doc'+''.join(['["'+i+'"]' for i in item['name'].split('/')])
-          newString = parentString +' ? '+ newString + ': ""'
-          outputList.append(newString)
+        docTypeCondition = "doc['-type'].join('/').substring(0, "+str(len(docType))+")=='"+docType+"'"
+        jsString = jsDefault.replace('$docType$', docTypeCondition).replace('$key$','doc["-branch"][0].stack[0]')
+      columns = {}
+      for name in self.tableColumns(docType, guiMaxColumns):
+        if name == 'image':
+          columns[name] = '(doc.image.length>3).toString()'
+        elif name == 'tags':
+          columns[name] = 'doc.tags.join(" ")'
+        elif name == '-type':
+          columns[name] = 'doc["-type"].slice(1).join("/")'
+        elif name == 'content':
+          columns[name] = 'doc.content?doc.content.slice(0, 100):""'
+        elif '/' in name:  #stacked requests i.e. metaVendor/date
+          parentString = 'doc'+''.join(['["'+i+'"]' for i in name.split('/')[:-1]])
+          newString = 'doc'+''.join(['["'+i+'"]' for i in name.split('/')])
+          columns[name] = parentString +' ? '+ newString + ': ""'
         else:
-          outputList.append('doc["'+item['name']+'"]')
-      outputList = ','.join(outputList)
+          columns[name] = 'doc["'+name+'"]'
+      outputList = ','.join(columns.values())
       jsString = jsString.replace('$outputList$', outputList)
       viewCode[docType.replace('/','__')]=jsString
+      for name, column in columns.items():
+        columnViewCode[columnViewName(docType, name)] = jsColumn.replace('$docType$', docTypeCondition)\
+          .replace('$column$', column).replace('$outputList$', outputList)
+      if docType[0]!='x':
+        for sortName, sortKey in PROJECT_VIEW_KEYS.items():
+          projectViewCode[docType.replace('/','__')+'-'+sortName] = jsProject.replace('$docType$', docTypeCondition)\
+            .replace('$sortKey$', sortKey).replace('$outputList$', outputList)
     self.saveView('viewDocType', viewCode)
+    self.saveView('viewProject', projectViewCode)
+    self.saveView('viewColumn', columnViewCode)
     # general views: Hierarchy, Identify
     jsHierarchy  = '''
       if ('-type' in doc) {
-        doc['-branch'].forEach(function(branch) {emit(branch.stack.concat([doc._id]).join(' '),[branch.child,doc['-type'],doc['-name']]);});
+        doc['-branch'].forEach(function(branch) {emit(branch.stack.concat([doc._id]).join(' '),[branch.child,doc['-type'],doc['-name'],branch.path]);});
+      }
+    '''
+    # keys [depth, x0id, x1id, ..., id]: the nodes of one level below a node are a range of keys
+    jsTree = '''
+      if ('-type' in doc) {
+        doc['-branch'].forEach(function(branch) {emit([branch.stack.length].concat(branch.stack).concat([doc._id]),[branch.child,doc['-type'],doc['-name']]);});
+      }
+    '''
+    # same keys as viewHierarchy: details for rendering the hierarchy with tags and comments in one request
+    jsDetails = '''
+      if ('-type' in doc) {
+        doc['-branch'].forEach(function(branch) {emit(branch.stack.concat([doc._id]).join(' '),[doc.tags,doc.comment,doc['-branch']]);});
+      }
+    '''
+    # keys [parentID, childNum]: children of a node in child-order are one range of keys
+    jsChildren = '''
+      if ('-type' in doc) {
+        doc['-branch'].forEach(function(branch) {if (branch.stack.length>0) {emit([branch.stack[branch.stack.length-1],branch.child],[doc['-type'],doc['-name'],branch.path]);}});
       }
     '''
     jsPath = '''
@@ -101,7 +213,8 @@ class Database:
         else                {doc['-branch'].forEach(function(branch){if(branch.path){emit(branch.path,[branch.stack,doc['-type'],branch.child,''        ]);}});}
       }
     '''
-    self.saveView('viewHierarchy',{'viewHierarchy':jsHierarchy,'viewPaths':jsPath})
+    self.saveView('viewHierarchy',{'viewHierarchy':jsHierarchy,'viewPaths':jsPath,'viewTree':jsTree,
+                                  'viewChildren':jsChildren,'viewDetails':jsDetails})
     jsSHA= "if (doc['-type'][0]==='measurement'){emit(doc.shasum, doc['-name']);}"
     jsQR = "if (doc.qrCode.length > 0)"
     jsQR+= "{doc.qrCode.forEach(function(thisCode) {emit(thisCode, doc['-name']);});}"
@@ -111,6 +224,35 @@ class Database:
     return
 
 
+  def missingViews(self):
+    """
+    Views used by the backend that do not exist, e.g. in database created by older version
+    - names of views are cached locally per revision of design documents: usually one small request
+
+    Returns:
+      list: missing design documents and design/view
+    """
+    from localCache import readCache, writeCache, hashKey
+    url   = self.db.database_url+'/_all_docs'
+    query = {'startkey':'"_design/"', 'endkey':'"_design0"'}
+    response = self.db.r_session.get(url, params=query)
+    response.raise_for_status()
+    key   = hashKey([[i['id'], i['value']['rev']] for i in response.json()['rows']])
+    views = readCache(self.databaseName, 'views', key)
+    if views is None:
+      response = self.db.r_session.get(url, params=dict(query, include_docs='true'))
+      response.raise_for_status()
+      views = {i['id'][len('_design/'):]:sorted(i['doc'].get('views', {})) for i in response.json()['rows']}
+      writeCache(self.databaseName, 'views', views, key)
+    missing = []
+    for design, names in REQUIRED_VIEWS.items():
+      if design not in views:
+        missing.append(design)
+      else:
+        missing += [design+'/'+i for i in names if i not in views[design]]
+    return missing
+
+
   def exit(self, deleteDB=False):
     """
     Shutting down things
@@ -119,6 +261,10 @@ class Database:
       deleteDB (bool): remove database
     """
     import warnings
+    if self.indexTimer is not None:   #flush pending index update
+      self.indexTimer.cancel()
+      if not deleteDB:
+        self.updateIndices()
     if deleteDB:
       self.db.client.delete_database(self.databaseName)
     warnings.simplefilter("ignore")  #client disconnect triggers ignored ResourceWarning on socket
@@ -139,6 +285,129 @@ class Database:
     return self.db[docID]
 
 
+  def clientString(self):
+    """
+    Client information stored in documents: | separated call stack of PASTA functions
+
+    Returns:
+        string: call stack
+    """
+    tracebackString = traceback.format_stack()[:-1]  #excl. this function
+    tracebackString = [item for item in tracebackString if 'backend.py' in item or 'database.py' in item or 'Tests' in item or 'pasta' in item]
+    return '|'.join([item.split('\n')[1].strip() for item in tracebackString])  #| separated list of stack excluding last
+
+
+  def getDocs(self, docIDs):
+    """
+    Get many documents with few requests
+
+    Args:
+        docIDs (list): document ids
+
+    Returns:
+        dict: docID: document; documents that do not exist are missing
+    """
+    docs = {}
+    docIDs = list(docIDs)
+    for start in range(0, len(docIDs), BULK_SIZE):
+      response = self.db.r_session.post(self.db.database_url+'/_all_docs', params={'include_docs':'true'},
+                                        json={'keys':docIDs[start:start+BULK_SIZE]})
+      response.raise_for_status()
+      for row in response.json()['rows']:
+        if row.get('doc') is not None:
+          docs[row['id']] = row['doc']
+    return docs
+
+
+  def saveDocs(self, docs):
+    """
+    Create or update many documents with few requests (_bulk_docs)
+
+    Args:
+        docs (list): documents; updates include _rev
+
+    Returns:
+        list: saved documents incl. new _rev; failed ones are reported and skipped
+    """
+    saved = []
+    if not docs or (self.confirm is not None and not self.confirm(docs, "Save these documents?")):
+      return saved
+    for start in range(0, len(docs), BULK_SIZE):
+      batch = docs[start:start+BULK_SIZE]
+      response = self.db.r_session.post(self.db.database_url+'/_bulk_docs', json={'docs':batch})
+      response.raise_for_status()
+      for doc, result in zip(batch, response.json()):
+        if 'error' in result:
+          print('**ERROR dsd01: could not save document |',result['id'],result['error'],result.get('reason',''))
+          continue
+        doc['_rev'] = result['rev']
+        doc.pop('_attachments', None)   #content of new attachments is not needed anymore
+        saved.append(doc)
+    self.scheduleIndexUpdate()
+    return saved
+
+
+  def updateDocs(self, changes, userID, groupID=None):
+    """
+    Update many documents with few requests; same rules as updateDoc
+    - previous values are stored as revision attachment vN.json of each document
+    - grouped: previous values of all documents are stored as one revision attachment of document groupID,
+      e.g. if subtree is moved
+    - documents without significant change are not written
+
+    Args:
+        changes (dict): docID: items to update; {'edit':'-delete-'} deletes the content
+          '-branch' (list): replacements [old stack, old path, new branch] of individual branches
+        userID (string): user who makes the changes
+        groupID (string): id of document that stores the revision of all documents; None: not grouped
+
+    Returns:
+        list: updated documents
+    """
+    from datetime import datetime, timezone
+    client = self.clientString()
+    date   = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+    docs, group = [], {}
+    docIDs = list(changes) if groupID is None or groupID in changes else list(changes)+[groupID]
+    allDocs = self.getDocs(docIDs)
+    for docID, doc in allDocs.items():
+      change = changes.get(docID, {})
+      if 'edit' in change:     #if delete
+        oldDoc = {key:value for key,value in doc.items() if key not in ('_id', '_rev', '_attachments')}
+        newDoc = {key:doc[key] for key in ('_id', '_rev', '-branch', '_attachments') if key in doc}
+      else:                    #if update
+        oldDoc, newDoc = {}, dict(doc)
+        for oldStack, oldPath, branch in change.get('-branch', []):
+          for idx, docBranch in enumerate(newDoc['-branch']):
+            if docBranch['stack']==oldStack and docBranch['path']==oldPath and docBranch!=branch:
+              oldDoc['-branch'] = doc['-branch']
+              newDoc['-branch'] = newDoc['-branch'][:idx]+[branch]+newDoc['-branch'][idx+1:]
+              break
+        for item, value in change.items():
+          if item in ('_id', '_rev', '-branch') or value is None or item not in doc:  #skip: same as updateDoc
+            continue
+          if value!=doc[item]:
+            oldDoc[item] = doc[item]
+            newDoc[item] = value
+        if not oldDoc and docID!=groupID:
+          continue
+      newDoc.update({'-date':date, '-client':client, '-user':userID})
+      if groupID is None:
+        addRevision(newDoc, oldDoc)
+      else:
+        group[docID] = oldDoc
+      docs.append(newDoc)
+    if groupID is not None:
+      if not any(group.values()):  #nothing changed
+        return []
+      groupDoc = next((i for i in docs if i['_id']==groupID), None)
+      if groupDoc is None:
+        print('**ERROR dud01: document of grouped revision does not exist |',groupID)
+        return []
+      addRevision(groupDoc, {docID:oldDoc for docID, oldDoc in group.items() if oldDoc})
+    return self.saveDocs(docs)
+
+
   def saveDoc(self, doc):
     """
     Wrapper for save to database function
@@ -149,16 +418,14 @@ class Database:
     Returns:
         dict: json representation of submitted document
     """
-    tracebackString = traceback.format_stack()
-    tracebackString = [item for item in tracebackString if 'backend.py' in item or 'database.py' in item or 'Tests' in item or 'pasta' in item]
-    tracebackString = '|'.join([item.split('\n')[1].strip() for item in tracebackString])  #| separated list of stack excluding last
-    doc['-client'] = tracebackString
+    doc['-client'] = self.clientString()
     if '-branch' in doc and 'op' in doc['-branch']:
       del doc['-branch']['op']  #remove operation, saveDoc creates and therefore always the same
       doc['-branch'] = [doc['-branch']]
     if self.confirm is None or self.confirm(doc,"Create this document?"):
       try:
         res = self.db.create_document(doc)
+        self.scheduleIndexUpdate()
       except:
         print('**ERROR: database.py:saveDoc could not save, likely JSON issue')
         print(doc)
@@ -186,9 +453,7 @@ class Database:
         dict: json representation of updated document
     """
     import json, os
-    tracebackString = traceback.format_stack()
-    tracebackString = [item for item in tracebackString if 'backend.py' in item or 'database.py' in item or 'Tests' in item or 'pasta' in item]
-    tracebackString = '|'.join([item.split('\n')[1].strip() for item in tracebackString])  #| separated list of stack excluding last
+    tracebackString = self.clientString()
     change['-client'] = tracebackString
     newDoc = self.db[docID]  #this is the document that stays live
     initialDocCopy = dict(newDoc)
@@ -281,6 +546,7 @@ class Database:
       if '_attachments' in newDoc:
         attachmentName = 'v'+str(len(newDoc['_attachments']))+'.json'
       newDoc.put_attachment(attachmentName, 'application/json', json.dumps(oldDoc))
+      self.scheduleIndexUpdate()
     return newDoc
 
 
@@ -311,35 +577,94 @@ class Database:
 
 
 
-  def getView(self, thePath, startKey=None, preciseKey=None):
+  def getView(self, thePath, startKey=None, preciseKey=None, update=None, **kwargs):
     """
     Wrapper for getting view function
+    - response is cached on disk and only transferred again if the view changed
 
     Args:
         thePath (string): path to view
         startKey (string): if given, use to filter output, everything that starts with this key
         preciseKey (string): if given, use to filter output. Match precisely
+        update (string): consistency of index; None: wait for index to be up-to-date;
+          'lazy': return instantly, possibly stale, and update index afterwards (for interactive listings)
+        kwargs (dict): additional query parameters of CouchDB, e.g. startkey, endkey, limit, skip, descending
 
     Returns:
         list: list of documents in this view
     """
-    from cloudant.view import View
     thePath = thePath.split('/')
-    designDoc = self.db.get_design_document(thePath[0])
-    v = View(designDoc, thePath[1])
+    url = self.db.database_url+'/_design/'+thePath[0]+'/_view/'+thePath[1]
+    if startKey is not None:
+      query = {'startkey':startKey, 'endkey':startKey+'zzz'}
+    elif preciseKey is not None:
+      query = {'key':preciseKey}
+    else:
+      query = {}
+    query.update(kwargs)
+    if update is not None:
+      query.update({'update':update, 'stable':True})
     try:
-      if startKey is not None:
-        res = v(startkey=startKey, endkey=startKey+'zzz')['rows']
-      elif preciseKey is not None:
-        res = v(key=preciseKey)['rows']
-      else:
-        res = list(v.result)
+      res = self.viewCache.get(self.db.r_session, url, query)
     except:
       print('**ERROR dgv01: Database / Network problem for path |',thePath[1])
       res = []
     return res
 
 
+  def iterView(self, thePath, pageSize=VIEW_PAGE_SIZE, **kwargs):
+    """
+    Iterate view page by page: consumers can start before the entire view is transferred
+
+    Args:
+        thePath (string): path to view
+        pageSize (int): rows per request
+        kwargs (dict): parameters of getView, e.g. startKey, update
+
+    Yields:
+        list: rows of next page
+    """
+    while True:
+      page = self.getView(thePath, limit=pageSize, **kwargs)
+      if page:
+        yield page
+      if len(page)<pageSize:
+        return
+      #continue after last row, also if rows share its key: startkey_docid is sent raw, see localCache.queryString
+      kwargs.update({'startkey':page[-1]['key'], 'startkey_docid':page[-1]['id'], 'skip':1})
+
+
+  def scheduleIndexUpdate(self):
+    """
+    Trigger building of view indices shortly after the last write
+    - debounced: many writes in a row trigger only one update
+    - interactive listings (update='lazy') then find the indices nearly up-to-date
+    """
+    import threading
+    if self.indexTimer is not None:
+      self.indexTimer.cancel()
+    self.indexTimer = threading.Timer(INDEX_UPDATE_DELAY, self.updateIndices)
+    self.indexTimer.daemon = True
+    self.indexTimer.start()
+    return
+
+
+  def updateIndices(self):
+    """
+    Start building the index of every design document on the server; return without waiting for it
+    """
+    self.indexTimer = None
+    try:
+      for item in self.db.design_documents():
+        if 'views' in item['doc'] and len(item['doc']['views'])>0:
+          viewName = list(item['doc']['views'].keys())[0]    #one view per design document builds all its views
+          self.db.r_session.get(self.db.database_url+'/'+item['id']+'/_view/'+viewName,
+                                params={'limit':0, 'update':'lazy'})
+    except:
+      print('**Warning: could not trigger index update')
+    return
+
+
   def saveView(self, designName, viewCode):
     """
     Adopt the view by defining a new jsCode
@@ -377,6 +702,7 @@ class Database:
     import time
     from cloudant.client import CouchDB
     from cloudant.replicator import Replicator
+    from serverActions import testUser
     try:
       rep = Replicator(self.client)
       try:
@@ -434,20 +760,20 @@ class Database:
             collection[docType] = [date]
     #determine bins for histogram
     firstSubmit = datetime.now().timestamp()
-    for key in collection.items():
+    for key in collection:
       if np.min(collection[key]) < firstSubmit:
         firstSubmit = np.min(collection[key])
     bins = np.linspace(firstSubmit, datetime.now().timestamp(), 100 )
     #calculate histgram and save it
     collectionCopy = dict(collection)
-    for key in collection.items():
+    for key in collection:
       hist, _ = np.histogram(collection[key], bins)
       collectionCopy[key] = hist
     collectionCopy['-bins-'] = (bins[:-1]+bins[1:])/2
     #calculate score
     bias = np.exp(( collectionCopy['-bins-']-collectionCopy['-bins-'][-1] ) / 1.e7)
     score = {}
-    for key in collectionCopy.items():
+    for key in collection:
       score[key] = np.sum(collectionCopy[key]*bias)
     #reformat dates into string
     collectionCopy['-bins-'] = [datetime.fromtimestamp(i).isoformat() for i in collectionCopy['-bins-']]
@@ -466,15 +792,29 @@ class Database:
 
     Args:
         verbose (bool): print more or only issues
-        kwargs (dict): additional parameter
+        kwargs (dict): additional parameter, i.e. repair, stream (function that receives each finding as
+          dict of level, code, message, details instead of adding it to the output)
 
     Returns:
-        bool: success of check
+        string: output incl. \n; empty if findings are streamed
     """
     import os, re, base64, io
     from PIL import Image
     from miscTools import bcolors
-    if verbose:
+    stream = kwargs.get('stream', None)
+    levels = {bcolors.OKGREEN:'info', bcolors.OKBLUE:'ok-ish', bcolors.HEADER:'unsure', bcolors.WARNING:'warning',
+              bcolors.FAIL:'error', bcolors.UNDERLINE:'heading'}
+    def report(color, message, details=''):
+      nonlocal outstring
+      if stream is None:
+        outstring+= f'{color}{message}{bcolors.ENDC}\n'+details
+      else:
+        code = re.match(r'\*\*ERROR (\w+):', message)
+        stream({'level':levels[color], 'code':code.group(1) if code else None, 'message':message,
+                'details':details})
+      return
+    outstring = ''
+    if verbose and stream is None:
       outstring = f'{bcolors.UNDERLINE}**** LEGEND ****{bcolors.ENDC}\n'
       outstring+= f'{bcolors.OKGREEN}Green: perfect and as intended{bcolors.ENDC}\n'
       outstring+= f'{bcolors.OKBLUE}Blue: ok-ish, can happen: empty files for testing, strange path for measurements{bcolors.ENDC}\n'
@@ -482,9 +822,8 @@ class Database:
       outstring+= f'{bcolors.WARNING}Yellow: WARNING should not happen (e.g. procedures without project){bcolors.ENDC}\n'
       outstring+= f'{bcolors.FAIL}Red: FAILURE and ERROR: NOT ALLOWED AT ANY TIME{bcolors.ENDC}\n'
       outstring+= 'Normal text: not understood, did not appear initially\n'
-      outstring+= f'{bcolors.UNDERLINE}**** List all DOCUMENTS ****{bcolors.ENDC}\n'
-    else:
-      outstring = ''
+    if verbose:
+      report(bcolors.UNDERLINE, '**** List all DOCUMENTS ****')
     repair = kwargs.get('repair', False)
     if repair:
       print('REPAIR MODE IS ON: afterwards, full-reload and create views')
@@ -493,7 +832,7 @@ class Database:
       try:
         if '_design' in doc['_id']:
           if verbose:
-            outstring+= f'{bcolors.OKGREEN}..info: Design document '+doc['_id']+f'{bcolors.ENDC}\n'
+            report(bcolors.OKGREEN, '..info: Design document '+doc['_id'])
           continue
         if doc['_id'] == '-ontology-':
           if repair:
@@ -505,7 +844,7 @@ class Database:
                 del doc[old]
             doc.save()
           if verbose:
-            outstring+= f'{bcolors.OKGREEN}..info: ontology exists{bcolors.ENDC}\n'
+            report(bcolors.OKGREEN, '..info: ontology exists')
           continue
         #only normal documents after this line
 
@@ -551,50 +890,50 @@ class Database:
 
         #branch test
         if '-branch' not in doc:
-          outstring+= f'{bcolors.FAIL}**ERROR dch01: branch does not exist '+doc['_id']+f'{bcolors.ENDC}\n'
+          report(bcolors.FAIL, '**ERROR dch01: branch does not exist '+doc['_id'])
           continue
         if len(doc['-branch'])>1 and doc['-type'] =='x':                 #text elements only one branch
-          outstring+= f'{bcolors.FAIL}**ERROR dch02: branch length >1 for text'+doc['_id']+' '+str(doc['-type'])+f'{bcolors.ENDC}\n'
+          report(bcolors.FAIL, '**ERROR dch02: branch length >1 for text'+doc['_id']+' '+str(doc['-type']))
         for branch in doc['-branch']:
           for item in branch['stack']:
             if not item.startswith('x-'):
-              outstring+= f'{bcolors.FAIL}**ERROR dch03: non-text in stack '+doc['_id']+f'{bcolors.ENDC}\n'
+              report(bcolors.FAIL, '**ERROR dch03: non-text in stack '+doc['_id'])
 
           if len(branch['stack'])==0 and doc['-type']!=['x','project']: #if no inheritance
             if doc['-type'][0] == 'measurement' or  doc['-type'][0][0] == 'x':
               if verbose:
-                outstring+= f'{bcolors.WARNING}**warning branch stack length = 0: no parent '+doc['_id']+f'{bcolors.ENDC}\n'
+                report(bcolors.WARNING, '**warning branch stack length = 0: no parent '+doc['_id'])
             else:
               if verbose:
-                outstring+= f'{bcolors.OKBLUE}**ok-ish branch stack length = 0: no parent for procedure/sample '+doc['_id']+'|'+doc['-name']+f'{bcolors.ENDC}\n'
+                report(bcolors.OKBLUE, '**ok-ish branch stack length = 0: no parent for procedure/sample '+doc['_id']+'|'+doc['-name'])
           if not '-type' in doc or len(doc['-type'])==0:
-            outstring+= f'{bcolors.FAIL}**ERROR dch04: no type in '+doc['_id']+f'{bcolors.ENDC}\n'
+            report(bcolors.FAIL, '**ERROR dch04: no type in '+doc['_id'])
             continue
           if doc['-type'][0][0]=='x':
             try:
               dirNamePrefix = branch['path'].split(os.sep)[-1].split('_')[0]
               if dirNamePrefix.isdigit() and branch['child']!=int(dirNamePrefix): #compare child-number to start of directory name
-                outstring+= f'{bcolors.FAIL}**ERROR dch05: child-number and dirName dont match '+doc['_id']+f'{bcolors.ENDC}\n'
+                report(bcolors.FAIL, '**ERROR dch05: child-number and dirName dont match '+doc['_id'])
             except:
               pass  #handled next lines
           if branch['path'] is None:
             if doc['-type'][0][0] == 'x':
-              outstring+= f'{bcolors.FAIL}**ERROR dch06: branch path is None '+doc['_id']+f'{bcolors.ENDC}\n'
+              report(bcolors.FAIL, '**ERROR dch06: branch path is None '+doc['_id'])
             elif doc['-type'][0] == 'measurement':
               if verbose:
-                outstring+= f'{bcolors.OKBLUE}**warning measurement branch path is None=no data '+doc['_id']+' '+doc['-name']+f'{bcolors.ENDC}\n'
+                report(bcolors.OKBLUE, '**warning measurement branch path is None=no data '+doc['_id']+' '+doc['-name'])
             else:
               if verbose:
-                outstring+= f'{bcolors.OKGREEN}..info: procedure/sample with empty path '+doc['_id']+f'{bcolors.ENDC}\n'
+                report(bcolors.OKGREEN, '..info: procedure/sample with empty path '+doc['_id'])
           else:                                                            #if sensible path
             if len(branch['stack'])+1 != len(branch['path'].split(os.sep)):#check if length of path and stack coincide
               if verbose:
-                outstring+= f'{bcolors.OKBLUE}**ok-ish branch stack and path lengths not equal: '+doc['_id']+'|'+branch['path']+f'{bcolors.ENDC}\n'
+                report(bcolors.OKBLUE, '**ok-ish branch stack and path lengths not equal: '+doc['_id']+'|'+branch['path'])
             if branch['child'] != 9999:
               for parentID in branch['stack']:                              #check if all parents in doc have a corresponding path
                 parentDoc = self.getDoc(parentID)
                 if not '-branch' in parentDoc:
-                  outstring+= f'{bcolors.FAIL}**ERROR dch07: branch not in parent with id '+parentID+f'{bcolors.ENDC}\n'
+                  report(bcolors.FAIL, '**ERROR dch07: branch not in parent with id '+parentID)
                   continue
                 parentDocBranches = parentDoc['-branch']
                 onePathFound = False
@@ -602,11 +941,11 @@ class Database:
                   if parentBranch['path'] is not None and parentBranch['path'] in branch['path']:
                     onePathFound = True
                 if not onePathFound:
-                  outstring+= f'{bcolors.FAIL}**ERROR dch08: parent does not have corresponding path '+doc['_id']+'| parentID '+parentID+f'{bcolors.ENDC}\n'
+                  report(bcolors.FAIL, '**ERROR dch08: parent does not have corresponding path '+doc['_id']+'| parentID '+parentID)
 
         #every doc should have a name
         if not '-name' in doc:
-          outstring+= f'{bcolors.FAIL}**ERROR dch17: -name not in '+doc['_id']+f'{bcolors.ENDC}\n'
+          report(bcolors.FAIL, '**ERROR dch17: -name not in '+doc['_id'])
           if repair and 'name' in doc:  #repair from v0.9.9->1.0.0
             doc['-name']=doc['name']
             doc.save()
@@ -615,46 +954,45 @@ class Database:
         #doc-type specific tests
         if '-type' in doc and doc['-type'][0] == 'sample':
           if 'qrCode' not in doc:
-            outstring+= f'{bcolors.FAIL}**ERROR dch09: qrCode not in sample '+doc['_id']+f'{bcolors.ENDC}\n'
+            report(bcolors.FAIL, '**ERROR dch09: qrCode not in sample '+doc['_id'])
         elif '-type' in doc and doc['-type'][0] == 'measurement':
           if 'shasum' not in doc:
-            outstring+= f'{bcolors.FAIL}**ERROR dch10: shasum not in measurement '+doc['_id']+f'{bcolors.ENDC}\n'
+            report(bcolors.FAIL, '**ERROR dch10: shasum not in measurement '+doc['_id'])
           if 'image' not in doc:
-            outstring+= f'{bcolors.FAIL}**ERROR dch11: image not in measurement '+doc['_id']+f'{bcolors.ENDC}\n'
+            report(bcolors.FAIL, '**ERROR dch11: image not in measurement '+doc['_id'])
           else:
             if doc['image'].startswith('data:image'):  #for jpg and png
               try:
                 imgdata = base64.b64decode(doc['image'][22:])
                 Image.open(io.BytesIO(imgdata))  #can convert, that is all that needs to be tested
               except:
-                outstring+= f'{bcolors.FAIL}**ERROR dch12: jpg-image not valid '+doc['_id']+f'{bcolors.ENDC}\n'
+                report(bcolors.FAIL, '**ERROR dch12: jpg-image not valid '+doc['_id'])
             elif doc['image'].startswith('<?xml'):
               #from https://stackoverflow.com/questions/63419010/check-if-an-image-file-is-a-valid-svg-file-in-python
               SVG_R = r'(?:<\?xml\b[^>]*>[^<]*)?(?:<!--.*?-->[^<]*)*(?:<svg|<!DOCTYPE svg)\b'
               SVG_RE = re.compile(SVG_R, re.DOTALL)
               if SVG_RE.match(doc['image']) is None:
-                outstring+= f'{bcolors.FAIL}**ERROR dch13: svg-image not valid '+doc['_id']+f'{bcolors.ENDC}\n'
+                report(bcolors.FAIL, '**ERROR dch13: svg-image not valid '+doc['_id'])
             elif doc['image']=='':
-              outstring+= f'{bcolors.OKBLUE}**warning: image not valid '+doc['_id']+' '+doc['image']+f'{bcolors.ENDC}\nRecreate it\n'
+              report(bcolors.OKBLUE, '**warning: image not valid '+doc['_id']+' '+doc['image'], 'Recreate it\n')
             else:
-              outstring+= f'{bcolors.FAIL}**ERROR dch14: image not valid '+doc['_id']+' '+doc['image']+f'{bcolors.ENDC}\n'
+              report(bcolors.FAIL, '**ERROR dch14: image not valid '+doc['_id']+' '+doc['image'])
 
       except: #if test of document fails
-        outstring+= f'{bcolors.FAIL}**ERROR dch15: critical error in '+doc['_id']+f'{bcolors.ENDC}\n'
-        outstring+= traceback.format_exc()
+        report(bcolors.FAIL, '**ERROR dch15: critical error in '+doc['_id'], traceback.format_exc())
 
     ##TEST views
     if verbose:
-      outstring+= f'{bcolors.UNDERLINE}**** List problematic VIEWS ****{bcolors.ENDC}\n'
+      report(bcolors.UNDERLINE, '**** List problematic VIEWS ****')
     view = self.getView('viewIdentify/viewSHAsum')
     shasumKeys = []
     for item in view:
       if item['key']=='':
         if verbose:
-          outstring+= f'{bcolors.OKBLUE}**warning: measurement without shasum: '+item['id']+' '+item['value']+f'{bcolors.ENDC}\n'
+          report(bcolors.OKBLUE, '**warning: measurement without shasum: '+item['id']+' '+item['value'])
       else:
         if item['key'] in shasumKeys:
           key = item['key'] if item['key'] else '-empty-'
-          outstring+= f'{bcolors.FAIL}**ERROR dch16: shasum twice in view: '+key+' '+item['id']+' '+item['value']+f'{bcolors.ENDC}\n'
+          report(bcolors.FAIL, '**ERROR dch16: shasum twice in view: '+key+' '+item['id']+' '+item['value'])
         shasumKeys.append(item['key'])
     return outstring
@@ -0,0 +1,178 @@
+"""Fast change detection of one project (DataLad dataset) for scanTree
+- tracked and untracked files are listed by git: fast with untracked cache and fsmonitor, if configured
+- inode, size and modification time of all files from last scan are stored in the local cache;
+  only files whose stat changed are hashed to decide if they are modified: by git, such that clean
+  filters apply, e.g. of unlocked git-annex files
+- result has the format of AnnexRepo.status for the files that changed; a full status is only needed to verify
+"""
+import os, subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+SCAN_THREADS = min(32, (os.cpu_count() or 1)+4)  #directories that are listed concurrently
+
+class FileIndex:
+  """
+  Persistent index of (path, inode, size, mtime) of one project
+  """
+  def __init__(self, projectPath, databaseName):
+    """
+    Args:
+      projectPath (Path): absolute path of project, which is a DataLad dataset
+      databaseName (string): name of database: name of local cache
+    """
+    from localCache import readCache
+    self.projectPath  = Path(projectPath)
+    self.databaseName = databaseName
+    self.cacheName    = 'files-'+self.projectPath.name
+    self.stats = readCache(databaseName, self.cacheName, str(self.projectPath))  #path: [inode, size, mtime]
+    self.current = {}  #stats found by last status
+    self.scope   = None  #paths inspected by last status, relative to project; None: whole project
+
+
+  def status(self, paths=None):
+    """
+    Changed files: untracked, deleted, modified; clean files are omitted
+
+    Args:
+      paths (list): only inspect these absolute files and directories; None: whole project
+
+    Returns:
+      dict: absolute Path: dict of state, gitshasum, prev_gitshasum; as AnnexRepo.status
+    """
+    from miscTools import generic_hash
+    self.scope = None if paths is None else [Path(i).relative_to(self.projectPath).as_posix() for i in paths]
+    if self.scope is not None and '.' in self.scope:
+      self.scope, paths = None, None
+    pathspec = [] if self.scope is None else self.scope
+    tracked = {}  #path: gitshasum
+    for line in self.git(['ls-files', '-z', '--stage']+pathspec):
+      info, path = line.split('\t', 1)
+      mode, shasum, _ = info.split(' ')
+      if mode!='160000':   #sub-datasets are scanned separately
+        tracked[path] = shasum
+    untracked = self.git(['ls-files', '-z', '--others', '--exclude-standard']+pathspec)
+    self.current = walk(self.projectPath, paths)
+    if self.stats is None:   #first run: stat information of git is used to find candidates
+      candidates = set(self.git(['diff-files', '-z', '--name-only']+pathspec))
+    else:
+      candidates = {path for path, stat in self.current.items() if self.stats.get(path)!=stat}
+    candidates = [path for path in tracked if path in candidates and path in self.current]
+    links = [path for path in candidates if (self.projectPath/path).is_symlink()]  #hash-object follows links; git stores the link
+    files = [path for path in candidates if path not in links]
+    shasums = dict(zip(files, self.hashObjects(files)))
+    shasums.update({path:generic_hash(self.projectPath/path) for path in links})
+    result = {}
+    for path in untracked:
+      result[self.projectPath/path] = {'state':'untracked', 'gitshasum':None, 'prev_gitshasum':None}
+    for path, shasum in tracked.items():
+      if path not in self.current:
+        result[self.projectPath/path] = {'state':'deleted', 'gitshasum':None, 'prev_gitshasum':shasum}
+      elif path in shasums and shasums[path]!=shasum:
+        result[self.projectPath/path] = {'state':'modified', 'gitshasum':shasums[path], 'prev_gitshasum':shasum}
+    return result
+
+
+  def save(self):
+    """
+    Store stats of last status in local cache: changes since then are found in next status
+    """
+    from localCache import writeCache
+    if self.scope is None or self.stats is None:
+      self.stats = dict(self.current)
+    else:   #replace entries inside of scope
+      self.stats = {path:stat for path, stat in self.stats.items()
+                    if not any(path==i or path.startswith(i+'/') for i in self.scope)}
+      self.stats.update(self.current)
+    writeCache(self.databaseName, self.cacheName, self.stats, str(self.projectPath))
+    return
+
+
+  def git(self, arguments):
+    """
+    Run git in project
+
+    Args:
+      arguments (list): arguments of git; output has to be zero-terminated
+
+    Returns:
+      list: entries of output
+    """
+    output = subprocess.run(['git', '-C', str(self.projectPath), '-c', 'core.untrackedCache=true',
+                             '-c', 'core.quotePath=false']+arguments, stdout=subprocess.PIPE, check=True).stdout
+    return [i for i in output.decode('utf-8', 'surrogateescape').split('\0') if i!='']
+
+
+  def hashObjects(self, paths):
+    """
+    Shasum of files as stored by git: with clean filters of their attributes, e.g. git-annex for unlocked files
+
+    Args:
+      paths (list): paths relative to project
+
+    Returns:
+      list: shasums in same order
+    """
+    if not paths:
+      return []
+    output = subprocess.run(['git', '-C', str(self.projectPath), 'hash-object', '--stdin-paths'],
+                            input='\n'.join(paths).encode('utf-8', 'surrogateescape'), stdout=subprocess.PIPE,
+                            check=True).stdout
+    return output.decode().split()
+
+
+def walk(projectPath, paths=None):
+  """
+  List all files below project concurrently; directories of one level at once
+
+  Args:
+    projectPath (Path): absolute path of project
+    paths (list): only these absolute files and directories; None: whole project
+
+  Returns:
+    dict: path relative to project: [inode, size, mtime in ns]; symlinks are not followed
+  """
+  stats, todo = {}, []
+  for path in [projectPath] if paths is None else [Path(i) for i in paths]:
+    if path.is_dir() and not path.is_symlink():
+      todo.append(str(path))
+    elif path.is_symlink() or path.exists():
+      stat = path.lstat()
+      stats[path.relative_to(projectPath).as_posix()] = [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+  prefix = len(str(projectPath))+1
+  with ThreadPoolExecutor(SCAN_THREADS) as pool:
+    while todo:
+      nextLevel = []
+      for files, directories in pool.map(scanDirectory, todo):
+        for path, stat in files:
+          stats[path[prefix:].replace(os.sep, '/')] = stat
+        nextLevel += directories
+      todo = nextLevel
+  return stats
+
+
+def scanDirectory(directory):
+  """
+  Entries of one directory, without .git
+
+  Args:
+    directory (string): absolute path
+
+  Returns:
+    list: files as (path, [inode, size, mtime in ns])
+    list: paths of sub-directories
+  """
+  files, directories = [], []
+  try:
+    with os.scandir(directory) as entries:
+      for entry in entries:
+        if entry.name=='.git':
+          continue
+        if entry.is_dir(follow_symlinks=False):
+          directories.append(entry.path)
+        else:
+          stat = entry.stat(follow_symlinks=False)
+          files.append((entry.path, [stat.st_ino, stat.st_size, stat.st_mtime_ns]))
+  except OSError:   #removed or no permission
+    pass
+  return files, directories
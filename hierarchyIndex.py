@@ -0,0 +1,329 @@
+"""In-memory index of the hierarchy of one project: navigation without database requests
+- built from one pass over the view viewHierarchy/viewHierarchy
+- kept up-to-date by the backend after each write
+- a document in several branches (e.g. measurement in two steps) has one node per branch
+"""
+from bisect import insort
+
+class Node:
+  """
+  Compact record of one document in one branch of the hierarchy
+  """
+  __slots__ = ('docID', 'parent', 'children', 'childNum', 'docType', 'name', 'path')
+
+  def __init__(self, docID, parent, childNum, docType, name, path=None):
+    """
+    Args:
+      docID (string): id of document
+      parent (Node): parent node; None for project
+      childNum (int): position among siblings
+      docType (list): type of document, e.g. ['x1'] or ['measurement','tif']
+      name (string): name of document
+      path (string): path of directory / file in this branch
+    """
+    self.docID    = docID
+    self.parent   = parent
+    self.children = []
+    self.childNum = childNum
+    self.docType  = docType
+    self.name     = name
+    self.path     = path
+
+
+  def __lt__(self, other):
+    """ child-order among siblings """
+    return self.childNum < other.childNum
+
+
+  def __repr__(self):
+    return 'Node('+self.docID+', '+str(self.childNum)+', '+str(self.name)+')'
+
+
+class HierarchyIndex:
+  """
+  Tree of one project: id->node, parent and ordered children
+  """
+  def __init__(self, projectID, rows=()):
+    """
+    Args:
+      projectID (string): id of project
+      rows (list): rows of view viewHierarchy/viewHierarchy of this project
+    """
+    self.projectID = projectID
+    self.root  = None
+    self.nodes = {}   #docID: list of nodes, one per branch
+    self.paths = {}   #path: docID
+    for row in sorted(rows, key=lambda i: i['key'].count(' ')):  #parents before children
+      value = row['value']
+      self.add(row['id'], row['key'].split(' ')[:-1], value[0], value[1], value[2],
+               value[3] if len(value)>3 else None)
+
+
+  @classmethod
+  def fromDatabase(cls, db, projectID):
+    """
+    Build index with one view request
+
+    Args:
+      db (Database): database
+      projectID (string): id of project
+
+    Returns:
+      HierarchyIndex: index
+    """
+    return cls(projectID, db.getView('viewHierarchy/viewHierarchy', startKey=projectID))
+
+
+  def __contains__(self, docID):
+    return docID in self.nodes
+
+
+  def __len__(self):
+    return len(self.nodes)
+
+
+  def __iter__(self):
+    """ nodes depth-first in child-order, starting at project """
+    if self.root is None:
+      return
+    todo = [self.root]
+    while todo:
+      node = todo.pop()
+      yield node
+      todo.extend(reversed(node.children))
+    return
+
+
+  def add(self, docID, stack, childNum, docType, name, path=None):
+    """
+    Add node or update the node of this branch
+
+    Args:
+      docID (string): id of document
+      stack (list): ids of parents, starting with project
+      childNum (int): position among siblings
+      docType (list): type of document
+      name (string): name of document
+      path (string): path of directory / file in this branch
+
+    Returns:
+      Node: node; None if branch is not in this project
+    """
+    if len(stack)==0:
+      if docID!=self.projectID:
+        return None
+      parent = None
+    else:
+      if stack[0]!=self.projectID or stack[-1] not in self.nodes:
+        return None
+      parent = self.nodes[stack[-1]][0]
+    node = next((i for i in self.nodes.get(docID, []) if i.parent is parent), None)
+    if node is None:
+      node = Node(docID, parent, childNum, docType, name, path)
+      self.nodes.setdefault(docID, []).append(node)
+      if parent is None:
+        self.root = node
+      else:
+        insort(parent.children, node)
+    else:
+      if node.path in self.paths:
+        del self.paths[node.path]
+      node.docType, node.name, node.path = docType, name, path
+      if node.childNum!=childNum and parent is not None:
+        parent.children.remove(node)
+        node.childNum = childNum
+        insort(parent.children, node)
+    if path is not None:
+      self.paths[path] = docID
+    return node
+
+
+  def update(self, doc):
+    """
+    Update index after document was written: add, move or remove its nodes
+    - node that moves to new parent keeps its subtree; paths below it are changed accordingly
+
+    Args:
+      doc (dict): document as saved in database, incl. -branch
+    """
+    stacks = [tuple(branch['stack']) for branch in doc['-branch']]
+    nodes  = list(self.nodes.get(doc['_id'], []))
+    moved  = [branch for branch in doc['-branch'] if branch['stack'] not in [self.stack(i) for i in nodes]]
+    for node in nodes:
+      if tuple(self.stack(node)) in stacks:
+        continue
+      branch = next((i for i in moved if i['stack'] and i['stack'][0]==self.projectID and i['stack'][-1] in self.nodes
+                     and node not in self._ancestors(self.nodes[i['stack'][-1]][0])), None)
+      if branch is None or node.parent is None:
+        self._removeNode(node)
+      else:                     #new parent: move node with its subtree
+        moved.remove(branch)
+        self._moveNode(node, self.nodes[branch['stack'][-1]][0], branch['child'], branch['path'])
+    for branch in doc['-branch']:
+      self.add(doc['_id'], branch['stack'], branch['child'], doc['-type'], doc['-name'], branch['path'])
+    return
+
+
+  def remove(self, docID):
+    """
+    Remove document and all documents below it
+
+    Args:
+      docID (string): id of document
+    """
+    for node in list(self.nodes.get(docID, [])):
+      self._removeNode(node)
+    return
+
+
+  def _ancestors(self, node):
+    """
+    Node and its parents up to the project
+
+    Args:
+      node (Node): node
+
+    Returns:
+      list: nodes
+    """
+    nodes = []
+    while node is not None:
+      nodes.append(node)
+      node = node.parent
+    return nodes
+
+
+  def _moveNode(self, node, parent, childNum, path):
+    """
+    Move node and its subtree to new parent
+
+    Args:
+      node (Node): node
+      parent (Node): new parent
+      childNum (int): position among new siblings
+      path (string): new path of node
+    """
+    node.parent.children.remove(node)
+    node.parent, node.childNum = parent, childNum
+    insort(parent.children, node)
+    if node.path is None or path is None or node.path==path:
+      return
+    todo = list(node.children)
+    while todo:
+      child = todo.pop()
+      todo.extend(child.children)
+      if child.path is not None and child.path.startswith(node.path+'/'):
+        if self.paths.get(child.path)==child.docID:
+          del self.paths[child.path]
+        child.path = path+child.path[len(node.path):]
+        self.paths[child.path] = child.docID
+    return
+
+
+  def _removeNode(self, node):
+    """
+    Remove node and its subtree
+
+    Args:
+      node (Node): node
+    """
+    for child in list(node.children):
+      self._removeNode(child)
+    if node.parent is None:
+      self.root = None
+    else:
+      node.parent.children.remove(node)
+    self.nodes[node.docID].remove(node)
+    if not self.nodes[node.docID]:
+      del self.nodes[node.docID]
+    if node.path is not None and self.paths.get(node.path)==node.docID:
+      del self.paths[node.path]
+    return
+
+
+  def node(self, docID):
+    """
+    Node of document; first branch if document is in several branches
+
+    Args:
+      docID (string): id of document
+
+    Returns:
+      Node: node; None if not in index
+    """
+    nodes = self.nodes.get(docID)
+    return nodes[0] if nodes else None
+
+
+  def children(self, docID):
+    """
+    Children of document in child-order
+
+    Args:
+      docID (string): id of document
+
+    Returns:
+      list: nodes; empty if document not in index
+    """
+    node = self.node(docID)
+    return [] if node is None else list(node.children)
+
+
+  def parent(self, docID):
+    """
+    Parent of document
+
+    Args:
+      docID (string): id of document
+
+    Returns:
+      Node: parent; None for project or if not in index
+    """
+    node = self.node(docID)
+    return None if node is None else node.parent
+
+
+  def stack(self, node):
+    """
+    Ids of parents, starting with project
+
+    Args:
+      node (Node, string): node or id of document
+
+    Returns:
+      list: ids of parents
+    """
+    if isinstance(node, str):
+      node = self.node(node)
+    stack = []
+    while node is not None and node.parent is not None:
+      node = node.parent
+      stack.append(node.docID)
+    return stack[::-1]
+
+
+  def childCount(self, docID):
+    """
+    Number of children: child-number of next new child
+
+    Args:
+      docID (string): id of document
+
+    Returns:
+      int: number of children
+    """
+    node = self.node(docID)
+    return 0 if node is None else len(node.children)
+
+
+  def findPath(self, path):
+    """
+    Resolve path on disk to document
+
+    Args:
+      path (string): path relative to base path
+
+    Returns:
+      string: id of document; None if unknown
+    """
+    return self.paths.get(str(path))
@@ -0,0 +1,269 @@
+"""Plan changes of the hierarchy: compare the wanted tree with the current one
+- result is the minimal set of directory renames, new directories and documents, updates and deletions
+- no database or disk access: plans are applied by Pasta.applyPlan
+- paths are relative to the base path, as in '-branch'
+"""
+import re
+from pathlib import Path
+
+def newPlan():
+  """
+  Empty plan
+
+  Returns:
+    dict: renames (list of origin, target; in this order), directories (list of new directories),
+          create (list of new documents), update (dict docID: change as in Database.updateDocs)
+  """
+  return {'renames':[], 'directories':[], 'create':[], 'update':{}}
+
+
+def planEdit(index, docs, details, rootID):
+  """
+  Plan changes from edited org-mode string
+
+  Args:
+    index (HierarchyIndex): current hierarchy of project
+    docs (list): documents of edited string, see commonTools.editString2Docs; first is rootID
+    details (dict): docID: current tags and comment
+    rootID (string): id of node whose subtree was edited
+
+  Returns:
+    dict: plan; None if edited string is not consistent
+  """
+  import commonToolsNative as cT
+  from miscTools import createDirName
+  plan = newPlan()
+  root = index.node(rootID)
+  if root is None or len(docs)==0 or docs[0]['_id']!=rootID:
+    print('**ERROR hpe01: edited string does not start with current node |',rootID)
+    return None
+  moved = {}                                            #origin: target of renamed directories
+  stacks, paths = {rootID:index.stack(root)}, {}        #new stack and path of nodes
+  done  = set()                                         #nodes that are in edited string
+  parents, counts = [], []                              #open parents and number of their children
+  baseLevel, skipLevel = docs[0]['-type'], None
+  for doc in docs:
+    level = doc['-type']-baseLevel
+    if skipLevel is not None and level>skipLevel:       #below deleted or unknown document
+      continue
+    skipLevel = None
+    if level>len(parents) or (level==0 and parents):
+      print('**ERROR hpe02: wrong level in edited string |',doc['-name'])
+      return None
+    del parents[level:], counts[level:]
+    docID = doc['_id'] if doc['_id'] not in ('', 'undefined') else None
+    node  = None if docID is None else \
+            next((i for i in index.nodes.get(docID, []) if i.parent is not None and parents and
+                  i.parent.docID==parents[-1]), index.node(docID))   #branch below same parent
+    if docID is not None and node is None:
+      print('**Warning hpe03: document not in hierarchy; skip it and its children |',docID)
+      skipLevel = level
+      continue
+    if doc['edit']=='-delete-':
+      planDelete(index, docID, plan, moved)
+      skipLevel = level
+      continue
+    ## position in new tree
+    if level==0:
+      childNum, stack = root.childNum, stacks[rootID]
+      parentPath = None if root.path is None else Path(root.path).parent
+    else:
+      childNum, stack = counts[-1], stacks[parents[-1]]+[parents[-1]]
+      counts[-1] += 1
+      parentPath = paths.get(parents[-1])
+    docType = 'x'+str(doc['-type'])
+    if node is not None and node.docType[0][0]!='x':  #e.g. measurement: keep type and file
+      docType, path = node.docType, None if node.path is None else resolve(node.path, moved)
+    elif parentPath is None or level==0 and (docType=='x0' or doc['-name']==node.name):
+      path = None if node is None else node.path      #project directory is not renamed
+    else:
+      path = str(Path(parentPath)/createDirName(doc['-name'], docType, childNum))
+    ## edited fields, normalized as when saved
+    fields = {'-name':doc['-name'], 'tags':re.findall(r'#\S+', doc['tags'] or ''), 'comment':doc['comment'] or '',
+              '-type':docType if isinstance(docType, list) else [docType]}
+    if 'objective' in doc:
+      fields['objective'] = doc['objective']
+    fields = cT.fillDocBeforeCreate(fields, fields['-type'])
+    for item in ('_id', '-date', '-branch', 'image', 'shasum', 'qrCode'):  #only defaults of fillDocBeforeCreate
+      fields.pop(item, None)
+    if node is None:                                   #new document
+      fields['-branch'] = [{'stack':stack, 'child':childNum, 'path':path}]
+      fields = cT.fillDocBeforeCreate(fields, docType)
+      docID = fields['_id']
+      plan['create'].append(fields)
+      if path is not None:
+        plan['directories'].append(path)
+    else:
+      current = details.get(docID, {})
+      change = {key:value for key, value in fields.items() if key not in ('-name', 'tags', 'comment', '-type')}
+      if fields['-name']!=node.name:
+        change['-name'] = fields['-name']
+      if sorted(fields['tags'])!=sorted(current.get('tags') or []):
+        change['tags'] = fields['tags']
+      if current.get('comment') is not None and fields['comment']!=current['comment']:
+        change['comment'] = fields['comment']
+      if fields['-type']!=node.docType:
+        change['-type'] = fields['-type']
+      if node.docType[0][0]=='x' and node.path is not None and path is not None:
+        origin = resolve(node.path, moved)
+        if origin!=path:
+          plan['renames'].append((origin, path))
+          moved[node.path] = path
+      branch = {'stack':stack, 'child':childNum, 'path':path}
+      if (index.stack(node), node.childNum, node.path)!=(stack, childNum, path):
+        change['-branch'] = [[index.stack(node), node.path, branch]]
+      if change:
+        plan['update'][docID] = change
+    if node is not None:
+      done.add(node)
+    stacks[docID], paths[docID] = stack, path
+    parents.append(docID)
+    counts.append(0)
+  planFollow(index, root, stacks, done, moved, plan)
+  return plan
+
+
+def planDelete(index, docID, plan, moved):
+  """
+  Plan deletion of document and all documents below: move directory to trash_...
+
+  Args:
+    index (HierarchyIndex): current hierarchy of project
+    docID (string): id of document
+    plan (dict): plan that is extended
+    moved (dict): origin: target of renamed directories; is extended
+  """
+  node = index.node(docID)
+  todo = [node]
+  while todo:
+    item = todo.pop()
+    plan['update'][item.docID] = {'edit':'-delete-'}
+    todo.extend(item.children)
+  if node.path is not None and node.docType[0][0]=='x':
+    origin = resolve(node.path, moved)
+    target = str(Path(origin).parent/('trash_'+'_'.join(Path(origin).name.split('_')[1:])))
+    plan['renames'].append((origin, target))
+    moved[node.path] = target
+  return
+
+
+def planFollow(index, root, stacks, done, moved, plan):
+  """
+  Plan updates of documents that are not in the wanted tree themselves, but whose parents moved
+  - e.g. measurements in directory of renamed step: new stack and path
+
+  Args:
+    index (HierarchyIndex): current hierarchy of project
+    root (Node): root of subtree that changed
+    stacks (dict): docID: new stack of documents that are planned; is extended
+    done (set): nodes that are planned already
+    moved (dict): origin: target of renamed directories
+    plan (dict): plan that is extended
+  """
+  todo = [root]
+  while todo:
+    node = todo.pop()
+    todo.extend(node.children)
+    if node in done or node.parent is None or node.parent.docID not in stacks or \
+       plan['update'].get(node.docID, {}).get('edit')=='-delete-':
+      continue
+    stack = stacks[node.parent.docID]+[node.parent.docID]
+    path  = None if node.path is None else resolve(node.path, moved)
+    if node.docType[0][0]=='x':
+      stacks[node.docID] = stack
+    if (index.stack(node), node.path)!=(stack, path):
+      change = plan['update'].setdefault(node.docID, {})
+      change.setdefault('-branch', []).append([index.stack(node), node.path,
+                                               {'stack':stack, 'child':node.childNum, 'path':path}])
+  return
+
+
+def resolve(path, moved):
+  """
+  Current location of path after directories were renamed
+
+  Args:
+    path (string): original path
+    moved (dict): origin: target of renamed directories
+
+  Returns:
+    string: current path
+  """
+  parts = Path(path).parts
+  for idx in range(len(parts), 0, -1):
+    prefix = str(Path(*parts[:idx]))
+    if prefix in moved:
+      return str(Path(moved[prefix], *parts[idx:]))
+  return path
+
+
+def planMoveSubtree(index, docID, parentID, position=None):
+  """
+  Plan move of project, step or task with everything below it to new parent
+
+  Args:
+    index (HierarchyIndex): current hierarchy of project
+    docID (string): id of document that is moved
+    parentID (string): id of new parent; project, step or task in same project
+    position (int): position among projects, steps, tasks of new parent; None: at end
+
+  Returns:
+    dict: plan; None if move is not possible
+  """
+  node, parent = index.node(docID), index.node(parentID)
+  if node is None or parent is None or node.parent is None or node.docType[0][0]!='x' or \
+     parent.docType[0][0]!='x':
+    print('**ERROR hpm01: only steps and tasks can be moved to project, step or task of open project |',
+          docID, parentID)
+    return None
+  if docID==parentID or docID in index.stack(parent):
+    print('**ERROR hpm02: cannot move document below itself |',docID)
+    return None
+  def children(item):
+    result = [i for i in item.children if i is not node and i.docType[0][0]=='x']
+    if item is parent:
+      result.insert(len(result) if position is None else position, node)
+    return result
+  return planEdit(index, treeDocs(index, children), {}, index.root.docID)
+
+
+def planDeleteSubtree(index, docID):
+  """
+  Plan deletion of project, step or task with everything below it; following siblings move up
+
+  Args:
+    index (HierarchyIndex): current hierarchy of project
+    docID (string): id of document that is deleted
+
+  Returns:
+    dict: plan; None if deletion is not possible
+  """
+  node = index.node(docID)
+  if node is None or node.parent is None or node.docType[0][0]!='x':
+    print('**ERROR hpd01: only steps and tasks of open project can be deleted |',docID)
+    return None
+  return planEdit(index, treeDocs(index, lambda item: [i for i in item.children if i.docType[0][0]=='x'],
+                                  deleted=docID), {}, index.root.docID)
+
+
+def treeDocs(index, children, deleted=None):
+  """
+  Documents of wanted tree, as from edited string, see planEdit: only names, ids and levels
+  - tags and comments are not given and therefore not changed
+
+  Args:
+    index (HierarchyIndex): current hierarchy of project
+    children (function): node -> list of its children in wanted tree
+    deleted (string): id of document that is marked as deleted
+
+  Returns:
+    list: documents in depth-first order
+  """
+  docs = []
+  todo = [(index.root, 0)]
+  while todo:
+    node, level = todo.pop()
+    docs.append({'-name':node.name, 'tags':None, 'comment':None, '_id':node.docID, '-type':level,
+                 'edit':'-delete-' if node.docID==deleted else '-edit-'})
+    todo.extend((i, level+1) for i in reversed(children(node)))
+  return docs
@@ -158,38 +158,10 @@ def exportELN(backend, docID):
     graph = []
 
     #1 ------- write JSON files -------------------
-    listDocs = backend.db.getView('viewHierarchy/viewHierarchy', startKey=docID)
-    #create tree of hierarchical data
-    treedata = {}
-
-    def listChildren(idString, level):
-      """
-      List all children
-
-      Args:
-        idString (string): id of this part
-        level (int): hierarchical level starting from 0
-
-      Returns:
-        list: list of children ids
-      """
-      items = [i for i in listDocs if len(i['key'].split(' '))==level]
-      if idString is not None:
-        items = [i for i in items if i['key'].startswith(idString)]
-      #sort by child
-      keys = [i['key'] for i in items]
-      childNums = [i['value'][0] for i in items]
-      items = [x for _, x in sorted(zip(childNums, keys))]
-      #create sub-children
-      for item in items:
-        children = listChildren(item,level+1)
-        treedata[item.split(' ')[-1]] = children
-        if level == 1:
-          treedata['__masterID__'] = item
-      return [i.split(' ')[-1] for i in items]
-
-    listChildren(idString=None, level=1)
-    masterID = treedata.pop('__masterID__')
+    index = backend.hierarchyIndex(docID)
+    #create tree of hierarchical data: children in child-order
+    treedata = {node.docID:[child.docID for child in node.children] for node in index}
+    masterID = docID
     # print(treedata)
     for doc in treedata:
       doc = backend.db.getDoc(doc)
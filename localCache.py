@@ -0,0 +1,314 @@
+"""Local cache on disk: avoid fetching and recomputing data that did not change
+- one directory per database, e.g. ~/.cache/pastaELN/<database>
+- each entry is stored with a key, e.g. the revision of the document it is derived from;
+  if the key does not match, the entry is outdated
+"""
+import os, json, hashlib
+from pathlib import Path
+
+CACHE_DIRECTORY = Path(os.environ.get('XDG_CACHE_HOME', Path.home()/'.cache'))/'pastaELN'
+MAX_VIEW_CACHE_BYTES = 64*1024**2   #max. size of cached view responses per database
+JSON_PARAMETERS = ['key', 'keys', 'startkey', 'endkey']  #view query parameters that CouchDB expects json-encoded
+
+
+def cacheDirectory(databaseName):
+  """
+  Directory of cache of this database; create if it does not exist
+
+  Args:
+    databaseName (string): name of database
+
+  Returns:
+    Path: directory
+  """
+  path = CACHE_DIRECTORY/databaseName
+  path.mkdir(parents=True, exist_ok=True)
+  return path
+
+
+def readCache(databaseName, name, key=None):
+  """
+  Read entry from cache
+
+  Args:
+    databaseName (string): name of database
+    name (string): name of entry
+    key (string): key that the entry has to match, e.g. revision
+
+  Returns:
+    any: data of entry; None if entry does not exist, is outdated or broken
+  """
+  try:
+    with open(cacheDirectory(databaseName)/(name+'.json'), 'r', encoding='utf-8') as fIn:
+      content = json.load(fIn)
+  except (OSError, ValueError):
+    return None
+  if not isinstance(content, dict) or content.get('key')!=key:
+    return None
+  return content.get('data')
+
+
+def writeCache(databaseName, name, data, key=None):
+  """
+  Write entry to cache; atomic such that concurrent processes never read half-written entries
+
+  Args:
+    databaseName (string): name of database
+    name (string): name of entry
+    data (any): json-serializable data
+    key (string): key that the entry has to match, e.g. revision
+  """
+  path = cacheDirectory(databaseName)/(name+'.json')
+  tempPath = path.with_suffix('.'+str(os.getpid())+'.tmp')
+  try:
+    with open(tempPath, 'w', encoding='utf-8') as fOut:
+      json.dump({'key':key, 'data':data}, fOut)
+    os.replace(tempPath, path)
+  except (OSError, TypeError, ValueError):
+    print('**Warning: could not write cache entry '+name)
+    if tempPath.exists():
+      tempPath.unlink()
+  return
+
+
+def hashKey(*items):
+  """
+  Key from json-serializable items, e.g. a revision and a configuration
+
+  Args:
+    items (list): items
+
+  Returns:
+    string: key
+  """
+  return hashlib.sha1(json.dumps(items, sort_keys=True).encode()).hexdigest()
+
+
+class ViewCache:
+  """
+  Cache of view responses on disk, validated by ETag
+  - request sends If-None-Match; on 304 (not modified) the stored rows are used
+  - least recently used entries are removed if the cache exceeds maxBytes
+  """
+  def __init__(self, databaseName, maxBytes=MAX_VIEW_CACHE_BYTES):
+    """
+    Args:
+      databaseName (string): name of database
+      maxBytes (int): max. size of all entries on disk
+    """
+    self.directory = cacheDirectory(databaseName)/'views'
+    self.directory.mkdir(exist_ok=True)
+    self.maxBytes  = maxBytes
+    self.hits, self.misses, self.bytesSaved = 0, 0, 0
+
+
+  def get(self, session, url, query):
+    """
+    Get rows of view from cache or server
+
+    Args:
+      session (requests.Session): session to server, incl. authentication
+      url (string): url of view
+      query (dict): query parameters; keys are json-encoded, others are sent raw, e.g. update=lazy
+
+    Returns:
+      list: rows of view
+
+    Raises:
+      HTTPError: server reports error
+    """
+    params = queryString(query)
+    path   = self.directory/(hashKey(url, params)+'.json')
+    try:
+      with open(path, 'r', encoding='utf-8') as fIn:
+        content = fIn.read()
+      cached = json.loads(content)
+      os.utime(path)   #mark as recently used
+    except (OSError, ValueError):
+      cached = None
+    headers = {} if cached is None else {'If-None-Match':cached['etag']}
+    response = session.get(url, params=params, headers=headers)
+    if response.status_code==304 and cached is not None:
+      self.hits += 1
+      self.bytesSaved += len(content)
+      return cached['rows']
+    response.raise_for_status()
+    self.misses += 1
+    rows = response.json()['rows']
+    if 'ETag' in response.headers:
+      tempPath = path.with_suffix('.'+str(os.getpid())+'.tmp')
+      with open(tempPath, 'w', encoding='utf-8') as fOut:
+        json.dump({'etag':response.headers['ETag'], 'rows':rows}, fOut)
+      os.replace(tempPath, path)
+      self.evict()
+    return rows
+
+
+  def evict(self):
+    """
+    Remove least recently used entries until the cache is smaller than maxBytes
+    """
+    entries = []
+    for path in self.directory.glob('*.json'):
+      try:
+        stat = path.stat()
+      except OSError:  #removed by other process
+        continue
+      entries.append((stat.st_mtime, stat.st_size, path))
+    totalBytes = sum(i[1] for i in entries)
+    for _, size, path in sorted(entries):
+      if totalBytes<=self.maxBytes:
+        break
+      path.unlink(missing_ok=True)
+      totalBytes -= size
+    return
+
+
+  def statistics(self):
+    """
+    Counters of this session
+
+    Returns:
+      dict: hits, misses, bytes saved
+    """
+    return {'hits':self.hits, 'misses':self.misses, 'bytes saved':self.bytesSaved}
+
+
+def queryString(query):
+  """
+  Parameters of view request as sent to CouchDB
+  - keys are json: strings are quoted, arrays allowed
+  - all others are raw: update=lazy, startkey_docid=x-..., limit=10; booleans are true, false
+
+  Args:
+    query (dict): query parameters
+
+  Returns:
+    dict: parameter: string
+  """
+  params = {}
+  for key, value in query.items():
+    if key in JSON_PARAMETERS or isinstance(value, bool):
+      params[key] = json.dumps(value)
+    else:
+      params[key] = str(value)
+  return params
+
+
+class ScanJournal:
+  """
+  Journal of the progress of a scan on disk: an interrupted scan is resumed without repeating work
+  - one json line per file and step: hashed, saved (extracted and stored in database)
+  - an entry is valid as long as its file did not change (size, modification time)
+  - entries of a scan are removed once it is committed to DataLad; other entries remain, e.g. of an
+    interrupted full scan during a scoped scan
+  """
+  STAGES = ['hashed', 'saved']
+
+  def __init__(self, databaseName, name):
+    """
+    Args:
+      databaseName (string): name of database
+      name (string): name of journal, e.g. scan-<project directory>
+    """
+    self.path    = cacheDirectory(databaseName)/(name+'.journal')
+    self.entries = {}   #path: last entry
+    try:
+      with open(self.path, 'r', encoding='utf-8') as fIn:
+        for line in fIn:
+          try:
+            entry = json.loads(line)
+          except ValueError:   #last line of interrupted write
+            continue
+          self.entries[entry['path']] = entry
+    except OSError:
+      pass
+    if self.entries:
+      print('Resume interrupted scan: '+str(len(self.entries))+' files done')
+    self.fOut = None
+
+
+  def get(self, path, stage):
+    """
+    Entry of file if it reached this stage and did not change since
+
+    Args:
+      path (Path): absolute path of file
+      stage (string): hashed, saved
+
+    Returns:
+      dict: entry incl. data of record; None if not reached
+    """
+    entry = self.entries.get(str(path))
+    if entry is None or self.STAGES.index(entry['stage'])<self.STAGES.index(stage) or \
+       entry['stat']!=fileStat(path):
+      return None
+    return entry
+
+
+  def record(self, path, stage, stat=None, **data):
+    """
+    Record that file reached stage; written immediately
+
+    Args:
+      path (Path): absolute path of file
+      stage (string): hashed, saved
+      stat (list): size and modification time when work on file started, see fileStat; None: now
+      data (dict): json-serializable data to resume from, e.g. shasum
+    """
+    entry = dict(data, path=str(path), stage=stage, stat=fileStat(path) if stat is None else stat)
+    self.entries[str(path)] = entry
+    if self.fOut is None:
+      self.fOut = open(self.path, 'a', encoding='utf-8')  # pylint: disable=consider-using-with
+    self.fOut.write(json.dumps(entry)+'\n')
+    self.fOut.flush()
+    return
+
+
+  def close(self):
+    """
+    Close journal file; entries remain for the next scan
+    """
+    if self.fOut is not None:
+      self.fOut.close()
+      self.fOut = None
+    return
+
+
+  def clear(self, paths=None):
+    """
+    Remove entries of committed scan
+
+    Args:
+      paths (list): scope of scan: absolute files and directories; None: all, journal is removed
+    """
+    self.close()
+    if paths is None:
+      self.path.unlink(missing_ok=True)
+      self.entries = {}
+      return
+    scope = [str(i) for i in paths]
+    self.entries = {path:entry for path, entry in self.entries.items()
+                    if not any(path==i or path.startswith(i+os.sep) for i in scope)}
+    tempPath = self.path.with_suffix('.'+str(os.getpid())+'.tmp')
+    with open(tempPath, 'w', encoding='utf-8') as fOut:
+      fOut.write(''.join(json.dumps(entry)+'\n' for entry in self.entries.values()))
+    os.replace(tempPath, self.path)
+    return
+
+
+def fileStat(path):
+  """
+  Size and modification time of file: changes if file is written
+
+  Args:
+    path (Path): path of file
+
+  Returns:
+    list: size, modification time in ns; None if file does not exist
+  """
+  try:
+    stat = os.stat(path, follow_symlinks=False)
+  except OSError:
+    return None
+  return [stat.st_size, stat.st_mtime_ns]
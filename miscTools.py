@@ -28,7 +28,7 @@ def createDirName(name,docType,thisChildNumber):
   Returns:
     string: directory name with leading number
   """
-  from commonTools import commonTools as cT  #not globally imported since confuses translation
+  import commonToolsNative as cT
   if docType == 'x0':
     return cT.camelCase(name)
   #steps, tasks
@@ -38,7 +38,7 @@ def createDirName(name,docType,thisChildNumber):
 
 
 
-def generic_hash(path, forceFile=False):
+def generic_hash(path, forceFile=False, consumer=None):
   """
   Hash an object based on its mode.
 
@@ -52,6 +52,7 @@ def generic_hash(path, forceFile=False):
   Args:
     path (string): path
     forceFile (bool): force to get shasum of file and not of link (False for gitshasum)
+    consumer (function): called with every chunk of file content, e.g. streaming extractor
 
   Returns:
     string: shasum
@@ -64,7 +65,7 @@ def generic_hash(path, forceFile=False):
     with request.urlopen(str(path).replace(':/','://')) as site:
       meta = site.headers
       size = int(meta.get_all('Content-Length')[0])
-      return blob_hash(site, size)
+      return blob_hash(site, size, consumer)
   if path.is_dir():
     raise ValueError('This seems to be a directory '+path)
   if forceFile and path.is_symlink():
@@ -73,7 +74,7 @@ def generic_hash(path, forceFile=False):
     shasum = symlink_hash(path)
   elif path.is_file():  #Local file
     with open(path, 'rb') as stream:
-      shasum = blob_hash(stream, path.stat().st_size)
+      shasum = blob_hash(stream, path.stat().st_size, consumer)
   return shasum
 
 
@@ -98,13 +99,97 @@ def upIn(key):
   key (bool): key
   """
   import keyring as cred
-  from commonTools import commonTools as cT  # don't import globally since it disturbs translation
+  import commonToolsNative as cT
   key = 'bcA:Maw'.join(key.split(':'))
   id_  = cT.uuidv4()
   cred.set_password('pastaDB',id_,key)
   return id_
 
 
+def linkContent(origin, target):
+  """
+  Make content of file available at second place without copying, if filesystem allows
+  - hardlink; reflink (copy-on-write); copy as last resort
+
+  Args:
+    origin (Path): existing file
+    target (Path): new file; its directory must exist
+
+  Returns:
+    string: method used: hardlink, reflink, copy
+  """
+  import os, sys, shutil, subprocess
+  try:
+    os.link(origin, target)
+    return 'hardlink'
+  except OSError:   #other device, or filesystem without hardlinks
+    pass
+  if sys.platform.startswith('linux'):
+    result = subprocess.run(['cp','--reflink=always',str(origin),str(target)], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, check=False)
+    if result.returncode==0:
+      return 'reflink'
+  shutil.copy2(origin, target)
+  return 'copy'
+
+
+def renameDirectories(basePath, renames):
+  """
+  Rename directories in two phases: origin -> temporary name, then temporary name -> target
+  - names can shift and swap, e.g. 000_StepA -> 001_StepA and 001_StepA -> 002_StepA
+  - all targets are checked before the disk is touched; if a rename fails, the done ones are undone
+
+  Args:
+    basePath (Path): root of directory tree
+    renames (list): (origin, target) relative to basePath; paths are given after the renames of their parent
+      directories, as in plans of hierarchyPlan
+
+  Returns:
+    bool: success
+  """
+  import os
+  from pathlib import Path
+  from hierarchyPlan import resolve
+  def locate(path, moved):  #location of path if parent directories are moved
+    return str(Path(resolve(str(Path(path).parent), moved))/Path(path).name)
+  ## where origins are now, what is at the targets after all renames
+  todo, moved, origins, occupants = [], {}, [], []
+  for origin, target in renames:
+    if not (basePath/locate(origin, moved)).is_dir():
+      print('**Warning mrd01: directory to move does not exist |',origin)
+      continue
+    todo.append((origin, target))
+    origins.append(locate(origin, moved))
+    occupants.append(locate(target, moved))
+    moved[target] = origins[-1]
+  targets = [i[1] for i in todo]
+  for target, occupant in zip(targets, occupants):
+    vacated = any(Path(occupant)==Path(i) or Path(i) in Path(occupant).parents for i in origins)
+    if targets.count(target)>1 or (os.path.lexists(basePath/occupant) and not vacated):
+      print('**ERROR mrd02: target directory exists already |',target)
+      return False
+  ## rename
+  done, temps, current, placed = [], [], {}, {}
+  try:
+    for idx, (origin, target) in enumerate(todo):
+      source = locate(origin, current)
+      temps.append(str(Path(source).parent/('.rename'+str(idx)+'_'+Path(source).name)))
+      os.rename(basePath/source, basePath/temps[-1])
+      done.append((source, temps[-1]))
+      current[target] = temps[-1]
+    for idx, (_, target) in enumerate(todo):
+      source = resolve(temps[idx], placed)
+      os.rename(basePath/source, basePath/target)
+      done.append((source, target))
+      placed[temps[idx]] = target
+  except OSError as error:
+    print('**ERROR mrd03: renaming directories failed; undo renames |',error)
+    for source, target in reversed(done):
+      os.rename(basePath/target, basePath/source)
+    return False
+  return True
+
+
 def symlink_hash(path):
   """
   Return (as hash instance) the hash of a symlink.
@@ -121,12 +206,12 @@ def symlink_hash(path):
   from hashlib import sha1
   hasher = sha1()
   data = os.readlink(path).encode('utf8', 'surrogateescape')
-  hasher.update('blob {len(data)}\0'.encode('ascii'))
+  hasher.update(f'blob {len(data)}\0'.encode('ascii'))
   hasher.update(data)
   return hasher.hexdigest()
 
 
-def blob_hash(stream, size):
+def blob_hash(stream, size, consumer=None):
   """
   Return (as hash instance) the hash of a blob,
   as read from the given stream.
@@ -134,6 +219,7 @@ def blob_hash(stream, size):
   Args:
     stream (string): content to be hashed
     size (int): size of the content
+    consumer (function): called with every chunk of content
 
   Returns:
     string: shasum
@@ -151,6 +237,8 @@ def blob_hash(stream, size):
       break
     nRead += len(data)
     hasher.update(data)
+    if consumer is not None:
+      consumer(data)
   if nRead != size:
     raise ValueError(f'{stream.name}: expected {size} bytes, found {nRead} bytes')
   return hasher.hexdigest()
@@ -196,7 +284,7 @@ def getExtractorConfig(directory):
   import os
   configuration = {}
   for fileName in os.listdir(directory):
-    if fileName.endswith('.py') and fileName!='testExtractor.py':
+    if fileName.startswith('extractor_') and fileName.endswith('.py'):  #skip helpers, e.g. plotTools
       #start with file
       with open(directory+os.sep+fileName,'r', encoding='utf-8') as fIn:
         lines = fIn.readlines()
@@ -240,7 +328,7 @@ def createQRcodeSheet(fileName="../qrCodes.pdf"):
   import qrcode
   import numpy as np
   from PIL import Image
-  from commonTools import commonTools as cT  # don't import globally since it disturbs translation
+  import commonToolsNative as cT
   img = qrcode.make(cT.uuidv4(),
                     error_correction=qrcode.constants.ERROR_CORRECT_M)
   size = img.size[0]
@@ -284,7 +372,7 @@ def printQRcodeSticker(codes={},
   import qrcode, tempfile, os
   import numpy as np
   from PIL import Image, ImageDraw, ImageFont
-  from commonTools import commonTools as cT  # don't import globally since it disturbs translation
+  import commonToolsNative as cT
   fnt = ImageFont.truetype("arial.ttf", page['font'])
   offset    = int((page['size'][0]+page['margin'])/page['tiles'])
   qrCodeSize= min(offset-page['font']-page['margin'], page['size'][1])
@@ -405,6 +493,7 @@ def translateJS2PY():
   """
   Translate js-code to python-code using js2py lib
   - remove the last export-lines from commonTools.js
+  - backend uses commonToolsNative.py: adopt changes there and verify with Tests/testCommonTools.py
   """
   import re, io
   from pathlib import Path
@@ -4,28 +4,32 @@
 Called by user or react-electron frontend. Keep it simple: only functions that
 are required by frontend. Otherwise, make only temporary changes
 """
-import json, sys, argparse, traceback
-from pathlib import Path
-from subprocess import run, PIPE, STDOUT
-import urllib.request
-from backend import Pasta
-from miscTools import upOut, upIn, getExtractorConfig, printQRcodeSticker, checkConfiguration
-from inputOutput import importELN, exportELN
+import json, sys, argparse, traceback, time
+IMPORT_START = time.perf_counter()   #startup profile: import of modules of command-line tool
+from pathlib import Path  # pylint: disable=wrong-import-position
+from backend import Pasta  # pylint: disable=wrong-import-position
+from miscTools import upOut, upIn, getExtractorConfig, printQRcodeSticker, checkConfiguration  # pylint: disable=wrong-import-position
+IMPORT_DURATION = time.perf_counter()-IMPORT_START
 
 SOFTWARE_VERSION = "v1.2.2"
+STARTUP_BUDGET   = 0.3   #sec: max. time for importing this module, see Tests/testStartup.py
+HEAVY_MODULES    = ['cloudant', 'datalad', 'numpy', 'pandas', 'PIL', 'matplotlib', 'requests', 'keyring',
+                    'cryptography', 'js2py']  #only import if command requires them
 
-def commands(getDocu, args):
+def commands(getDocu, args, be=None):
   """
   Main function
 
   Args:
     getDocu (bool): True=return documentation string; False=use arguments
     args (argparse.Namespace): arguments supplied by user / frontend
+    be (Pasta): backend that is kept alive by serve; if None, start and exit backend
 
   Returns:
     string: documentation or empty string
   """
   doc = ''
+  ownBackend = be is None
   success = ''  #success ''=undecided; '-1'=False; '1'=True
   pathConfig = Path.home()/'.pastaELN.json'
 
@@ -145,6 +149,7 @@ def commands(getDocu, args):
       if 'ERROR' in output:
         return ''
       # local and remote server test
+      import urllib.request
       urls = ['http://127.0.0.1:5984']
       if config['links'][args.database]['remote']!={}:
         urls.append(config['links'][args.database]['remote']['url'])
@@ -160,13 +165,20 @@ def commands(getDocu, args):
             raise NameError('**ERROR pma01a: Wrong local server.') from None
 
     #open backend
-    if not getDocu:
+    if not getDocu and ownBackend:
       try:
+        startTime = time.perf_counter()
         be = Pasta(linkDefault=args.database, initViews=initViews, initConfig=initConfig,
                   resetOntology=resetOntology)
       except:
         print('**ERROR pma20: backend could not be started.\n'+traceback.format_exc()+'\n\n')
         return ''
+      if args.profile:
+        print('Startup profile [sec]')
+        print(f'  {"import of modules": <35}{IMPORT_DURATION:7.3f}')
+        for label, duration in be.timings.items():
+          print(f'  {label: <35}{duration:7.3f}')
+        print(f'  {"total backend start": <35}{time.perf_counter()-startTime:7.3f}')
 
     if not getDocu and args.command.startswith('test') and be:
       #PART 2 of test: main test
@@ -188,12 +200,26 @@ def commands(getDocu, args):
       print('software version: '+SOFTWARE_VERSION)
       return '1'
 
+    if getDocu:
+      doc += '  serve: keep backend alive and answer JSON-RPC requests: one per line on stdin/stdout\n'
+      doc += '    request: {"jsonrpc":"2.0", "id":1, "method":"hierarchy", "params":{"docID":"x-123"}}\n'
+      doc += '    content is optional: file with one request per line that is processed as batch\n'
+      doc += '    example: pastaELN.py serve -d instruments\n'
+      doc += '    example: pastaELN.py serve -d instruments -c batch.jsonl\n'
+    elif args.command=='serve' and ownBackend:
+      serve(be, args)
+      be.exit()
+      return '1'
+
     if getDocu:
       doc += '  verifyDB: test PASTA database\n'
       doc += '    example: pastaELN.py verifyDB\n'
       doc += '    example: pastaELN.py verifyDBdev (repair function)\n'
     elif args.command.startswith('verifyDB'):
       repair = args.command=='verifyDBdev'
+      if args.format=='ndjson':
+        be.checkDB(verbose=False, repair=repair, stream=lambda record: print(json.dumps(record), flush=True))
+        return '1'
       output = be.checkDB(verbose=False, repair=repair)
       print(output)
       return '1'
@@ -205,16 +231,48 @@ def commands(getDocu, args):
       success = be.replicateDB()
       return '1' if success else '-1'
     elif args.command=='syncRL':
-      be.exit()
+      if ownBackend:
+        be.exit()
       print('**ERROR pma03: syncRL not implemented yet')
       return '-1'
 
+    if getDocu:
+      doc += '  watch: ingest new and changed files of all projects continuously, once writing finished\n'
+      doc += '    example: pastaELN.py watch\n'
+    elif args.command=='watch':
+      be.watch()
+      return '1'
+
+    if getDocu:
+      doc += '  scanAll: scan all projects concurrently; --workers limits number of projects at once\n'
+      doc += '    example: pastaELN.py scanAll --workers 8\n'
+      doc += '    example: pastaELN.py scanAll -c "x-1234567890abc x-abc1234567890" --format ndjson\n'
+    elif args.command=='scanAll':
+      results = be.scanAll(args.content.split() if args.content else None, args.workers)
+      if args.format=='ndjson':
+        printNDJSON([results])
+      else:
+        for result in results:
+          if not result['success']:
+            print(result['output']+result['error'])
+      return '1' if all(i['success'] for i in results) else '-1'
+
     if getDocu:
       doc += '  print: print overview\n'
       doc += "    label: possible docLabels 'Projects', 'Samples', 'Measurements', 'Procedures'\n"
+      doc += "    paging: --limit rows per page, --offset rows to skip, --token continue after previous page\n"
+      doc += "    sorting and filtering: --sort column, --descending, --filter column=value (value* for prefix)\n"
       doc += "    example: pastaELN.py print -d instruments -l instrument\n"
+      doc += "    example: pastaELN.py print -l sample --sort=-name --limit 20 --filter chemistry=Fe*\n"
+      doc += "    example: pastaELN.py print -l sample --format ndjson\n"
     elif args.command=='print':
-      print(be.output(args.label,True))
+      filters = dict(i.split('=',1) for i in args.filter) if args.filter else None
+      if args.format=='ndjson':
+        printNDJSON(be.iterTable(args.label, sortBy=args.sort, descending=args.descending, limit=args.limit,
+                                 offset=args.offset, token=args.token, filters=filters))
+        return '1'
+      print(be.output(args.label, True, sortBy=args.sort, descending=args.descending, limit=args.limit,
+                      offset=args.offset, token=args.token, filters=filters))
       return '1'
 
     if getDocu:
@@ -237,6 +295,7 @@ def commands(getDocu, args):
       doc += '    example: pastaELN.py saveBackup -d instruments\n'
       doc += '    example: pastaELN.py saveBackup -i x-76b0995cf655bcd487ccbdd8f9c68e1b\n'
     elif args.command=='saveBackup':   #save to backup file.zip
+      from inputOutput import exportELN
       if args.docID!='':
         exportELN(be, args.docID)
       else:
@@ -254,7 +313,7 @@ def commands(getDocu, args):
       doc += '    afterwards: adopt ontology (views are automatically generated)\n'
     elif args.command=='importXLS':
       import pandas as pd
-      from commonTools import commonTools as cT  #not globally imported since confuses translation
+      import commonToolsNative as cT
       if args.docID!='':
         be.changeHierarchy(args.docID)
       data = pd.read_excel(args.content, sheet_name=0).fillna('')
@@ -296,7 +355,14 @@ def commands(getDocu, args):
       doc += '  history: get history for docTypes\n'
       doc += '    example: pastaELN.py history\n'
     elif args.command=='history':
-      print(be.db.historyDB())
+      history = be.db.historyDB()
+      if args.format=='ndjson':
+        records = [{'-bins-':history['-bins-']}]
+        records+= [{'docType':key, 'histogram':history[key].tolist(), 'score':float(history['-score-'][key])}
+                   for key in history if key[0]!='-']
+        printNDJSON([records])
+        return '1'
+      print(history)
       return '1'
 
     if getDocu:
@@ -304,6 +370,7 @@ def commands(getDocu, args):
       doc += '    example: pastaELN.py updatePASTA\n'
     elif args.command=='updatePASTA':
       #update desktop incl. Python backend
+      from subprocess import run, PIPE, STDOUT
       softwarePath = Path(be.softwarePath)
       run(['git','pull'], cwd=softwarePath.parent, stdout=PIPE, stderr=STDOUT, check=True)
       # print(text.stdout.decode('utf-8')) #temporarily don't print
@@ -322,15 +389,20 @@ def commands(getDocu, args):
       be.changeHierarchy(args.docID)
 
     if getDocu:
-      doc += '  scanHierarchy: scan project with docID\n'
+      doc += '  scanHierarchy: scan project with docID; only directory of docID if step or task\n'
       doc += '    example: pastaELN.py scanHierarchy -i ....\n'
+      doc += '    content: scan only these paths, one per line\n'
+      doc += '    example: pastaELN.py scanHierarchy -i x-1234567890abc -c "project/001_step/new.csv"\n'
     elif args.command=='scanHierarchy':
-      be.scanTree()
+      if args.content:
+        be.scanTree(paths=[i for i in args.content.replace('\\n','\n').split('\n') if i.strip()!=''])
+      else:
+        be.scanTree(docID=be.hierStack[-1] if len(be.hierStack)>1 else None)
       return '1'
 
     if getDocu:
       doc += '  saveHierarchy: save hierarchy to database\n'
-      doc += '    example: pastaELN.py saveHierarchy -c "{...}" -i x-1234567890abc'
+      doc += '    example: pastaELN.py saveHierarchy -c "{...}" -i x-1234567890abc\n'
     elif args.command=='saveHierarchy':
       content = args.content.replace('\\n','\n')
       if content[0]=="'" and content[-1]=="'":
@@ -341,10 +413,51 @@ def commands(getDocu, args):
       # print(content)
       return '1' if be.setEditString(content) else '-1'
 
+    if getDocu:
+      doc += '  moveSubtree: move step or task with everything below to new parent; position among its steps, tasks\n'
+      doc += '    example: pastaELN.py moveSubtree -i x-1234567890abc -c "x-step... x-newParent..." --position 0\n'
+    elif args.command=='moveSubtree':
+      docID, newParentID = args.content.split()
+      return '1' if be.moveSubtree(docID, newParentID, args.position) else '-1'
+
+    if getDocu:
+      doc += '  deleteSubtree: delete step or task with everything below; directory is moved to trash_...\n'
+      doc += '    example: pastaELN.py deleteSubtree -i x-1234567890abc -c x-step...\n'
+    elif args.command=='deleteSubtree':
+      return '1' if be.deleteSubtree(args.content.strip()) else '-1'
+
+    if getDocu:
+      doc += '  moveData: move measurement, etc. to other project, step or task; content is moved by annex key\n'
+      doc += '    example: pastaELN.py moveData -c "m-1234567890abc x-newParent..."\n'
+    elif args.command=='moveData':
+      docID, newParentID = args.content.split()
+      return '1' if be.moveData(docID, newParentID) else '-1'
+
+    if getDocu:
+      doc += '  children: print direct children of document as json, in child-order\n'
+      doc += '    example: pastaELN.py children -i x-1234567890abc\n'
+    elif args.command=='children':
+      if args.format=='ndjson':
+        printNDJSON([be.listChildren(args.docID)])
+      else:
+        print(json.dumps(be.listChildren(args.docID)))
+      return '1'
+
     if getDocu:
       doc += '  hierarchy: print document hierarchy\n'
-      doc += '    example: pastaELN.py hierarchy -i x-1234567890abc'
+      doc += '    example: pastaELN.py hierarchy -i x-1234567890abc\n'
+      doc += '    example: pastaELN.py hierarchy -i x-1234567890abc --format ndjson\n'
+      doc += '    depth: print only this number of levels as json tree; expand nodes on demand\n'
+      doc += '    example: pastaELN.py hierarchy -i x-1234567890abc --depth 1\n'
     elif args.command=='hierarchy':
+      if args.docID!='':
+        be.changeHierarchy(args.docID)
+      if args.depth is not None:
+        print(json.dumps(be.getSubtree(None, args.depth)))
+        return '1'
+      if args.format=='ndjson':
+        printNDJSON(be.iterHierarchy(True))
+        return '1'
       print(be.outputHierarchy(True,True))
       return '1'
 
@@ -352,10 +465,93 @@ def commands(getDocu, args):
     print("**ERROR pma10: exception thrown during pastaELN.py"+traceback.format_exc()+"\n")
     raise
 
-  if not getDocu and be is not None:
+  if not getDocu and ownBackend and be is not None:
     be.exit()
   return doc
 
+
+def printNDJSON(pages):
+  """
+  Print records as newline-delimited json: one record per line; output is flushed after each page
+
+  Args:
+    pages (iterable): lists of json-serializable records
+  """
+  for page in pages:
+    sys.stdout.write(''.join(json.dumps(record)+'\n' for record in page))
+    sys.stdout.flush()
+  return
+
+
+def serve(be, args):
+  """
+  Answer JSON-RPC 2.0 requests with one backend that stays alive
+  - one request per line, one response per line; method is the command, params are docID, content, label
+    and the options of the command line, e.g. limit, sort, format
+  - output printed by a command is returned in the result, hence stdout only contains responses
+  - hierarchy is reset before each request: each request is independent
+
+  Args:
+    be (Pasta): backend
+    args (argparse.Namespace): arguments; content is optional file name of batch of requests
+  """
+  if args.content:
+    with open(args.content, 'r', encoding='utf-8') as fIn:
+      for line in fIn:
+        if line.strip()!='':
+          print(json.dumps(serveRequest(be, args, line)), flush=True)
+  else:
+    for line in sys.stdin:
+      if line.strip()!='':
+        print(json.dumps(serveRequest(be, args, line)), flush=True)
+  return
+
+
+def serveRequest(be, args, line):
+  """
+  Answer one JSON-RPC 2.0 request
+
+  Args:
+    be (Pasta): backend
+    args (argparse.Namespace): arguments of serve command
+    line (string): request
+
+  Returns:
+    dict: response
+  """
+  from io import StringIO
+  from contextlib import redirect_stdout
+  response = {'jsonrpc':'2.0', 'id':None}
+  output = StringIO()
+  try:
+    request = json.loads(line)
+    response['id'] = request.get('id', None)
+    params  = request.get('params', {})
+    if request.get('method', 'serve') in ('serve', 'watch') or params.get('database', args.database)!=args.database:
+      raise ValueError('Method not allowed in serve or different database: '+request.get('method', ''))
+    argsRequest = argparse.Namespace(command=request['method'], docID=params.get('docID', ''),
+                                     content=params.get('content', None), label=params.get('label', 'x0'),
+                                     database=args.database, profile=False, sort=params.get('sort', None),
+                                     descending=params.get('descending', False), limit=params.get('limit', None),
+                                     offset=params.get('offset', 0), token=params.get('token', None),
+                                     filter=params.get('filter', None), format=params.get('format', 'text'),
+                                     depth=params.get('depth', None), position=params.get('position', None),
+                                     workers=params.get('workers', 4))
+    be.hierStack, be.cwd, be.currentID, be.pendingSaves = [], Path('.'), None, None
+    be.hierarchy = None   #other clients might have changed the hierarchy since last request
+    with redirect_stdout(output):
+      success = commands(False, argsRequest, be)
+    if success=='':
+      response['error'] = {'code':-32601, 'message':'Command does not exist: '+request['method'],
+                           'data':output.getvalue()}
+    else:
+      response['result'] = {'success':success=='1', 'output':output.getvalue()}
+  except json.JSONDecodeError:
+    response['error'] = {'code':-32700, 'message':'Parse error'}
+  except Exception as error:  # pylint: disable=broad-except
+    response['error'] = {'code':-32000, 'message':str(error), 'data':output.getvalue()+traceback.format_exc()}
+  return response
+
 ###################
 ## MAIN FUNCTION ##
 if __name__=='__main__':
@@ -368,9 +564,26 @@ if __name__=='__main__':
   argparser.add_argument('-c','--content', help='content to save/store', default=None)
   argparser.add_argument('-l','--label',   help='label used for printing', default='x0')
   argparser.add_argument('-d','--database',help='name of database configuration', default='') #required for be = Pasta(args.database)
+  argparser.add_argument('--sort',      help='print: sort by this column', default=None)
+  argparser.add_argument('--descending',help='print: reverse order', action='store_true')
+  argparser.add_argument('--limit',     help='print: max. number of rows', type=int, default=None)
+  argparser.add_argument('--offset',    help='print: skip this number of rows', type=int, default=0)
+  argparser.add_argument('--token',     help='print: continue after previous page', default=None)
+  argparser.add_argument('--filter',    help='print: column=value; value* for prefix', action='append')
+  argparser.add_argument('--format',    help='output of print, hierarchy, history, verifyDB, scanAll: text or ndjson (one json record per line)',
+                         choices=['text','ndjson'], default='text')
+  argparser.add_argument('--position',  help='moveSubtree: position among steps, tasks of new parent', type=int, default=None)
+  argparser.add_argument('--workers',   help='scanAll: max. number of projects scanned at once', type=int, default=4)
+  argparser.add_argument('--depth',     help='hierarchy: number of levels below docID', type=int, default=None)
+  argparser.add_argument('--profile', help='print startup profile: import and initialization times', action='store_true')
   arguments = argparser.parse_args()
+  commandStart = time.perf_counter()
   result = commands(False, arguments)
+  if arguments.profile:
+    heavyModules = [i for i in HEAVY_MODULES if i in sys.modules]
+    print(f'  {"total command": <35}{time.perf_counter()-commandStart:7.3f}')
+    print(f'  {"loaded heavy modules": <35}{", ".join(heavyModules)}')
   if result == '':
     print('**ERROR pma08: command in pastaELN.py does not exist |',arguments.command)
-  elif result == '1' and arguments.command!='up':
+  elif result == '1' and arguments.command!='up' and arguments.format!='ndjson':
     print('SUCCESS')
@@ -0,0 +1,173 @@
+"""Watch directory trees for new and changed files: continuous ingest
+- Linux: inotify; waiting for events has no cost
+- other systems: poll the stat of all files, see fileIndex.walk
+- a file is reported once no write occurred for the settle time (debounce), i.e. instruments finished writing
+"""
+import os, sys, time, select, struct
+
+IN_MODIFY      = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ISDIR       = 0x40000000
+WATCH_MASK     = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER   = struct.Struct('iIII')   #watch descriptor, mask, cookie, length of name
+READ_SIZE      = 64*1024                 #bytes of events read at once
+
+class Watcher:
+  """
+  Watch directory trees; .git directories are ignored
+  """
+  def __init__(self, directories, settle):
+    """
+    Args:
+      directories (list): absolute paths of directories, e.g. projects
+      settle (float): sec without write after which a file is reported
+    """
+    self.directories = [str(i) for i in directories]
+    self.settle  = settle
+    self.pending = {}   #path: time of last event
+    self.watches = {}   #watch descriptor: directory
+    self.fd = None
+    self.lastStats = None
+    if sys.platform.startswith('linux'):
+      import ctypes, ctypes.util
+      self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+      self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+      if self.fd<0:
+        print('**Warning: inotify not available, poll instead |',os.strerror(ctypes.get_errno()))
+        self.fd = None
+      else:
+        for directory in self.directories:
+          self.addTree(directory)
+
+
+  def close(self):
+    """ stop watching """
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
+    return
+
+
+  def batches(self):
+    """
+    Wait for changes and report them
+
+    Yields:
+      list: paths of files (and removed directories) that changed and whose writes settled
+    """
+    while True:
+      if self.fd is None:
+        time.sleep(self.settle)
+        self.poll()
+      else:
+        timeout = None if not self.pending else \
+                  max(0, min(self.pending.values())+self.settle-time.monotonic())
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+          self.read()
+      now = time.monotonic()
+      settled = sorted(path for path, lastEvent in self.pending.items() if now-lastEvent>=self.settle)
+      for path in settled:
+        del self.pending[path]
+      if settled:
+        yield settled
+
+
+  def addTree(self, directory):
+    """
+    Watch directory and all directories below
+
+    Args:
+      directory (string): absolute path
+
+    Returns:
+      list: files found: they could have been written before the watch existed
+    """
+    files, todo = [], [directory]
+    while todo:
+      directory = todo.pop()
+      wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+      if wd<0:
+        print('**Warning: cannot watch directory; increase fs.inotify.max_user_watches |',directory)
+        continue
+      self.watches[wd] = directory
+      try:
+        with os.scandir(directory) as entries:
+          for entry in entries:
+            if entry.name=='.git':
+              continue
+            if entry.is_dir(follow_symlinks=False):
+              todo.append(entry.path)
+            else:
+              files.append(entry.path)
+      except OSError:   #removed meanwhile
+        pass
+    return files
+
+
+  def removeTree(self, directory):
+    """
+    Stop watching directory and all directories below, e.g. after it was moved away
+
+    Args:
+      directory (string): absolute path
+    """
+    for wd, path in list(self.watches.items()):
+      if path==directory or path.startswith(directory+os.sep):
+        self.libc.inotify_rm_watch(self.fd, wd)
+        del self.watches[wd]
+    return
+
+
+  def read(self):
+    """
+    Read available inotify events and mark the files as pending
+    """
+    data, offset, now = os.read(self.fd, READ_SIZE), 0, time.monotonic()
+    while offset<len(data):
+      wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+      name = os.fsdecode(data[offset+EVENT_HEADER.size:offset+EVENT_HEADER.size+length].rstrip(b'\0'))
+      offset += EVENT_HEADER.size+length
+      if mask & IN_Q_OVERFLOW:   #events were lost: everything is pending
+        self.pending.update({i:now for i in self.directories})
+        continue
+      if mask & IN_IGNORED:      #directory was removed
+        self.watches.pop(wd, None)
+        continue
+      if wd not in self.watches or name=='.git':
+        continue
+      path = os.path.join(self.watches[wd], name)
+      if mask & IN_ISDIR:
+        if mask & (IN_CREATE | IN_MOVED_TO):
+          self.pending.update({i:now for i in self.addTree(path)})
+        elif mask & IN_MOVED_FROM:
+          self.removeTree(path)
+          self.pending[path] = now
+        elif mask & IN_DELETE:
+          self.pending[path] = now
+        continue
+      self.pending[path] = now
+    return
+
+
+  def poll(self):
+    """
+    Compare stat of all files with previous poll and mark the changed files as pending
+    """
+    from pathlib import Path
+    from fileIndex import walk
+    stats, now = {}, time.monotonic()
+    for directory in self.directories:
+      stats.update({os.path.join(directory, path):stat for path, stat in walk(Path(directory)).items()})
+    if self.lastStats is not None:
+      for path in set(stats) | set(self.lastStats):
+        if stats.get(path)!=self.lastStats.get(path):
+          self.pending[path] = now
+    self.lastStats = stats
+    return